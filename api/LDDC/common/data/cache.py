@@ -1,15 +1,26 @@
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+import asyncio
 import atexit
-from collections.abc import Callable
+import pickle
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass
+from enum import IntEnum
+from threading import Event, Lock, Thread
 from typing import Any, Literal, ParamSpec, TypeVar, overload
 
 from diskcache import Cache
 
+from LDDC.common.data.config import cfg
+from LDDC.common.logger import logger
 from LDDC.common.paths import cache_dir
 
 cache = Cache(cache_dir, sqlitecache_size=512)
-cache_version = 6
+cache_version = 9
 if "version" not in cache or cache["version"] != cache_version:
     cache.clear()
 cache["version"] = cache_version
@@ -19,6 +30,301 @@ P = ParamSpec("P")
 T = TypeVar("T")
 
 
+class CacheStatus(IntEnum):
+    """缓存状态, 用作结果的cached标记
+
+    MISS为假, HIT与NEGATIVE为真, 与原来的bool标记兼容
+    """
+
+    MISS = 0
+    HIT = 1
+    NEGATIVE = 2  # 命中了缓存的空结果或错误
+    COALESCED = 3  # 等待了另一个调用者正在进行的相同请求
+
+
+# 负缓存的过期时间(秒)
+NEGATIVE_EXPIRE_EMPTY = 1800  # 空结果
+NEGATIVE_EXPIRE_NOT_FOUND = 1800  # LyricsNotFoundError
+NEGATIVE_EXPIRE_REQUEST_ERROR = 120  # 上游返回错误(APIRequestError, LyricsRequestError, HTTP状态码错误)
+NEGATIVE_EXPIRE_TRANSPORT_ERROR = 30  # 超时、连接失败等
+
+
+@dataclass(frozen=True, slots=True)
+class _NegativeEntry:
+    """负缓存条目, 记录一个空结果或一个错误"""
+
+    value: Any = None
+    error_type: type[Exception] | None = None
+    error_msg: str = ""
+
+    def raise_error(self) -> None:
+        if self.error_type is None:
+            return
+        try:
+            error = self.error_type(self.error_msg)
+        except Exception:  # noqa: BLE001
+            # 部分错误类型(如httpx.HTTPStatusError)无法仅用错误信息重建
+            from LDDC.common.exceptions import APIRequestError
+
+            error = APIRequestError(self.error_msg)
+        error.cached = CacheStatus.NEGATIVE  # type: ignore[attr-defined]
+        raise error
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheEntry:
+    """带软过期时间的缓存条目
+
+    软过期(stale_at)后到硬过期(diskcache的expire)前, 仍返回旧值并在后台刷新
+    """
+
+    value: Any
+    stale_at: float
+
+
+# 刷新相关设置
+REFRESH_WORKERS = 4  # 后台刷新的最大并发数
+REFRESH_AHEAD_INTERVAL = 60  # 提前刷新的检查间隔(秒)
+REFRESH_AHEAD_WINDOW = 600  # 在软过期前多少秒内提前刷新
+REFRESH_AHEAD_MIN_HITS = 3  # 提前刷新所需的最少命中次数
+REFRESH_AHEAD_TOP = 32  # 每次检查最多提前刷新的条目数
+REFRESH_AHEAD_MAX_TRACKED = 4096  # 最多记录的热门条目数, 已满时不再记录新的键
+REFRESH_AHEAD_MIN_TRACKED_HITS = 0.5  # 衰减后命中次数低于此值的条目不再记录
+
+
+@dataclass(slots=True)
+class _RefreshTask:
+    func: Callable[..., Any]
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    cache_settings: dict
+    stale_at: float
+    hits: float = 0
+
+
+class _Refresher:
+    """后台刷新缓存条目
+
+    1. 同一个键同时只会有一个刷新任务(避免过期时大量请求同时访问上游)
+    2. 记录热门条目的命中次数, 定期在软过期前刷新最热门的条目(refresh-ahead)
+    3. 命中时只做O(1)的记录, 冷门条目在后台检查时随命中次数衰减被移除
+    """
+
+    def __init__(self) -> None:
+        self._executor: ThreadPoolExecutor | None = None
+        self._refreshing: set[Hashable] = set()
+        self._tracked: dict[Hashable, _RefreshTask] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def track(self, key: Hashable, task: _RefreshTask) -> None:
+        """记录一次命中"""
+        with self._lock:
+            if (tracked := self._tracked.get(key)) is None:
+                if len(self._tracked) >= REFRESH_AHEAD_MAX_TRACKED:
+                    return
+                self._tracked[key] = tracked = task
+            tracked.stale_at = task.stale_at
+            tracked.hits += 1
+            if self._thread is None:
+                self._thread = Thread(target=self._refresh_ahead_loop, name="cache-refresh-ahead", daemon=True)
+                self._thread.start()
+
+    def schedule(self, key: Hashable, task: _RefreshTask) -> bool:
+        """在后台刷新一个键, 该键已在刷新时返回False"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+        self._executor.submit(self._refresh, key, task)
+        return True
+
+    def _refresh(self, key: Hashable, task: _RefreshTask) -> None:
+        try:
+            result = task.func(*task.args, **task.kwargs)
+            # 刷新失败或结果为空时保留旧值, 直到硬过期
+            if result:
+                _, expire, soft_expire, _ = _parse_settings(task.cache_settings)
+                _store(key, result, expire, soft_expire)
+        except Exception:  # noqa: BLE001
+            logger.warning(f"后台刷新缓存失败: {key[0]}", exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_ahead_loop(self) -> None:
+        while not self._stop.wait(REFRESH_AHEAD_INTERVAL):
+            now = time.time()
+            with self._lock:
+                candidates = sorted(
+                    (
+                        (key, task)
+                        for key, task in self._tracked.items()
+                        if task.hits >= REFRESH_AHEAD_MIN_HITS and task.stale_at - now <= REFRESH_AHEAD_WINDOW
+                    ),
+                    key=lambda item: item[1].hits,
+                    reverse=True,
+                )[:REFRESH_AHEAD_TOP]
+                for key, task in candidates:
+                    # 刷新后重新计数, 只有仍然热门的条目才会再次被提前刷新
+                    del self._tracked[key]
+                # 衰减命中次数, 让长时间不再访问的条目失去热度, 并移除已冷却的条目
+                for key, task in list(self._tracked.items()):
+                    task.hits /= 2
+                    if task.hits < REFRESH_AHEAD_MIN_TRACKED_HITS:
+                        del self._tracked[key]
+            for key, task in candidates:
+                self.schedule(key, task)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+refresher = _Refresher()
+
+
+def _negative_expire(error: Exception) -> int | None:
+    """获取错误对应的负缓存时间, 返回None表示不缓存"""
+    from LDDC.common.exceptions import APIRequestError, LyricsNotFoundError, LyricsRequestError
+
+    if isinstance(error, LyricsNotFoundError):
+        return NEGATIVE_EXPIRE_NOT_FOUND
+    if isinstance(error, APIRequestError | LyricsRequestError):
+        return NEGATIVE_EXPIRE_REQUEST_ERROR
+
+    from httpx import HTTPStatusError, TransportError  # 加快启动速度
+
+    if isinstance(error, HTTPStatusError):
+        return NEGATIVE_EXPIRE_REQUEST_ERROR
+    if isinstance(error, TransportError):
+        return NEGATIVE_EXPIRE_TRANSPORT_ERROR
+    return None
+
+
+class MemoryCache:
+    """进程内的LRU缓存, 位于diskcache之前
+
+    热点数据直接从内存返回, 无需SQLite读取与反序列化
+    1. 同时限制条目数与字节数(按写入磁盘时pickle后的大小计算), 超出时淘汰最久未使用的条目
+    2. 条目的过期时间与diskcache中的一致
+    注意: 返回的是同一个对象, 调用者不应修改它
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, tuple[Any, int, float | None]] = OrderedDict()  # key: (value, size, expire_at)
+        self._bytes = 0
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            value, size, expire_at = entry
+            if expire_at is not None and expire_at <= time.time():
+                del self._data[key]
+                self._bytes -= size
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: Hashable, value: Any, size: int, expire_at: float | None) -> None:
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if (old := self._data.pop(key, None)) is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size, expire_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_size, _) = self._data.popitem(last=False)
+                self._bytes -= old_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+
+memory_cache = MemoryCache(cfg["memory_cache_max_entries"], cfg["memory_cache_max_bytes"])
+
+_inflight: dict[Hashable, Future] = {}  # 正在进行的请求
+_inflight_lock = Lock()
+
+_stats: dict[str, dict[str, int]] = {}
+_stats_lock = Lock()
+
+
+def _record(name: str, status: Literal["memory_hits", "disk_hits", "misses", "coalesced"]) -> None:
+    with _stats_lock:
+        if name not in _stats:
+            _stats[name] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        _stats[name][status] += 1
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """获取每个被缓存函数的命中/未命中次数
+
+    Returns:
+        dict[str, dict[str, int]]: 函数名 -> {"memory_hits", "disk_hits", "misses", "coalesced"}
+        coalesced为等待了相同的进行中请求的次数
+
+    """
+    with _stats_lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+
+def _cache_get(key: tuple) -> tuple[bool, Any]:
+    """依次从内存与磁盘读取缓存, 磁盘命中时提升到内存"""
+    hashable = _is_hashable(key)
+    if hashable:
+        found, value = memory_cache.get(key)
+        if found:
+            _record(key[0], "memory_hits")
+            return True, value
+
+    data, expire_at = cache.get(key, expire_time=True)
+    if data is None:
+        _record(key[0], "misses")
+        return False, None
+
+    _record(key[0], "disk_hits")
+    cached = pickle.loads(data)  # noqa: S301
+    if hashable:
+        memory_cache.set(key, cached, len(data), expire_at)
+    return True, cached
+
+
+def _cache_set(key: tuple, value: Any, expire: int | None) -> None:
+    # 只pickle一次: 以bytes写入磁盘(diskcache不会再次pickle), 其长度同时作为内存缓存的大小
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    cache.set(key, data, expire=expire)
+    if _is_hashable(key):
+        memory_cache.set(key, value, len(data), time.time() + expire if expire is not None else None)
+
+
+def _is_hashable(key: tuple) -> bool:
+    try:
+        hash(key)
+    except TypeError:
+        return False
+    return True
+
+
 def cached_call(
     func: Callable[P, T],
     cache_settings: dict | None = None,
@@ -32,7 +338,10 @@ def cached_call(
         cache_settings (dict): 缓存设置,包括:
             typed (bool): 是否启用类型感知
             ignore (set): 忽略的参数索引或关键字
-            expire (int): 缓存过期时间,单位为秒
+            expire (int): 缓存过期时间(硬过期),单位为秒
+            soft_expire (int): 软过期时间,单位为秒,超过后返回旧值并在后台刷新,直到硬过期
+            negative (bool): 是否缓存空结果与错误(负缓存), 过期时间见NEGATIVE_EXPIRE_*
+            key (Callable): 接收与函数相同的参数, 返回规范的缓存键, 设置后忽略typed与ignore
         *args (P.args): 位置参数
         **kwargs (P.kwargs): 关键字参数
 
@@ -41,19 +350,7 @@ def cached_call(
 
     """
     # return func(*args, **kwargs)
-    typed, ignore, expire = True, set(), None
-    if cache_settings is not None:
-        typed = cache_settings.get("typed", typed)
-        ignore = cache_settings.get("ignore", ignore)
-        expire = cache_settings.get("expire", expire)
-
-    key = _buildcache_key(func, args, kwargs, typed, ignore)
-    if (cached := cache.get(key)) is not None:
-        return cached  # type: ignore[reportReturnType]
-
-    result = func(*args, **kwargs)
-    cache.set(key, result, expire=expire)
-    return result
+    return _cached_call(func, cache_settings, args, kwargs)[0]
 
 
 @overload
@@ -82,7 +379,7 @@ def get_cached_func(
     ignore: set[int | str] | None = None,
     expire: int | None = None,
     with_status: Literal[True] = True,
-) -> Callable[P, tuple[T, bool]]: ...
+) -> Callable[P, tuple[T, CacheStatus]]: ...
 
 
 def get_cached_func(
@@ -91,11 +388,11 @@ def get_cached_func(
     ignore: set[int | str] | None = None,
     expire: int | None = None,
     with_status: bool = False,
-) -> Callable[P, T] | Callable[P, tuple[T, bool]]:
+) -> Callable[P, T] | Callable[P, tuple[T, CacheStatus]]:
     cache_settings = {"typed": typed, "ignore": ignore if ignore else set(), "expire": expire}
     if with_status:
 
-        def cached_func(*args: P.args, **kwargs: P.kwargs) -> tuple[T, bool]:  # type: ignore[]
+        def cached_func(*args: P.args, **kwargs: P.kwargs) -> tuple[T, CacheStatus]:  # type: ignore[]
             return cached_call_with_status(func, cache_settings, *args, **kwargs)
     else:
 
@@ -110,7 +407,7 @@ def cached_call_with_status(
     cache_settings: dict | None = None,
     *args: P.args,
     **kwargs: P.kwargs,
-) -> tuple[T, bool]:
+) -> tuple[T, CacheStatus]:
     """高性能缓存调用函数,支持参数过滤和类型感知
 
     Args:
@@ -118,28 +415,147 @@ def cached_call_with_status(
         cache_settings (dict): 缓存设置,包括:
             typed (bool): 是否启用类型感知
             ignore (set): 忽略的参数索引或关键字
-            expire (int): 缓存过期时间,单位为秒
+            expire (int): 缓存过期时间(硬过期),单位为秒
+            soft_expire (int): 软过期时间,单位为秒,超过后返回旧值并在后台刷新,直到硬过期
+            negative (bool): 是否缓存空结果与错误(负缓存), 过期时间见NEGATIVE_EXPIRE_*
+            key (Callable): 接收与函数相同的参数, 返回规范的缓存键, 设置后忽略typed与ignore
         *args (P.args): 位置参数
         **kwargs (P.kwargs): 关键字参数
 
     Returns:
-        T: 函数返回值
+        tuple[T, CacheStatus]: 函数返回值与缓存状态
+
+    """
+    # return func(*args, **kwargs), CacheStatus.MISS
+    return _cached_call(func, cache_settings, args, kwargs)
+
+
+def _parse_settings(cache_settings: dict | None) -> tuple[bool, int | None, int | None, bool]:
+    """解析缓存设置中与存储相关的部分: (typed, expire, soft_expire, negative)"""
+    if cache_settings is None:
+        return True, None, None, False
+    return (
+        cache_settings.get("typed", True),
+        cache_settings.get("expire"),
+        cache_settings.get("soft_expire"),
+        cache_settings.get("negative", False),
+    )
+
+
+def _cached_call(
+    func: Callable[..., T],
+    cache_settings: dict | None,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> tuple[T, CacheStatus]:
+    _, expire, soft_expire, negative = _parse_settings(cache_settings)
+
+    key = _settings_cache_key(func, cache_settings, args, kwargs)
+    found, cached = _cache_get(key)
+    if found:
+        if isinstance(cached, _NegativeEntry):
+            cached.raise_error()
+            return cached.value, CacheStatus.NEGATIVE
+        if isinstance(cached, _CacheEntry):
+            task = _RefreshTask(func, args, kwargs, cache_settings or {}, cached.stale_at)
+            refresher.track(key, task)
+            if cached.stale_at <= time.time():
+                # 已软过期: 返回旧值, 并在后台刷新(同一个键只刷新一次)
+                refresher.schedule(key, task)
+            return cached.value, CacheStatus.HIT
+        return cached, CacheStatus.HIT
+
+    if not _is_hashable(key):
+        return _call_and_store(key, func, args, kwargs, expire, soft_expire, negative), CacheStatus.MISS
+
+    # 单飞: 相同的键同时只有一个调用者请求上游, 其他调用者等待其结果(包括错误)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        _record(key[0], "coalesced")
+        return future.result(), CacheStatus.COALESCED
+
+    try:
+        result = _call_and_store(key, func, args, kwargs, expire, soft_expire, negative)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+    return result, CacheStatus.MISS
 
+
+async def cached_call_with_status_async(
+    func: Callable[P, T],
+    cache_settings: dict | None = None,
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> tuple[T, CacheStatus]:
+    """cached_call_with_status的asyncio版本
+
+    函数在线程池中执行, 相同的请求正在进行时直接等待其结果, 不占用线程
     """
-    # return func(*args, **kwargs), False
-    typed, ignore, expire = True, set(), None
-    if cache_settings is not None:
-        typed = cache_settings.get("typed", typed)
-        ignore = cache_settings.get("ignore", ignore)
-        expire = cache_settings.get("expire", expire)
+    key = _settings_cache_key(func, cache_settings, args, kwargs)
+    if _is_hashable(key):
+        with _inflight_lock:
+            future = _inflight.get(key)
+        if future is not None:
+            _record(key[0], "coalesced")
+            return await asyncio.wrap_future(future), CacheStatus.COALESCED
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(_cached_call, func, cache_settings, args, kwargs))
+
+
+def _call_and_store(
+    key: tuple,
+    func: Callable[..., T],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+    expire: int | None,
+    soft_expire: int | None,
+    negative: bool,
+) -> T:
+    if not negative:
+        result = func(*args, **kwargs)
+        _store(key, result, expire, soft_expire)
+        return result
+
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        if (negative_expire := _negative_expire(e)) is not None:
+            _cache_set(key, _NegativeEntry(error_type=type(e), error_msg=str(e)), negative_expire)
+        raise
+
+    if not result:
+        _cache_set(key, _NegativeEntry(value=result), NEGATIVE_EXPIRE_EMPTY)
+    else:
+        _store(key, result, expire, soft_expire)
+    return result
+
+
+def _store(key: tuple, value: Any, expire: int | None, soft_expire: int | None) -> None:
+    """缓存结果, 设置了软过期时间时包装为_CacheEntry"""
+    if soft_expire is None:
+        _cache_set(key, value, expire)
+    else:
+        _cache_set(key, _CacheEntry(value, time.time() + soft_expire), expire)
 
-    key = _buildcache_key(func, args, kwargs, typed, ignore)
-    if (cached := cache.get(key)) is not None:
-        return cached, True  # type: ignore[reportReturnType]
 
-    result = func(*args, **kwargs)
-    cache.set(key, result, expire=expire)
-    return result, False
+def _settings_cache_key(func: Callable[..., Any], cache_settings: dict | None, args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple:
+    """根据缓存设置构建缓存键, 设置了key时使用其返回的规范键代替参数"""
+    if cache_settings is not None and (key_func := cache_settings.get("key")) is not None:
+        return (f"{func.__module__}.{func.__qualname__}", key_func(*args, **kwargs))
+    typed = cache_settings.get("typed", True) if cache_settings is not None else True
+    ignore = cache_settings.get("ignore", set()) if cache_settings is not None else set()
+    return _buildcache_key(func, args, kwargs, typed, ignore)
 
 
 def _buildcache_key(
@@ -174,6 +590,7 @@ def _buildcache_key(
 
 
 def _atexit() -> None:
+    refresher.stop()
     cache["version"] = cache_version
     cache.expire()
     cache.close()
@@ -92,6 +92,14 @@ class Config(dict):
             "color_scheme": "auto",
             "log_level": "INFO",
             "auto_check_update": True,
+
+            "memory_cache_max_entries": 512,  # 进程内缓存的最大条目数, 0为禁用
+            "memory_cache_max_bytes": 64 * 1024 * 1024,  # 进程内缓存的最大字节数(按pickle大小估算)
+            "decode_process_workers": -1,  # 歌词解密解析进程池的进程数, -1为自动(CPU核心数), 0或1为禁用
+            "match_index_max_entries": 200000,  # 本地匹配索引的最大条目数, 0为禁用
+            "lrclib_dump_path": "",  # lrclib数据库转储的路径, 设置后可以使用离线的LRCLIB_DUMP源
+            "lyrics_library_path": "",  # 本地歌词库目录, 设置后可以使用LIBRARY源
+            "lyrics_library_scan_interval": 60,  # 本地歌词库的增量扫描间隔(秒), 0为只在启动时扫描
         }
 
         self.reset()
@@ -6,6 +6,7 @@ from typing import ParamSpec, TypeVar
 from ._enums import Direction, FileNameMode, LyricsFormat, LyricsType, QrcType, SaveMode, SearchType, Source, TranslateSource, TranslateTargetLanguage
 from ._info import APIResultList, Artist, Language, LyricInfo, SearchInfo, SongInfo, SongListInfo, SongListType
 from ._lyrics import (
+    CompactLyricsData,
     FSLyrics,
     FSLyricsData,
     FSLyricsLine,
@@ -23,6 +24,7 @@ from ._lyrics import (
 __all__ = [
     "APIResultList",
     "Artist",
+    "CompactLyricsData",
     "Direction",
     "FSLyrics",
     "FSLyricsData",
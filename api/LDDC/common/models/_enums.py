@@ -77,6 +77,8 @@ class Source(Enum):
     NE = 3
     KW = 4
     LRCLIB = 5
+    LRCLIB_DUMP = 6  # lrclib的离线数据库转储
+    LIBRARY = 7  # 本地目录中的歌词库
     Local = 100
 
     def __str__(self) -> str:
@@ -93,6 +95,10 @@ class Source(Enum):
                 return "酷我音乐"
             case Source.LRCLIB:
                 return "Lrclib"
+            case Source.LRCLIB_DUMP:
+                return "Lrclib(离线)"
+            case Source.LIBRARY:
+                return "本地歌词库"
             case Source.Local:
                 return "本地"
             case _:
@@ -111,7 +117,7 @@ class Source(Enum):
                 return (SearchType.SONG, SearchType.ALBUM, SearchType.SONGLIST)
             case Source.KW:
                 return (SearchType.SONG,)
-            case Source.LRCLIB:
+            case Source.LRCLIB | Source.LRCLIB_DUMP | Source.LIBRARY:
                 return (SearchType.SONG,)
             case _:
                 return ()
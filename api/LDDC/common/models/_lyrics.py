@@ -1,7 +1,8 @@
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+from array import array
 from collections import UserDict
-from collections.abc import MutableMapping
+from collections.abc import Iterable, Iterator, MutableMapping, Sequence
 from dataclasses import replace
 from typing import Literal, NamedTuple, NewType, TypeVar, overload
 
@@ -24,6 +25,120 @@ class LyricsLine(NamedTuple):
 LyricsData = NewType("LyricsData", list[LyricsLine])
 MultiLyricsData = NewType("MultiLyricsData", MutableMapping[str, LyricsData])
 
+_NONE_TIME = -(2**63)  # 在时间列中表示None
+_MAX_TIME = 2**63 - 1  # 超出的时间(只可能来自格式错误的时间戳)会被截断
+
+
+def _pack_time(time: int | None) -> int:
+    return _NONE_TIME if time is None else min(time, _MAX_TIME)
+
+
+class CompactLyricsData(Sequence[LyricsLine]):
+    """列式存储的只读LyricsData
+
+    行与字的起止时间分别保存在array('q')中, 每行的字由偏移数组索引, 所有字的文本拼接为一个字符串。
+    对外提供与LyricsData相同的序列接口(索引、切片、迭代、len), 访问时才创建LyricsLine/LyricsWord,
+    占用的内存、pickle大小与反序列化时间都远小于由大量小对象组成的LyricsData。
+    """
+
+    __slots__ = ("_line_ends", "_line_starts", "_text", "_text_offsets", "_word_ends", "_word_offsets", "_word_starts")
+
+    def __init__(self, lines: Iterable[LyricsLine] = ()) -> None:
+        line_starts, line_ends, word_offsets = array("q"), array("q"), array("i", [0])
+        word_starts, word_ends, text_offsets = array("q"), array("q"), array("i", [0])
+        texts: list[str] = []
+        text_len = 0
+        for start, end, words in lines:
+            line_starts.append(_pack_time(start))
+            line_ends.append(_pack_time(end))
+            for word_start, word_end, text in words:
+                word_starts.append(_pack_time(word_start))
+                word_ends.append(_pack_time(word_end))
+                texts.append(text)
+                text_len += len(text)
+                text_offsets.append(text_len)
+            word_offsets.append(len(word_starts))
+
+        self._line_starts, self._line_ends, self._word_offsets = line_starts, line_ends, word_offsets
+        self._word_starts, self._word_ends, self._text_offsets = word_starts, word_ends, text_offsets
+        self._text = "".join(texts)
+
+    def _line(self, index: int) -> LyricsLine:
+        word_starts, word_ends, text_offsets, text = self._word_starts, self._word_ends, self._text_offsets, self._text
+        start, end = self._line_starts[index], self._line_ends[index]
+        return LyricsLine(
+            None if start == _NONE_TIME else start,
+            None if end == _NONE_TIME else end,
+            [
+                LyricsWord(
+                    None if word_starts[j] == _NONE_TIME else word_starts[j],
+                    None if word_ends[j] == _NONE_TIME else word_ends[j],
+                    text[text_offsets[j]:text_offsets[j + 1]],
+                )
+                for j in range(self._word_offsets[index], self._word_offsets[index + 1])
+            ],
+        )
+
+    def __len__(self) -> int:
+        return len(self._line_starts)
+
+    @overload
+    def __getitem__(self, index: int) -> LyricsLine: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> LyricsData: ...
+
+    def __getitem__(self, index: int | slice) -> LyricsLine | LyricsData:
+        if isinstance(index, slice):
+            return LyricsData([self._line(i) for i in range(*index.indices(len(self)))])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            msg = "CompactLyricsData index out of range"
+            raise IndexError(msg)
+        return self._line(index)
+
+    def __iter__(self) -> Iterator[LyricsLine]:
+        for i in range(len(self)):
+            yield self._line(i)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactLyricsData):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def to_list(self) -> LyricsData:
+        """转换为普通的LyricsData"""
+        return LyricsData(list(self))
+
+    def shifted(self, offset: int) -> "CompactLyricsData":
+        """返回所有时间加上offset(最小为0)后的歌词数据, 只重建时间列, 文本与偏移数组共享"""
+        if offset == 0:
+            return self
+
+        def shift(column: array) -> array:
+            return array("q", [t if t == _NONE_TIME else min(max(t + offset, 0), _MAX_TIME) for t in column])
+
+        shifted = CompactLyricsData.__new__(CompactLyricsData)
+        shifted._line_starts, shifted._line_ends = shift(self._line_starts), shift(self._line_ends)
+        shifted._word_starts, shifted._word_ends = shift(self._word_starts), shift(self._word_ends)
+        shifted._word_offsets, shifted._text_offsets, shifted._text = self._word_offsets, self._text_offsets, self._text
+        return shifted
+
 
 # FS 是 full_timestamps 的缩写
 class FSLyricsWord(NamedTuple):
@@ -250,7 +365,9 @@ class LyricsBase(UserDict[str, VT]):
 
         return MultiLyricsData(
             {
-                lang: LyricsData(
+                lang: lines.shifted(offset)
+                if isinstance(lines, CompactLyricsData)
+                else LyricsData(
                     [
                         LyricsLine(
                             adjust_time(line.start),
@@ -310,6 +427,13 @@ class Lyrics(LyricsBase[LyricsData]):
         for lang, lyrics_data in data.items():
             self[lang] = lyrics_data
 
+    def compact(self) -> "Lyrics":
+        """将所有歌词数据转换为CompactLyricsData(转换后应视为只读), 返回自身"""
+        for lang, lyrics_data in self.items():
+            if not isinstance(lyrics_data, CompactLyricsData):
+                self[lang] = CompactLyricsData(lyrics_data)  # type: ignore[assignment]
+        return self
+
     @classmethod
     def get_inst_lyrics(cls, info: SongInfo | LyricInfo) -> "Lyrics":
         lyrics = Lyrics(info)
@@ -1,8 +1,11 @@
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+import heapq
 import re
+from collections import deque
 from collections.abc import Sequence
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Literal
 
 from LDDC.common.models import Direction, FSLyricsData, FSLyricsLine, LyricsLine, Source
@@ -34,19 +37,73 @@ symbol_map = {
 }
 
 
+# 全角符号转半角、空白字符(与正则的\s相同, 即str.isspace()为真的字符, 都不大于U+3000)转空格的转换表
+_SYMBOL_TABLE = str.maketrans({
+    **{chr(c): " " for c in range(0x3001) if chr(c).isspace()},
+    **symbol_map,
+})
+
+
+@lru_cache(maxsize=4096)
 def unified_symbol(text: str) -> str:
-    text = text.strip()
-    for k, v in symbol_map.items():
-        text = text.replace(k, v)
-    return re.sub(r"\s", " ", text)
+    return text.strip().translate(_SYMBOL_TABLE)
+
 
+def normalize_text(text: str | None) -> str:
+    """规范化文本, 只保留文字与数字"""
+    return "".join(char for char in unified_symbol(text).casefold() if char.isalnum()) if text else ""
 
+
+def _matched_count(text1: str, text2: str) -> int:
+    """计算SequenceMatcher(lambda x: x == " ", text1, text2)匹配到的字符总数
+
+    与difflib相同的算法(找到最长匹配块后对两侧递归, 空格为junk, 只能在匹配块的两端扩展),
+    省去了通用实现中的对象创建与popular元素处理(text2不足200个字符时difflib不会启用autojunk)
+    """
+    b2j: dict[str, list[int]] = {}
+    for j, char in enumerate(text2):
+        if char != " ":
+            b2j.setdefault(char, []).append(j)
+    total = 0
+    queue = [(0, len(text1), 0, len(text2))]
+    while queue:
+        alo, ahi, blo, bhi = queue.pop()
+        # 寻找最长的非junk匹配块(相同长度时取最靠前的)
+        besti, bestj, bestsize = alo, blo, 0
+        j2len: dict[int, int] = {}
+        for i in range(alo, ahi):
+            new_j2len = {}
+            for j in b2j.get(text1[i], ()):
+                if j < blo:
+                    continue
+                if j >= bhi:
+                    break
+                k = new_j2len[j] = j2len.get(j - 1, 0) + 1
+                if k > bestsize:
+                    besti, bestj, bestsize = i - k + 1, j - k + 1, k
+            j2len = new_j2len
+        # 向两端扩展相同的junk字符
+        while besti > alo and bestj > blo and text2[bestj - 1] == " " and text1[besti - 1] == " ":
+            besti, bestj, bestsize = besti - 1, bestj - 1, bestsize + 1
+        while besti + bestsize < ahi and bestj + bestsize < bhi and text2[bestj + bestsize] == " " and text1[besti + bestsize] == " ":
+            bestsize += 1
+        if bestsize:
+            total += bestsize
+            if alo < besti and blo < bestj:
+                queue.append((alo, besti, blo, bestj))
+            if besti + bestsize < ahi and bestj + bestsize < bhi:
+                queue.append((besti + bestsize, ahi, bestj + bestsize, bhi))
+    return total
+
+
+@lru_cache(maxsize=8192)
 def text_difference(text1: str, text2: str) -> float:
     if text1 == text2:
         return 1.0
     # 计算编辑距离
-    differ = SequenceMatcher(lambda x: x == " ", text1, text2)
-    return differ.ratio()
+    if len(text2) >= 200:  # noqa: PLR2004
+        return SequenceMatcher(lambda x: x == " ", text1, text2).ratio()
+    return 2 * _matched_count(text1, text2) / (len(text1) + len(text2))
 
 
 def list_max_difference(orig_list1: list[str | list[str]], orig_list2: list[str | list[str]], filter_empty: bool = True) -> float:
@@ -89,9 +146,25 @@ def list_max_difference(orig_list1: list[str | list[str]], orig_list2: list[str
     return total_score / max(len(list1), len(list2))
 
 
+_CV_PATTERN = re.compile(r"[Cc][Vv][.:]")
+_GROUP_CHARACTERS_CV_PATTERN = re.compile(r"^(?P<group>.*)\s?\((?P<characters>.+)\)/[Cc][Vv][.:]\s?(?P<songers>.+)$")
+_GROUP_CHARACTERS_CV_INNER_PATTERN = re.compile(r"^(?P<group>.*)\s?\((?P<characters>.+)[Cc][Vv][.:](?P<songers>.+)\)$")
+_GROUP_SONGERS_PATTERN = re.compile(r"^(?P<group>.*)\s?\(+(?P<songers>[^)]+)\)+$")
+_SONGERS_SPLIT_PATTERN = re.compile(r"[,、・]")
+_GROUP_ARTIST_STR_PATTERN = re.compile(r"^(?P<group>.*[^&])\s(?P<artist_str>[^(&a-zA-Z].*)$")
+_DOT_SPLIT_PATTERN = re.compile(r"(\))\.")
+_ARTIST_SPLIT_PATTERN = re.compile(r"[,、/\\&]")
+_FEAT_PATTERN = re.compile(r"^(?P<songer1>.*)\s?feat\.(?P<character>.*)\s?\((?P<songer2>.*)\)$")
+_ALIAS_PATTERN = re.compile(r"^(?P<name1>.*)\s?\((?:[Cc][Vv][.:]|[Vv][Oo][.:])?(?P<name2>.*)\)$")
+_NOT_PURE_ARTIST_PATTERN = re.compile(r"[)(:]")
+
+
+@lru_cache(maxsize=2048)
 def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
     """将歌手字符串转换为列表
 
+    结果会被缓存, 调用方不应修改返回的列表
+
     :param artist: 歌手字符串
     :return: 歌手列表 ([组织名,...], [[歌手名, 歌手别名],...])
     """
@@ -101,9 +174,9 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
     # 匹配特定样式
     artist = artist.strip().replace("·", "・").replace("（", "(").replace("）", ")").replace("：", ":")
 
-    if "・" in artist and re.search(r"[Cc][Vv][.:]", artist):  # 包含"・"与"CV:"的
+    if "・" in artist and _CV_PATTERN.search(artist):  # 包含"・"与"CV:"的
         # 组织名(角色1・角色2...)/CV:歌手1・歌手2...
-        matched: re.Match[str] | None = re.search(r"^(?P<group>.*)\s?\((?P<characters>.+)\)/[Cc][Vv][.:]\s?(?P<songers>.+)$", artist)
+        matched: re.Match[str] | None = _GROUP_CHARACTERS_CV_PATTERN.search(artist)
         if matched and "・" in matched.group("characters") and "・" in matched.group("songers"):
             characters = [unified_symbol(c) for c in matched.group("characters").split("・")]
             songers = [unified_symbol(s) for s in matched.group("songers").split("・")]
@@ -115,7 +188,7 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
         artists = []
         groups = []
         for splited in split_result:
-            matched: re.Match[str] | None = re.search(r"^(?P<group>.*)\s?\((?P<characters>.+)[Cc][Vv][.:](?P<songers>.+)\)$", splited)
+            matched: re.Match[str] | None = _GROUP_CHARACTERS_CV_INNER_PATTERN.search(splited)
             if matched and "・" in matched.group("characters") and "・" in matched.group("songers"):
                 characters = [unified_symbol(c) for c in matched.group("characters").split("・")]
                 songers = [unified_symbol(s) for s in matched.group("songers").split("・")]
@@ -132,22 +205,22 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
 
     if artist.count("(") == artist.count(")") in [1, 2]:
         # 组织名(歌手名)
-        matched: re.Match[str] | None = re.search(r"^(?P<group>.*)\s?\(+(?P<songers>[^)]+)\)+$", artist)
+        matched: re.Match[str] | None = _GROUP_SONGERS_PATTERN.search(artist)
         if matched:
-            split_result = re.split(r"[,、・]", matched.group("songers"))
+            split_result = _SONGERS_SPLIT_PATTERN.split(matched.group("songers"))
             if len(split_result) > 1:
                 return [matched.group("group")], [[unified_symbol(s)] for s in split_result]
 
     # 组织名 ...
     groups = []
     artists_str = None
-    matched: re.Match[str] | None = re.search(r"^(?P<group>.*[^&])\s(?P<artist_str>[^(&a-zA-Z].*)$", artist)
+    matched: re.Match[str] | None = _GROUP_ARTIST_STR_PATTERN.search(artist)
     if matched:
         groups = [matched.group("group")]
         artist = matched.group("artist_str")
 
     # 以"."分隔("."有时可能表示"・")
-    splited = re.split(r"(\))\.", artist)
+    splited = _DOT_SPLIT_PATTERN.split(artist)
     if len(splited) > 1 and (len(splited) + 1) % 2 == 0:
         artists_str = []
         for i, s in enumerate(splited):
@@ -157,7 +230,7 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
                 artists_str[-1] += s
 
     # 以","或"、"或"/"或"\"或"&"分隔
-    splited = re.split(r"[,、/\\&]", artist)
+    splited = _ARTIST_SPLIT_PATTERN.split(artist)
     if len(splited) > 1:
         artists_str = [unified_symbol(s) for s in splited]
 
@@ -166,14 +239,14 @@ def artist_str2list(artist: str) -> tuple[list[str], list[list[str]]]:
 
     artists = []
     for artist_str in artists_str:
-        matched = re.search(r"^(?P<songer1>.*)\s?feat\.(?P<character>.*)\s?\((?P<songer2>.*)\)$", artist_str)
+        matched = _FEAT_PATTERN.search(artist_str)
         if matched:
             artists.append([unified_symbol(matched.group("songer1"))])
             artists.append(list({matched.group("songer2").strip(), matched.group("character").strip()}))
             continue
 
         # 歌手名(歌手别名)或角色名(歌手名)
-        matched = re.search(r"^(?P<name1>.*)\s?\((?:[Cc][Vv][.:]|[Vv][Oo][.:])?(?P<name2>.*)\)$", artist_str)
+        matched = _ALIAS_PATTERN.search(artist_str)
         if matched:
             artists.append(list({matched.group("name1").strip(), matched.group("name2").strip()}))
             continue
@@ -192,7 +265,7 @@ def calculate_artist_score(artist1: str | frozenset[str], artist2: str | frozens
                 artists[i] = artist[0]
             else:
                 for a in artist:
-                    if re.search(r"[)(:]", a):
+                    if _NOT_PURE_ARTIST_PATTERN.search(a):
                         # 说明不是纯粹的歌手名
                         artists[i] = artist_str2list("/".join(artist))
                         break
@@ -255,6 +328,29 @@ TITLE_TAG_PATTERN = re.compile(
 )
 
 
+_TAG_VER_PATTERN = re.compile(r"ver(?:sion)?\.?")
+_TAG_INST_PATTERN = re.compile(r"伴奏|纯音乐|inst\.?(?:rumental)|off ?vocal(?: ?[Vv]er.)?")
+_TAG_TYPE_VER_PATTERN = re.compile(r"(solo|mix|edit|style|size) ver")
+_TAG_TV_SIZE_PATTERN = re.compile("(?:tv|anime) ?(?:サイズ|size)?(?: ?edit)?(?: ?ver)?")
+_TAG_NORMAL_PATTERN = re.compile(r"(?:solo|mix|edit|style|size|edit|inst)$")
+
+
+@lru_cache(maxsize=1024)
+def _tags_removal_pattern(tags: tuple[str, ...]) -> re.Pattern[str]:
+    """用于去除标签与符号的正则(标签本身作为正则的一部分, 与原有行为一致)"""
+    return re.compile(r"|".join(tags) + r"|[-><)(\]\[～]")
+
+
+@lru_cache(maxsize=1024)
+def _normalize_tag(tag: str) -> str:
+    """统一一些tags"""
+    tag_ = _TAG_VER_PATTERN.sub("ver", tag)
+    tag_ = _TAG_INST_PATTERN.sub("inst", tag_)
+    tag_ = tag_.replace("mixed", "mix").replace("edited", "edit")
+    tag_ = _TAG_TYPE_VER_PATTERN.sub(r"\1", tag_)
+    return _TAG_TV_SIZE_PATTERN.sub("tv size", tag_)
+
+
 def calculate_title_score(title1: str, title2: str) -> float:
     def get_tags(not_same: str) -> tuple[list, str]:
         """获取标签
@@ -263,18 +359,8 @@ def calculate_title_score(title1: str, title2: str) -> float:
         """
         not_same_tags = TITLE_TAG_PATTERN.findall(not_same)
         not_same_tags: list[str] = [item.strip() for tup in not_same_tags for item in tup if item]  # 去除空字符串与符号
-        not_same_other = re.sub(r"|".join(not_same_tags) + r"|[-><)(\]\[～]", "", not_same)  # 获取非tags部分
-
-        # 统一一些tags
-        for i, tag in enumerate(not_same_tags):
-            tag_ = re.sub(r"ver(?:sion)?\.?", "ver", tag)
-            tag_ = re.sub(r"伴奏|纯音乐|inst\.?(?:rumental)|off ?vocal(?: ?[Vv]er.)?", "inst", tag_)
-            tag_ = tag_.replace("mixed", "mix").replace("edited", "edit")
-            tag_ = re.sub(r"(solo|mix|edit|style|size) ver", r"\1", tag_)
-            tag_ = re.sub("(?:tv|anime) ?(?:サイズ|size)?(?: ?edit)?(?: ?ver)?", "tv size", tag_)
-            not_same_tags[i] = tag_
-
-        return not_same_tags, not_same_other
+        not_same_other = _tags_removal_pattern(tuple(not_same_tags)).sub("", not_same)  # 获取非tags部分
+        return [_normalize_tag(tag) for tag in not_same_tags], not_same_other
 
     title1, title2 = unified_symbol(title1).lower(), unified_symbol(title2).lower()
     if title1 == title2:
@@ -302,14 +388,14 @@ def calculate_title_score(title1: str, title2: str) -> float:
         if tag1 in not_same2_tags:
             # tag匹配
             tag2_no_match.remove(tag1)
-        elif re.search(r"(?:solo|mix|edit|style|size|edit|inst)$", tag1):
+        elif _TAG_NORMAL_PATTERN.search(tag1):
             # 普通标签
             tag1_no_match.append(tag1)
         elif tag1 in not_same2_other:
             not_same1_other += tag1
 
     for tag2 in tag2_no_match:
-        if not re.search(r"(?:solo|mix|edit|style|size|edit|inst)$", tag2) and tag2 in not_same1_other:
+        if not _TAG_NORMAL_PATTERN.search(tag2) and tag2 in not_same1_other:
             not_same2_other += tag2
             tag2_no_match.remove(tag2)
 
@@ -344,6 +430,100 @@ def is_same_line(line1: LyricsLine | FSLyricsLine, line2: LyricsLine | FSLyricsL
     return cleaned_line1 == cleaned_line2 != ""
 
 
+def _same_line_key(line: LyricsLine | FSLyricsLine) -> tuple[bool, str]:
+    """is_same_line的等价键: 两行近似相同当且仅当键相同"""
+    line_str = "".join([word.text for word in line.words])
+    cleaned = CHECK_SAME_LINE_CLEAN_PATTERN.sub("", line_str)
+    return (True, cleaned) if cleaned else (False, line_str)
+
+
+def _align_by_start(data1: Sequence[LyricsLine | FSLyricsLine], data2: Sequence[LyricsLine | FSLyricsLine]) -> dict[int, int]:
+    """按起始时间差从小到大贪心匹配两组歌词行
+
+    结果(包括顺序)与"计算所有(i1, i2, 时间差)并排序后依次取两边都未使用的对"相同,
+    但只考虑按时间排序后相邻的候选对, 复杂度为O((n+m)log(n+m)):
+    1. 相同起始时间的行归为一个节点, 每个节点记录两边未使用的最小序号
+    2. 时间差最小的候选对一定在同一节点内或相邻的两个非空节点之间
+    3. 用堆按(时间差, i1, i2)取出候选对, 已使用的序号跳过, 节点变化后重新加入其相邻的候选对
+    """
+    starts: dict[int, tuple[list[int], list[int]]] = {}
+    for i1, line1 in enumerate(data1):
+        if isinstance(line1.start, int):
+            starts.setdefault(line1.start, ([], []))[0].append(i1)
+    for i2, line2 in enumerate(data2):
+        if isinstance(line2.start, int):
+            starts.setdefault(line2.start, ([], []))[1].append(i2)
+    if not starts:
+        return {}
+
+    values = sorted(starts)
+    node_indexes = [starts[value] for value in values]  # 每个节点两边的序号(升序)
+    node_pos = [[0, 0] for _ in values]  # 每个节点两边第一个未使用的序号的位置
+    prev_node = list(range(-1, len(values) - 1))
+    next_node = list(range(1, len(values) + 1))
+    next_node[-1] = -1
+    node_of: tuple[dict[int, int], dict[int, int]] = ({}, {})
+    for node, (indexes1, indexes2) in enumerate(node_indexes):
+        node_of[0].update(dict.fromkeys(indexes1, node))
+        node_of[1].update(dict.fromkeys(indexes2, node))
+
+    def first(node: int, side: int) -> int | None:
+        indexes, pos = node_indexes[node][side], node_pos[node][side]
+        return indexes[pos] if pos < len(indexes) else None
+
+    heap: list[tuple[int, int, int]] = []
+
+    def push_pair(left: int, right: int) -> None:
+        diff = values[right] - values[left]
+        for node1, node2 in ((left, right), (right, left)):
+            i1, i2 = first(node1, 0), first(node2, 1)
+            if i1 is not None and i2 is not None:
+                heapq.heappush(heap, (diff, i1, i2))
+
+    def push_node(node: int) -> None:
+        push_pair(node, node)
+        if prev_node[node] != -1:
+            push_pair(prev_node[node], node)
+        if next_node[node] != -1:
+            push_pair(node, next_node[node])
+
+    for node in range(len(values)):
+        push_pair(node, node)
+        if next_node[node] != -1:
+            push_pair(node, next_node[node])
+
+    matched = {}
+    used = (set(), set())
+    while heap:
+        _diff, i1, i2 = heapq.heappop(heap)
+        if i1 in used[0] or i2 in used[1]:
+            continue
+        used[0].add(i1)
+        used[1].add(i2)
+        matched[i1] = i2
+
+        changed = []
+        for side, index in ((0, i1), (1, i2)):
+            node = node_of[side][index]
+            node_pos[node][side] += 1
+            if node not in changed:
+                changed.append(node)
+        for node in changed:
+            if first(node, 0) is None and first(node, 1) is None:
+                # 节点已空, 从链表中移除并连接两侧的节点
+                left, right = prev_node[node], next_node[node]
+                if left != -1:
+                    next_node[left] = right
+                if right != -1:
+                    prev_node[right] = left
+                if left != -1 and right != -1:
+                    push_pair(left, right)
+            else:
+                push_node(node)
+
+    return matched
+
+
 def find_closest_match(
     data1: Sequence[LyricsLine | FSLyricsLine],
     data2: Sequence[LyricsLine | FSLyricsLine],
@@ -360,13 +540,14 @@ def find_closest_match(
     """
     if source == Source.NE and data3:
         data3_matched = find_closest_match(data3, data2, source=Source.NE)
+        # 按data3_matched的顺序为每个近似相同的文本记录未使用的(i3, i2)
+        same_lines: dict[tuple[bool, str], deque[int]] = {}
+        for i3, i2 in data3_matched.items():
+            same_lines.setdefault(_same_line_key(data3[i3]), deque()).append(i2)
         matched = {}
         for i1, line1 in enumerate(data1):
-            for i3, i2 in data3_matched.items():
-                if is_same_line(line1, data3[i3]):
-                    matched[i1] = i2
-                    data3_matched.pop(i3)
-                    break
+            if candidates := same_lines.get(_same_line_key(line1)):
+                matched[i1] = candidates.popleft()
         if matched:
             return matched
         matched = {}
@@ -380,26 +561,7 @@ def find_closest_match(
             if len(data1) == len(data2):
                 return {i: i for i in range(len(data1))}
 
-    time_difference_list = [
-        (i1, i2, abs(line1.start - line2.start))
-        for i1, line1 in enumerate(data1)
-        if isinstance(line1.start, int)
-        for i2, line2 in enumerate(data2)
-        if isinstance(line2.start, int)
-    ]
-    time_difference_list = sorted(time_difference_list, key=lambda x: x[2])
-
-    matched = {}
-    used_i1, used_i2 = set(), set()
-    for i1, i2, _diff in time_difference_list:
-        if i1 not in used_i1 and i2 not in used_i2:
-            used_i1.add(i1)
-            used_i2.add(i2)
-            matched[i1] = i2
-            if len(used_i1) == len(data1) or len(used_i2) == len(data2):
-                break
-
-    return matched
+    return _align_by_start(data1, data2)
 
 
 def assign_lyrics_positions(lines: FSLyricsData) -> dict[tuple[Literal[Direction.RIGHT, Direction.LEFT], int], list[tuple[int, FSLyricsLine]]]:
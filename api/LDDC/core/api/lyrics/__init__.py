@@ -3,8 +3,11 @@
 """LDDC的歌词提供api
 
 模块中的函数都是被缓存的,而lyrics_api中的函数则不是
+空结果与请求错误也会被短暂缓存(负缓存),此时结果的cached(或错误的cached属性)为CacheStatus.NEGATIVE
 """
 
+import hashlib
+import sqlite3
 from collections.abc import Callable
 from dataclasses import replace
 from pathlib import Path
@@ -12,6 +15,7 @@ from threading import Lock
 from typing import TYPE_CHECKING, Literal, NoReturn, overload
 
 from LDDC.common.data.cache import cached_call_with_status
+from LDDC.common.data.config import cfg
 from LDDC.common.exceptions import LDDCError, LyricsNotFoundError
 from LDDC.common.logger import logger
 from LDDC.common.models import APIResultList, LyricInfo, Lyrics, P, SearchType, SongInfo, SongListInfo, Source, T
@@ -19,6 +23,9 @@ from LDDC.common.models import APIResultList, LyricInfo, Lyrics, P, SearchType,
 if TYPE_CHECKING:
     from .models import BaseAPI, CloudAPI
 
+# 不需要网络请求的源, 结果不会被缓存
+OFFLINE_SOURCES = (Source.LIBRARY, Source.LRCLIB_DUMP)
+
 
 class LyricsAPI:
     def __init__(self) -> None:
@@ -31,8 +38,9 @@ class LyricsAPI:
                 return
             from . import kw
             from .kg import KGAPI
+            from .library import LibraryAPI
             from .local import LocalAPI
-            from .lrclib import LrclibAPI
+            from .lrclib import LocalLrclibAPI, LrclibAPI
             from .ne import NEAPI
             from .qm import QMAPI
 
@@ -50,6 +58,13 @@ class LyricsAPI:
                 LrclibAPI.source: LrclibAPI(),
                 KWAPI.source: KWAPI(),  # 添加酷我API
             }
+            if cfg["lrclib_dump_path"]:
+                try:
+                    self.cloud_apis[LocalLrclibAPI.source] = LocalLrclibAPI(Path(cfg["lrclib_dump_path"]))
+                except sqlite3.Error:
+                    logger.exception("无法打开lrclib数据库转储 %s", cfg["lrclib_dump_path"])
+            if cfg["lyrics_library_path"]:
+                self.cloud_apis[LibraryAPI.source] = LibraryAPI(Path(cfg["lyrics_library_path"]), cfg["lyrics_library_scan_interval"])
             self.apis: dict[Source, BaseAPI] = {**self.cloud_apis, LocalAPI.source: LocalAPI()}
             self.inited = True
 
@@ -132,6 +147,21 @@ class LyricsAPI:
             raise ValueError(msg)
         return self.timeout_retry(self.cloud_apis[source].search, keyword, search_type, page)
 
+    def available_offline_sources(self) -> list[Source]:
+        """已配置且可用的离线源"""
+        if not self.inited:
+            self.init()
+        return [source for source in OFFLINE_SOURCES if source in self.cloud_apis]
+
+    def lookup(self, source: Source, info: SongInfo) -> SongInfo | None:
+        """在离线源中按歌曲信息精确查找, 源不可用或信息不足时返回None"""
+        if not self.inited:
+            self.init()
+        api = self.cloud_apis.get(source)
+        if api is None or not hasattr(api, "lookup") or not info.title or not info.artist:
+            return None
+        return api.lookup(info.title, info.artist.str(), info.album, info.duration)
+
     def get_songlist(self, songlist_info: SongListInfo) -> APIResultList[SongInfo]:
         """获取歌单内容
 
@@ -187,7 +217,8 @@ class LyricsAPI:
                 )
             lyrics = self.apis[Source.Local].get_lyrics(info)
         else:
-            lyrics = self.timeout_retry(self.apis[info.source].get_lyrics, info)
+            # 云端歌词会被缓存, 转换为列式存储以减小内存占用与pickle大小
+            lyrics = self.timeout_retry(self.apis[info.source].get_lyrics, info).compact()
         if not lyrics:
             msg = "没有找到歌词"
             raise LyricsNotFoundError(msg, info)
@@ -262,9 +293,21 @@ def search(source: Source, keyword: str, search_type: SearchType, page: int = 1)
                 pass
         return result
 
-    result, cached = cached_call_with_status(lyrics_api.search, {"expire": 14400}, source, keyword, search_type, page)
-    result.cached = cached
-    return result
+    if source in OFFLINE_SOURCES:
+        return lyrics_api.search(source, keyword, search_type, page)
+
+    result, cached = cached_call_with_status(lyrics_api.search, {"expire": 86400, "soft_expire": 14400, "negative": True}, source, keyword, search_type, page)
+    return APIResultList(result, cached=cached)  # 缓存的对象可能被共享, 不直接修改
+
+
+def lookup(source: Source, info: SongInfo) -> SongInfo | None:
+    """在离线源中按(标题, 歌手, 专辑, 时长)精确查找歌曲, 见LyricsAPI.lookup"""
+    return lyrics_api.lookup(source, info)
+
+
+def available_offline_sources() -> list[Source]:
+    """已配置且可用的离线源"""
+    return lyrics_api.available_offline_sources()
 
 
 def get_songlist(songlist_info: SongListInfo) -> APIResultList[SongInfo]:
@@ -277,9 +320,8 @@ def get_songlist(songlist_info: SongListInfo) -> APIResultList[SongInfo]:
         list[SongInfo]: 歌单内容
 
     """
-    result, cached = cached_call_with_status(lyrics_api.get_songlist, {"expire": 14400}, songlist_info)
-    result.cached = cached
-    return result
+    result, cached = cached_call_with_status(lyrics_api.get_songlist, {"expire": 86400, "soft_expire": 14400, "negative": True}, songlist_info)
+    return APIResultList(result, cached=cached)
 
 
 def get_lyricslist(song_info: SongInfo) -> APIResultList[LyricInfo]:
@@ -292,9 +334,20 @@ def get_lyricslist(song_info: SongInfo) -> APIResultList[LyricInfo]:
         list[LyricInfo]: 歌曲歌词
 
     """
-    result, cached = cached_call_with_status(lyrics_api.get_lyricslist, {"expire": 14400}, song_info)
-    result.cached = cached
-    return result
+    result, cached = cached_call_with_status(
+        lyrics_api.get_lyricslist,
+        {"expire": 86400, "soft_expire": 14400, "negative": True, "key": song_cache_key},
+        song_info,
+    )
+    if result.info is not None and result.info != song_info:
+        # 缓存可能来自同一首歌的其他SongInfo, 换回调用者的SongInfo
+        return APIResultList(
+            [replace(lyric_info, songinfo=song_info) for lyric_info in result],
+            song_info,
+            result.source_ranges,
+            cached=cached,
+        )
+    return APIResultList(result, cached=cached)
 
 
 def get_lyrics(info: SongInfo | LyricInfo | None = None, path: Path | None = None, data: str | bytearray | bytes | None = None) -> Lyrics:
@@ -317,7 +370,50 @@ def get_lyrics(info: SongInfo | LyricInfo | None = None, path: Path | None = Non
             result.info = replace(result.info, cached=False)
         return result
     
+    # 离线源不需要缓存
+    if info.source in OFFLINE_SOURCES:
+        return lyrics_api.get_lyrics(info)
+
     # 对于其他云来源，使用缓存
-    result, cached = cached_call_with_status(lyrics_api.get_lyrics, {"expire": 14400}, info)
-    result.info = replace(result.info, cached=cached)
-    return result
+    result, cached = cached_call_with_status(
+        lyrics_api.get_lyrics,
+        {"expire": 86400, "soft_expire": 14400, "negative": True, "key": song_cache_key},
+        info,
+    )
+    songinfo = info if isinstance(info, SongInfo) else info.songinfo
+    # 缓存可能来自同一首歌的其他SongInfo, 换回调用者的SongInfo
+    return _copy_lyrics(result, replace(result.info, songinfo=songinfo, cached=cached))
+
+
+def song_cache_key(info: SongInfo | LyricInfo, *_: object, **__: object) -> str:
+    """歌曲的规范缓存键
+
+    云端歌词只由歌曲在歌词源中的ID决定, 同一首歌的不同SongInfo(如语言、路径、被客户端修改过的标题)共享同一个缓存
+    1. QM/NE: (源, id或mid)
+    2. KG: (源, id, hash)
+    3. 其他(如LRCLIB按歌曲信息查询): (源, 标题, 歌手, 专辑, 时长)
+    LyricInfo则额外包含歌词的id与accesskey
+    返回身份信息的摘要, 保证键稳定且简短
+    """
+    if isinstance(info, LyricInfo):
+        identity = ("lyric", info.source.name, info.id, info.accesskey, song_cache_key(info.songinfo))
+    elif info.source in (Source.QM, Source.NE) and (info.id or info.mid):
+        identity = ("song", info.source.name, str(info.id or ""), info.mid or "")
+    elif info.source == Source.KG and (info.id or info.hash):
+        identity = ("song", info.source.name, str(info.id or ""), (info.hash or "").lower())
+    else:
+        identity = ("song", info.source.name, info.title, str(info.artist) if info.artist else None, info.album, info.duration)
+    return hashlib.blake2b(repr(identity).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _copy_lyrics(lyrics: Lyrics, info: LyricInfo) -> Lyrics:
+    """浅拷贝缓存中的歌词并替换info, 缓存的对象可能被共享, 不直接修改
+
+    歌词数据本身不会被复制, 应视为只读
+    """
+    new_lyrics = type(lyrics)(info)
+    new_lyrics.info = info  # 保留info.data
+    new_lyrics.tags = dict(lyrics.tags)
+    new_lyrics.types = dict(lyrics.types)
+    new_lyrics.data = dict(lyrics.data)
+    return new_lyrics
@@ -31,8 +31,7 @@ from LDDC.common.models import (
     Source,
 )
 from LDDC.common.version import __version__
-from LDDC.core.decryptor import krc_decrypt
-from LDDC.core.parser.krc import krc2mdata
+from LDDC.core.decode_pool import decode_krc
 from LDDC.core.parser.utils import judge_lyrics_type, plaintext2data
 
 from .models import CloudAPI
@@ -535,7 +534,7 @@ class KGAPI(CloudAPI):
         if data["contenttype"] == 2:  # 基于base64编码的纯文本歌词
             lyric = MultiLyricsData({"orig": plaintext2data(b64decode(data["content"]).decode("utf-8"))})
         else:
-            lyrics.tags, lyric = krc2mdata(krc_decrypt(b64decode(data["content"])))
+            lyrics.tags, lyric = decode_krc(data["content"])
         lyrics.update(lyric)
         for key, lyric in lyrics.items():
             lyrics.types[key] = judge_lyrics_type(lyric)
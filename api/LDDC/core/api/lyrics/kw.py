@@ -11,6 +11,7 @@ import requests
 from LDDC.common.models._enums import LyricsFormat, SearchType, Source
 from LDDC.common.models._info import APIResultList, Artist, SearchInfo, SongInfo
 from LDDC.common.models._lyrics import Lyrics
+from LDDC.core.decryptor.xor import xor_bytes
 from LDDC.core.parser.lrc import lrc2mdata
 from LDDC.core.parser.utils import judge_lyrics_type
 
@@ -116,14 +117,7 @@ def _build_params(music_id: int, is_get_lyricx: bool = True) -> str:
     if is_get_lyricx:
         params_str += "&lrcx=1"
 
-    buf_str = params_str.encode("utf-8")
-    key_len = len(KEY)
-
-    output = bytearray(len(buf_str))
-    for i in range(len(buf_str)):
-        output[i] = buf_str[i] ^ KEY[i % key_len]
-
-    encrypted_buffer = bytes(output)
+    encrypted_buffer = xor_bytes(params_str.encode("utf-8"), KEY)
     final_params = base64.b64encode(encrypted_buffer).decode("utf-8")
     return final_params
 
@@ -143,14 +137,7 @@ def _decode_lyrics(buf: bytes, is_get_lyricx: bool = True) -> str:
         return inflated_data.decode("gb18030", errors="ignore")
     else:
         base64_str = inflated_data.decode("utf-8", errors="ignore")
-        buf_str = base64.b64decode(base64_str)
-        key_len = len(KEY)
-        output = bytearray(len(buf_str))
-
-        for i in range(len(buf_str)):
-            output[i] = buf_str[i] ^ KEY[i % key_len]
-
-        decrypted_buffer = bytes(output)
+        decrypted_buffer = xor_bytes(base64.b64decode(base64_str), KEY)
         final_lrc = decrypted_buffer.decode("gb18030", errors="ignore")
         return final_lrc
 
@@ -0,0 +1,283 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""本地歌词库
+
+扫描目录树中的歌词文件(.lrc/.qrc/.krc/.ass/.srt), 在内存中建立 规范化的(歌手, 标题) -> 文件 的索引,
+以及 标题的单字/双字n-gram -> (歌手, 标题) 的倒排索引供搜索使用:
+- 标题与歌手优先取自歌词的[ti:]/[ar:]标签(ASS为Title), 没有时从"歌手 - 标题"格式的文件名中解析
+- 索引中只保存路径、修改时间与歌曲信息, 歌词在获取时才通过LocalAPI.get_lyrics读取解析
+- 后台线程定期检查目录树, 只重新读取新增或修改时间变化的文件, 并移除已删除的文件
+"""
+
+import os
+import re
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import NamedTuple
+
+from LDDC.common.exceptions import APIParamsError
+from LDDC.common.logger import logger
+from LDDC.common.models import APIResultList, Artist, LyricInfo, Lyrics, SearchInfo, SearchType, SongInfo, SongListInfo, Source
+from LDDC.common.utils import read_unknown_encoding_file
+from LDDC.core.algorithm import normalize_text
+from LDDC.core.match_index import text_grams
+from LDDC.core.parser.ass import _TITLE_RE as _ASS_TITLE_RE
+from LDDC.core.parser.lrc import _TAG_SPLIT_PATTERN as _LRC_TAG_SPLIT_PATTERN
+
+from .local import LocalAPI
+from .models import CloudAPI
+
+LIBRARY_EXTENSIONS = (".lrc", ".qrc", ".krc", ".ass", ".srt")
+HEAD_SIZE = 4096  # 读取文本歌词文件开头的字节数, 标签一般都在文件开头
+
+_QRC_COMPANION_PATTERN = re.compile(r"_qm(?:Roma|ts)\.qrc$", re.IGNORECASE)  # 由LocalAPI.parse_qrc随原文一起读取
+_QRC_SUFFIX_PATTERN = re.compile(r"_qm$", re.IGNORECASE)
+_ID_SUFFIX_PATTERN = re.compile(r"\s*\((?=[0-9A-Za-z]*\d)[0-9A-Za-z]{6,}\)$")  # 默认文件名格式末尾的"(歌曲id)"
+
+
+class LibraryEntry(NamedTuple):
+    path: str
+    mtime_ns: int
+    title: str
+    artist: str | None
+    album: str | None
+
+
+def _parse_file_name(path: Path) -> tuple[str, str | None]:
+    """从文件名中解析(标题, 歌手)"""
+    stem = _QRC_SUFFIX_PATTERN.sub("", path.stem)
+    stem = _ID_SUFFIX_PATTERN.sub("", stem) or stem
+    if " - " in stem:
+        artist, title = stem.split(" - ", 1)
+        if artist.strip() and title.strip():
+            return title.strip(), artist.strip()
+    return stem.strip(), None
+
+
+def _read_tags(path: Path) -> dict[str, str]:
+    """读取歌词文件中的标签, 文本格式只读取文件开头"""
+    tags: dict[str, str] = {}
+    suffix = path.suffix.lower()
+    if suffix in (".qrc", ".krc"):
+        # 整体加密, 解密后读取到第一行歌词为止
+        next(LocalAPI().iter_lyrics(path=path, tags=tags), None)
+        return tags
+
+    with path.open("rb") as f:
+        head = f.read(HEAD_SIZE)
+    if len(head) == HEAD_SIZE:
+        head = head[: head.rfind(b"\n") + 1]  # 避免截断多字节字符
+    text = read_unknown_encoding_file(file_data=head) if head else ""
+    if suffix == ".ass":
+        if title_match := _ASS_TITLE_RE.search(text):
+            tags["title"] = title_match.group(1)
+    elif suffix == ".lrc":
+        for line in text.splitlines():
+            if tag_match := _LRC_TAG_SPLIT_PATTERN.match(line.strip()):
+                tags.setdefault(tag_match.group("k"), tag_match.group("v"))
+    return tags
+
+
+def _iter_files(root: Path) -> Iterator[os.DirEntry]:
+    """遍历目录树中的歌词文件"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.name.lower().endswith(LIBRARY_EXTENSIONS) and not _QRC_COMPANION_PATTERN.search(entry.name):
+                        yield entry
+        except OSError:
+            logger.warning("无法读取歌词库目录 %s", directory)
+
+
+class LibraryAPI(CloudAPI):
+    """从本地目录中的歌词文件获取歌词
+
+    1. 按规范化的(歌手, 标题)精确查找, 以及按标题n-gram倒排索引的搜索, 都只访问内存中的索引
+    2. 使用Lock保证线程安全, 扫描时在锁外读取文件, 只在更新索引时持有锁
+    3. scan_interval大于0时在后台线程中定期增量扫描
+    """
+
+    source = Source.LIBRARY
+    supported_search_types = (SearchType.SONG,)
+
+    def __init__(self, root: Path, scan_interval: float = 60) -> None:
+        self.root = root
+        self.lock = Lock()
+        self._local = LocalAPI()
+        self._files: dict[str, LibraryEntry] = {}
+        self._keys: dict[tuple[str, str], list[str]] = {}  # (规范化的歌手, 规范化的标题) -> 路径, 歌手未知时为""
+        self._grams: dict[str, set[tuple[str, str]]] = {}  # 规范化标题的n-gram -> _keys中的键
+        self._stop = Event()
+        self._watcher: Thread | None = None
+
+        self.scan()
+        if scan_interval > 0:
+            self._watcher = Thread(target=self._watch, args=(scan_interval,), name="LyricsLibraryWatcher", daemon=True)
+            self._watcher.start()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @staticmethod
+    def _entry_keys(entry: LibraryEntry) -> set[tuple[str, str]]:
+        keys = set()
+        for title in (entry.title, _ID_SUFFIX_PATTERN.sub("", entry.title)):
+            if norm_title := normalize_text(title):
+                keys.add((normalize_text(entry.artist), norm_title))
+        return keys
+
+    def _read_entry(self, path: str, mtime_ns: int) -> LibraryEntry:
+        file_path = Path(path)
+        title, artist = _parse_file_name(file_path)
+        try:
+            tags = _read_tags(file_path)
+        except Exception:  # noqa: BLE001
+            logger.warning("读取歌词文件 %s 的标签失败, 将只使用文件名", path)
+            tags = {}
+        return LibraryEntry(
+            path=path,
+            mtime_ns=mtime_ns,
+            title=tags.get("ti", tags.get("title", "")).strip() or title,
+            artist=tags.get("ar", "").strip() or artist,
+            album=tags.get("al", "").strip() or None,
+        )
+
+    def scan(self) -> None:
+        """增量扫描目录树, 只读取新增或修改过的文件"""
+        start = time.perf_counter()
+        with self.lock:
+            known = {path: entry.mtime_ns for path, entry in self._files.items()}
+
+        changed: dict[str, LibraryEntry] = {}
+        seen: set[str] = set()
+        for dir_entry in _iter_files(self.root):
+            try:
+                mtime_ns = dir_entry.stat().st_mtime_ns
+            except OSError:
+                continue
+            seen.add(dir_entry.path)
+            if known.get(dir_entry.path) != mtime_ns:
+                changed[dir_entry.path] = self._read_entry(dir_entry.path, mtime_ns)
+        removed = known.keys() - seen
+
+        if not changed and not removed:
+            return
+        with self.lock:
+            for path in (*removed, *changed):
+                if (old := self._files.pop(path, None)) is not None:
+                    for key in self._entry_keys(old):
+                        paths = self._keys[key]
+                        paths.remove(path)
+                        if not paths:
+                            del self._keys[key]
+                            self._unindex_key(key)
+            for path, entry in changed.items():
+                self._files[path] = entry
+                for key in self._entry_keys(entry):
+                    if key not in self._keys:
+                        self._keys[key] = []
+                        for gram in text_grams(key[1]):
+                            self._grams.setdefault(gram, set()).add(key)
+                    self._keys[key].append(path)
+        logger.info(
+            "歌词库 %s 已更新: 新增或修改%d个文件, 删除%d个文件, 共%d个文件, 耗时%.2f秒",
+            self.root, len(changed), len(removed), len(self._files), time.perf_counter() - start,
+        )
+
+    def _unindex_key(self, key: tuple[str, str]) -> None:
+        for gram in text_grams(key[1]):
+            keys = self._grams[gram]
+            keys.discard(key)
+            if not keys:
+                del self._grams[gram]
+
+    def _watch(self, scan_interval: float) -> None:
+        while not self._stop.wait(scan_interval):
+            try:
+                self.scan()
+            except Exception:
+                logger.exception("扫描歌词库 %s 失败", self.root)
+
+    def close(self) -> None:
+        """停止后台扫描"""
+        self._stop.set()
+
+    def _song_info(self, entry: LibraryEntry) -> SongInfo:
+        path = Path(entry.path)
+        return SongInfo(
+            source=self.source,
+            title=entry.title,
+            artist=Artist(entry.artist) if entry.artist else None,
+            album=entry.album,
+            id=path.relative_to(self.root).as_posix() if path.is_relative_to(self.root) else entry.path,
+            path=path,
+        )
+
+    def lookup(self, title: str, artist: str, album: str | None = None, duration: int | None = None) -> SongInfo | None:  # noqa: ARG002
+        """按规范化的(歌手, 标题)精确查找歌词文件, 没有歌手相同的文件时使用歌手未知的同名文件
+
+        歌词文件一般没有专辑与时长信息, album与duration只为与其他离线源保持一致, 不参与查找
+        """
+        norm_title = normalize_text(title)
+        with self.lock:
+            paths = self._keys.get((normalize_text(artist), norm_title)) or self._keys.get(("", norm_title))
+            entry = self._files[paths[-1]] if paths else None
+        return self._song_info(entry) if entry else None
+
+    def get_lyrics(self, info: SongInfo) -> Lyrics:
+        """读取并解析歌词文件"""
+        if not info.path:
+            msg = "缺少必要参数"
+            raise APIParamsError(msg)
+        return self._local.get_lyrics(LyricInfo(source=self.source, songinfo=info, path=info.path))
+
+    def search(self, keyword: str, search_type: SearchType, page: int = 1) -> APIResultList[SongInfo]:
+        """搜索歌曲: 返回标题包含在关键词中(或包含关键词)的文件, 标题完全相同的优先
+
+        只检查与关键词(及其中用" - "分隔的各部分)有共同n-gram的标题:
+        标题包含在关键词中或包含关键词时, 两者中较短的一方的n-gram都出现在另一方中
+        """
+        if search_type not in self.supported_search_types:
+            msg = f"不支持的搜索类型: {search_type}"
+            raise NotImplementedError(msg)
+
+        norm_keyword = normalize_text(keyword)
+        parts = {normalize_text(part) for part in keyword.split(" - ")}
+        # 关键词长于1个字时只用双字n-gram查找, 避免常见单字带来大量候选
+        query_grams = {norm_keyword} if len(norm_keyword) == 1 else {norm_keyword[i : i + 2] for i in range(len(norm_keyword) - 1)}
+        query_grams.update(part for part in parts if len(part) == 1)
+        matched: list[tuple[int, str]] = []
+        if norm_keyword:
+            with self.lock:
+                candidates = set().union(*(self._grams.get(gram, ()) for gram in query_grams))
+                for norm_artist, norm_title in candidates:
+                    paths = self._keys[(norm_artist, norm_title)]
+                    if norm_title in parts:
+                        rank = 0 if norm_artist and norm_artist in norm_keyword else 1
+                    elif (len(norm_title) > 1 and norm_title in norm_keyword) or norm_keyword in norm_title:
+                        rank = 2
+                    else:
+                        continue
+                    matched.extend((rank, path) for path in paths)
+                matched.sort()
+                entries = [self._files[path] for path in dict.fromkeys(path for _, path in matched)][(page - 1) * 20 : page * 20]
+        else:
+            entries = []
+
+        items = [self._song_info(entry) for entry in entries]
+        return APIResultList(items, SearchInfo(source=self.source, keyword=keyword, search_type=search_type, page=page), (0, len(items) - 1, len(items)))
+
+    def get_songlist(self, songlist_info: SongListInfo) -> APIResultList[SongInfo]:
+        msg = "本地歌词库不支持获取歌单"
+        raise NotImplementedError(msg)
+
+    def get_lyricslist(self, song_info: SongInfo) -> APIResultList[LyricInfo]:
+        msg = "本地歌词库不支持获取歌词列表"
+        raise NotImplementedError(msg)
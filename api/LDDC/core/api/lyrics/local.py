@@ -3,10 +3,11 @@
 
 import json
 import re
+from collections.abc import Iterator
 from pathlib import Path
 
 from LDDC.common.exceptions import LyricsFormatError
-from LDDC.common.models import LyricInfo, Lyrics, QrcType, SongInfo, Source
+from LDDC.common.models import LyricInfo, Lyrics, LyricsFormat, LyricsLine, QrcType, SongInfo, Source
 from LDDC.common.utils import read_unknown_encoding_file
 from LDDC.core.decryptor import krc_decrypt, qrc_decrypt
 from LDDC.core.parser.ass import ass2mdata
@@ -15,6 +16,7 @@ from LDDC.core.parser.krc import KRC_MAGICHEADER, krc2mdata
 from LDDC.core.parser.lrc import lrc2mdata
 from LDDC.core.parser.qrc import QRC_MAGICHEADER, qrc_str_parse
 from LDDC.core.parser.srt import srt2mdata
+from LDDC.core.parser.stream import TextSource, iter_ass, iter_krc, iter_lrc, iter_qrc, iter_srt, iter_yrc
 from LDDC.core.parser.utils import judge_lyrics_type
 
 from .models import BaseAPI
@@ -140,3 +142,81 @@ class LocalAPI(BaseAPI):
         for key, lyric in lyrics.items():
             lyrics.types[key] = judge_lyrics_type(lyric)
         return lyrics
+
+    def iter_lyrics(
+        self,
+        path: Path | None = None,
+        stream: TextSource | None = None,
+        lyrics_format: LyricsFormat | None = None,
+        tags: dict[str, str] | None = None,
+        encoding: str = "utf-8-sig",
+    ) -> Iterator[tuple[str | int, LyricsLine]]:
+        """流式读取歌词, 边读取边生成(语言类型, 歌词行), LRC生成的是(层序号, 歌词行)
+
+        用于读取非常大或多份拼接在一起的歌词文件, 内存占用与文件大小无关。
+        QRC/KRC是整体加密的, 会先完整读取并解密, 解密后的文本仍然逐行解析。
+
+        Args:
+            path: 歌词文件路径
+            stream: 文本/二进制文件对象或字符串/字节块的迭代器(字节按UTF-8解码), 优先于path
+            lyrics_format: 歌词格式, 为None时根据文件扩展名与文件头判断, 无法判断时按LRC解析
+            tags: 用于接收标签的字典
+            encoding: 从path读取时使用的编码
+
+        """
+        if stream is None and path is None:
+            msg = "没有任何文件路径和数据"
+            raise ValueError(msg)
+
+        if lyrics_format is None and path is not None:
+            lyrics_format = next((fmt for fmt in LyricsFormat if fmt.ext == path.suffix.lower()), None)
+            if lyrics_format is None and stream is None:
+                with path.open("rb") as f:
+                    header = f.read(max(len(QRC_MAGICHEADER), len(KRC_MAGICHEADER)))
+                if header.startswith(QRC_MAGICHEADER):
+                    lyrics_format = LyricsFormat.QRC
+                elif header.startswith(KRC_MAGICHEADER):
+                    lyrics_format = LyricsFormat.KRC
+
+        if lyrics_format in (LyricsFormat.QRC, LyricsFormat.KRC):
+            if stream is None:
+                data = path.read_bytes()  # type: ignore[union-attr]
+            elif hasattr(stream, "read"):
+                data = stream.read()  # type: ignore[union-attr]
+            else:
+                data = b"".join(stream)  # type: ignore[arg-type]
+            if isinstance(data, str):
+                text = data
+            elif data.startswith(QRC_MAGICHEADER):
+                text = qrc_decrypt(data, QrcType.LOCAL)
+            elif data.startswith(KRC_MAGICHEADER):
+                text = krc_decrypt(data)
+            else:  # 未加密的QRC/KRC
+                text = data.decode(encoding, errors="replace")
+
+            if lyrics_format == LyricsFormat.QRC:
+                for line in iter_qrc(text, tags):
+                    yield "orig", line
+            else:
+                yield from iter_krc(text, tags)
+            return
+
+        if stream is None:
+            # newline=""保留原始换行符, 使分行结果与一次性读取时相同
+            with path.open(encoding=encoding, errors="replace", newline="") as f:  # type: ignore[union-attr]
+                yield from self.iter_lyrics(stream=f, lyrics_format=lyrics_format, tags=tags)
+            return
+
+        match lyrics_format:
+            case LyricsFormat.SRT:
+                yield from iter_srt(stream)
+            case LyricsFormat.ASS:
+                yield from iter_ass(stream, tags)
+            case LyricsFormat.YRC:
+                for line in iter_yrc(stream):
+                    yield "orig", line
+            case LyricsFormat.JSON:
+                msg = "JSON歌词不支持流式读取"
+                raise LyricsFormatError(msg)
+            case _:
+                yield from iter_lrc(stream, tags=tags)
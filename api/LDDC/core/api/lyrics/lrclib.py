@@ -2,10 +2,16 @@
 # SPDX-License-Identifier: GPL-3.0-only
 
 import json
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+from threading import Lock
 
 import httpx
 
 from LDDC.common.exceptions import APIParamsError, APIRequestError
+from LDDC.common.logger import logger
 from LDDC.common.models import APIResultList, Artist, Language, LyricInfo, Lyrics, SearchInfo, SearchType, SongInfo, SongListInfo, Source
 from LDDC.common.version import __version__
 from LDDC.core.parser.lrc import lrc2data
@@ -14,6 +20,28 @@ from LDDC.core.parser.utils import judge_lyrics_type, plaintext2data
 from .models import CloudAPI
 
 
+def _build_lyrics(info: SongInfo, track_name: str, artist_name: str, album_name: str, synced_lyrics: str | None, plain_lyrics: str | None) -> Lyrics:
+    lyrics = Lyrics(info)
+    lyrics.tags = {
+        "ti": track_name,
+        "ar": artist_name,
+        "al": album_name,
+    }
+
+    # 处理同步歌词
+    if synced_lyrics:
+        tags, lyrics["orig"] = lrc2data(synced_lyrics)
+        lyrics.types["orig"] = judge_lyrics_type(lyrics["orig"])
+        lyrics.tags.update(tags)
+
+    # 处理纯文本歌词
+    elif plain_lyrics:
+        lyrics["orig"] = plaintext2data(plain_lyrics)
+        lyrics.types["orig"] = judge_lyrics_type(lyrics["orig"])
+
+    return lyrics
+
+
 class LrclibAPI(CloudAPI):
     source = Source.LRCLIB
     supported_search_types = (SearchType.SONG,)
@@ -68,25 +96,7 @@ class LrclibAPI(CloudAPI):
             msg = f"lrclib API错误: {data['error']}"
             raise APIRequestError(msg)
 
-        lyrics = Lyrics(info)
-        lyrics.tags = {
-            "ti": data["trackName"],
-            "ar": data["artistName"],
-            "al": data["albumName"],
-        }
-
-        # 处理同步歌词
-        if data.get("syncedLyrics"):
-            tags, lyrics["orig"] = lrc2data(data["syncedLyrics"])
-            lyrics.types["orig"] = judge_lyrics_type(lyrics["orig"])
-            lyrics.tags.update(tags)
-
-        # 处理纯文本歌词
-        elif data.get("plainLyrics"):
-            lyrics["orig"] = plaintext2data(data["plainLyrics"])
-            lyrics.types["orig"] = judge_lyrics_type(lyrics["orig"])
-
-        return lyrics
+        return _build_lyrics(info, data["trackName"], data["artistName"], data["albumName"], data.get("syncedLyrics"), data.get("plainLyrics"))
 
     def search(self, keyword: str, search_type: SearchType, page: int = 1) -> APIResultList[SongInfo]:
         """搜索歌曲"""
@@ -113,3 +123,190 @@ class LrclibAPI(CloudAPI):
     def get_lyricslist(self, song_info: SongInfo) -> APIResultList[LyricInfo]:
         msg = "lrclib API不支持获取歌词列表"
         raise NotImplementedError(msg)
+
+
+_SPECIAL_CHARS_PATTERN = re.compile(r"[`~!@#$%^&*()_|+\-=?;:'\",.<>{}\[\]\\/]")
+
+
+def prepare_input(text: str) -> str:
+    """按lrclib数据库中*_lower列的方式规范化文本: 去除变音符号、标点替换为空格、合并空白并转为小写"""
+    text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return " ".join(_SPECIAL_CHARS_PATTERN.sub(" ", text.lower()).split())
+
+
+class LocalLrclibAPI(CloudAPI):
+    """从lrclib的SQLite数据库转储中查找歌词
+
+    数据库以只读、不可变(immutable)方式打开并使用内存映射, 不需要网络请求
+    - 精确查找(与/get相同): 按(标题, 歌手[, 专辑])与±2秒的时长使用数据库中的唯一索引查找
+    - 搜索: 使用转储中的tracks_fts全文索引, 没有时使用build_fts_index生成的附属索引(<转储>.fts.db),
+      都没有时只按标题前缀查找
+    """
+
+    source = Source.LRCLIB_DUMP
+    supported_search_types = (SearchType.SONG,)
+
+    MMAP_SIZE = 1 << 30
+    DURATION_TOLERANCE = 2  # 精确查找允许的时长差(秒)
+
+    _TRACK_COLUMNS = "tracks.id, tracks.name, tracks.artist_name, tracks.album_name, tracks.duration, lyrics.instrumental"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index_path = path.with_name(path.name + ".fts.db")
+        self.lock = Lock()
+        self.conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        self.fts_table = self._find_fts_table()
+
+    def _find_fts_table(self) -> str | None:
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tracks_fts'").fetchone():
+            return "main.tracks_fts"
+        if self.index_path.exists():
+            self.conn.execute("ATTACH DATABASE ? AS fts_index", (f"{self.index_path.resolve().as_uri()}?mode=ro",))
+            return "fts_index.tracks_fts"
+        logger.warning("lrclib数据库转储 %s 没有全文索引, 搜索只能按标题前缀查找", self.path)
+        return None
+
+    def build_fts_index(self) -> None:
+        """为没有tracks_fts的转储生成附属的全文索引, 只需执行一次"""
+        if self.fts_table is not None:
+            return
+        index_conn = sqlite3.connect(self.index_path)
+        try:
+            index_conn.execute("ATTACH DATABASE ? AS dump", (f"{self.path.resolve().as_uri()}?mode=ro&immutable=1",))
+            index_conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(name_lower, album_name_lower, artist_name_lower, content='')")
+            index_conn.execute(
+                "INSERT INTO tracks_fts (rowid, name_lower, album_name_lower, artist_name_lower) SELECT id, name_lower, album_name_lower, artist_name_lower FROM dump.tracks",
+            )
+            index_conn.commit()
+        finally:
+            index_conn.close()
+        with self.lock:
+            self.fts_table = self._find_fts_table()
+
+    def _parse_song_info(self, row: tuple) -> SongInfo:
+        """解析歌曲信息"""
+        track_id, name, artist_name, album_name, duration, instrumental = row
+        return SongInfo(
+            source=self.source,
+            title=name,
+            artist=Artist(artist_name),
+            album=album_name,
+            duration=int(duration * 1000),  # 数据库中为秒数，转换为毫秒
+            id=str(track_id),
+            language=Language.INSTRUMENTAL if instrumental else Language.OTHER,
+        )
+
+    def lookup(self, title: str, artist: str, album: str | None = None, duration: int | None = None) -> SongInfo | None:
+        """精确查找歌曲(与lrclib的/get相同)
+
+        Args:
+            title: 标题
+            artist: 歌手
+            album: 专辑, 为None时不限制
+            duration: 时长(毫秒), 为None时不限制
+
+        Returns:
+            SongInfo | None: 时长最接近的歌曲, 没有找到时为None
+
+        """
+        conditions = ["tracks.name_lower = :title", "tracks.artist_name_lower = :artist"]
+        params: dict[str, str | float] = {"title": prepare_input(title), "artist": prepare_input(artist)}
+        if album is not None:
+            conditions.append("tracks.album_name_lower = :album")
+            params["album"] = prepare_input(album)
+        order = "tracks.id DESC"
+        if duration is not None:
+            conditions.append("tracks.duration BETWEEN :duration - :tolerance AND :duration + :tolerance")
+            params.update(duration=duration / 1000, tolerance=self.DURATION_TOLERANCE)
+            order = "ABS(tracks.duration - :duration), tracks.id DESC"
+        sql = f"""
+            SELECT {self._TRACK_COLUMNS} FROM tracks
+            LEFT JOIN lyrics ON lyrics.id = tracks.last_lyrics_id
+            WHERE {" AND ".join(conditions)} AND tracks.last_lyrics_id IS NOT NULL
+            ORDER BY {order}
+            LIMIT 1
+        """  # noqa: S608
+        with self.lock:
+            row = self.conn.execute(sql, params).fetchone()
+        return self._parse_song_info(row) if row else None
+
+    def get_lyrics(self, info: SongInfo) -> Lyrics:
+        """获取歌词, 没有id时按歌曲信息精确查找"""
+        if not info.id:
+            if not info.title or not info.artist:
+                msg = "缺少必要参数"
+                raise APIParamsError(msg)
+            found = self.lookup(info.title, info.artist.str(), info.album, info.duration)
+            if found is None:
+                return Lyrics(info)
+            track_id = found.id
+        else:
+            track_id = info.id
+
+        with self.lock:
+            row = self.conn.execute(
+                """
+                SELECT tracks.name, tracks.artist_name, tracks.album_name, lyrics.synced_lyrics, lyrics.plain_lyrics FROM tracks
+                JOIN lyrics ON lyrics.id = tracks.last_lyrics_id
+                WHERE tracks.id = ?
+                """,
+                (int(track_id),),
+            ).fetchone()
+        if row is None:
+            return Lyrics(info)
+        return _build_lyrics(info, *row)
+
+    def search(self, keyword: str, search_type: SearchType, page: int = 1) -> APIResultList[SongInfo]:
+        """搜索歌曲"""
+        if search_type not in self.supported_search_types:
+            msg = f"不支持的搜索类型: {search_type}"
+            raise NotImplementedError(msg)
+
+        offset = (page - 1) * 20
+        with self.lock:
+            if self.fts_table is not None:
+                words = prepare_input(keyword).split()
+                if not words:
+                    rows = []
+                else:
+                    rows = self.conn.execute(
+                        f"""
+                        SELECT {self._TRACK_COLUMNS} FROM {self.fts_table} AS fts
+                        JOIN tracks ON tracks.id = fts.rowid
+                        LEFT JOIN lyrics ON lyrics.id = tracks.last_lyrics_id
+                        WHERE fts.tracks_fts MATCH ? AND tracks.last_lyrics_id IS NOT NULL
+                        ORDER BY fts.rank
+                        LIMIT 20 OFFSET ?
+                        """,  # noqa: S608
+                        (" ".join(f'"{word}"' for word in words), offset),
+                    ).fetchall()
+            else:
+                # 没有全文索引, 将关键词("歌手 - 标题"或标题)的每一部分作为标题前缀查找
+                rows = []
+                for part in dict.fromkeys(prepare_input(part) for part in keyword.split(" - ")):
+                    if part:
+                        rows.extend(
+                            self.conn.execute(
+                                f"""
+                                SELECT {self._TRACK_COLUMNS} FROM tracks
+                                LEFT JOIN lyrics ON lyrics.id = tracks.last_lyrics_id
+                                WHERE tracks.name_lower >= ? AND tracks.name_lower < ? AND tracks.last_lyrics_id IS NOT NULL
+                                LIMIT 20 OFFSET ?
+                                """,  # noqa: S608
+                                (part, part + "\U0010ffff", offset),
+                            ).fetchall(),
+                        )
+                rows = rows[:20]
+
+        items = [self._parse_song_info(row) for row in rows]
+        return APIResultList(items, SearchInfo(source=self.source, keyword=keyword, search_type=search_type, page=page), (0, len(items) - 1, len(items)))
+
+    def get_songlist(self, songlist_info: SongListInfo) -> APIResultList[SongInfo]:
+        msg = "lrclib数据库不支持获取歌单"
+        raise NotImplementedError(msg)
+
+    def get_lyricslist(self, song_info: SongInfo) -> APIResultList[LyricInfo]:
+        msg = "lrclib数据库不支持获取歌词列表"
+        raise NotImplementedError(msg)
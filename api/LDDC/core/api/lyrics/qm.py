@@ -19,7 +19,6 @@ from LDDC.common.models import (
     Language,
     LyricInfo,
     Lyrics,
-    QrcType,
     SearchInfo,
     SearchType,
     SongInfo,
@@ -27,8 +26,7 @@ from LDDC.common.models import (
     SongListType,
     Source,
 )
-from LDDC.core.decryptor import qrc_decrypt
-from LDDC.core.parser.qrc import qrc_str_parse
+from LDDC.core.decode_pool import decode_qrc
 from LDDC.core.parser.utils import judge_lyrics_type
 
 from .models import CloudAPI
@@ -380,18 +378,13 @@ class QMAPI(CloudAPI):
             lrc = response[value]
             lrc_t = (response["qrc_t"] if response["qrc_t"] != 0 else response["lrc_t"]) if value == "lyric" else response[value + "_t"]
             if lrc != "" and lrc_t != "0":
-                encrypted_lyric = lrc
+                tags, lyric = decode_qrc(lrc)
 
-                lyric = qrc_decrypt(encrypted_lyric, QrcType.CLOUD)
+                if key == "orig":
+                    lyrics.tags = tags
 
-                if lyric is not None:
-                    tags, lyric = qrc_str_parse(lyric)
-
-                    if key == "orig":
-                        lyrics.tags = tags
-
-                    lyrics[key] = lyric
-                    lyrics.types[key] = judge_lyrics_type(lyric)
+                lyrics[key] = lyric
+                lyrics.types[key] = judge_lyrics_type(lyric)
         return lyrics
 
     def get_lyricslist(self, song_info: SongInfo) -> list[LyricInfo]:
@@ -4,10 +4,8 @@
 
 import httpx
 
-from LDDC.common.data.cache import cache
 from LDDC.common.data.config import cfg
 from LDDC.common.models import Lyrics, LyricsData, TranslateTargetLanguage
-from LDDC.common.version import __version__
 
 from .models import BaseTranslator
 
@@ -48,10 +46,9 @@ class BingTranslator(BaseTranslator):
         )
 
     def translate_texts(self, texts: list[str], target_lang: str, source_lang: str = "auto") -> list[str]:
-        cache_key = (__version__, "bing", source_lang, target_lang, tuple(texts).__hash__())
-        if cache_key in cache:
-            return cache[cache_key]  # type: ignore[reportReturnType]
+        return self.translate_with_memory("bing", texts, target_lang, source_lang, lambda missing: self._translate(missing, target_lang, source_lang))
 
+    def _translate(self, texts: list[str], target_lang: str, source_lang: str) -> list[str]:
         params = {"to": target_lang}
         if source_lang != "auto":
             params["from"] = source_lang
@@ -63,9 +60,7 @@ class BingTranslator(BaseTranslator):
         )
         resp.raise_for_status()
 
-        result = [item["translations"][0]["text"] for item in resp.json()]
-        cache.set(cache_key, result, expire=14400)
-        return result
+        return [item["translations"][0]["text"] for item in resp.json()]
 
     def translate_lyrics(self, lyrics: Lyrics) -> LyricsData:
         return self.texts2data(self.translate_texts(self.get_orig_lines(lyrics), lang_map[TranslateTargetLanguage[cfg["translate_target_lang"]]]), lyrics)
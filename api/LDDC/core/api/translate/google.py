@@ -4,11 +4,9 @@ import re
 
 import httpx
 
-from LDDC.common.data.cache import cache
 from LDDC.common.data.config import cfg
 from LDDC.common.logger import logger
 from LDDC.common.models import Lyrics, LyricsData, TranslateTargetLanguage
-from LDDC.common.version import __version__
 
 from .models import BaseTranslator
 
@@ -55,9 +53,9 @@ class GoogleTranslator(BaseTranslator):
             logger.exception("Failed to update Google Translate API key")
 
     def translate_texts(self, texts: list[str], target_lang: str, source_lang: str = "auto") -> list[str]:
-        cache_key = (__version__, "bing", source_lang, target_lang, tuple(texts).__hash__())
-        if cache_key in cache:
-            return cache[cache_key]  # type: ignore[reportReturnType]
+        return self.translate_with_memory("google", texts, target_lang, source_lang, lambda missing: self._translate(missing, target_lang, source_lang))
+
+    def _translate(self, texts: list[str], target_lang: str, source_lang: str) -> list[str]:
         payload = [[texts, source_lang, target_lang], "te"]
 
         resp = self.client.post(
@@ -77,9 +75,7 @@ class GoogleTranslator(BaseTranslator):
         )
         resp.raise_for_status()
 
-        result = list(resp.json()[0])
-        cache.set(cache_key, result, expire=14400)
-        return result
+        return list(resp.json()[0])
 
     def translate_lyrics(self, lyrics: Lyrics) -> LyricsData:
         return self.texts2data(self.translate_texts(self.get_orig_lines(lyrics), lang_map[TranslateTargetLanguage[cfg["translate_target_lang"]]]), lyrics)
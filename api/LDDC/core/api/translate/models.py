@@ -1,8 +1,22 @@
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+import hashlib
+import json
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
 
+from LDDC.common.data.cache import cache
 from LDDC.common.models import Lyrics, LyricsData, LyricsLine, LyricsWord
+from LDDC.common.version import __version__
+
+TRANSLATION_EXPIRE = 14400  # 整首歌词翻译结果的缓存时间(秒)
+TRANSLATION_MEMORY_EXPIRE = 7 * 86400  # 单行翻译记忆的缓存时间(秒)
+
+
+def texts_digest(texts: Sequence[str] | str) -> str:
+    """文本内容的稳定摘要, 在不同进程间保持一致(不同于str.__hash__)"""
+    data = texts if isinstance(texts, str) else json.dumps(list(texts), ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
 
 
 class BaseTranslator(ABC):
@@ -15,6 +29,58 @@ class BaseTranslator(ABC):
     def get_orig_lines(self, lyrics: Lyrics) -> list[str]:
         return ["".join(word.text for word in line.words) for line in lyrics["orig"]]
 
+    def translate_with_memory(
+        self,
+        provider: str,
+        texts: list[str],
+        target_lang: str,
+        source_lang: str,
+        translate: Callable[[list[str]], list[str]],
+    ) -> list[str]:
+        """使用翻译记忆翻译文本
+
+        1. 整体命中缓存时直接返回
+        2. 否则逐行查询翻译记忆, 只把缺少的行(去重后)交给translate翻译
+        空行不会被翻译
+
+        Args:
+            provider (str): 翻译提供者, 用于区分缓存
+            texts (list[str]): 需要翻译的文本
+            target_lang (str): 目标语言
+            source_lang (str): 源语言
+            translate (Callable[[list[str]], list[str]]): 实际请求翻译的函数
+
+        """
+        cache_key = (__version__, "translate", provider, source_lang, target_lang, texts_digest(texts))
+        if (result := cache.get(cache_key)) is not None:
+            return result  # type: ignore[reportReturnType]
+
+        def line_key(text: str) -> tuple:
+            return (__version__, "translate_line", provider, source_lang, target_lang, texts_digest(text))
+
+        translated: dict[str, str] = {"": ""}
+        missing: list[str] = []
+        for text in dict.fromkeys(texts):
+            if text in translated:
+                continue
+            if (line := cache.get(line_key(text))) is not None:
+                translated[text] = line
+            else:
+                missing.append(text)
+
+        if missing:
+            results = translate(missing)
+            if len(results) != len(missing):
+                msg = "The number of translated texts does not match the number of original lines."
+                raise ValueError(msg)
+            for text, line in zip(missing, results, strict=True):
+                translated[text] = line
+                cache.set(line_key(text), line, expire=TRANSLATION_MEMORY_EXPIRE)
+
+        result = [translated[text] for text in texts]
+        cache.set(cache_key, result, expire=TRANSLATION_EXPIRE)
+        return result
+
     def texts2data(self, texts: list[str], lyrics: Lyrics) -> LyricsData:
         orig_data = lyrics["orig"]
         if len(texts) != len(orig_data):
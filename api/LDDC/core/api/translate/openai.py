@@ -9,7 +9,7 @@ from LDDC.common.exceptions import TranslateError
 from LDDC.common.models import Lyrics, LyricsData, TranslateTargetLanguage
 from LDDC.common.version import __version__
 
-from .models import BaseTranslator
+from .models import TRANSLATION_EXPIRE, BaseTranslator, texts_digest
 
 lang_map = {
     TranslateTargetLanguage.SIMPLIFIED_CHINESE: "简体中文",
@@ -40,7 +40,8 @@ class OpenAITranslator(BaseTranslator):
         model = cfg["openai_model"]
 
         texts = self.get_orig_lines(lyrics)  # 获取原始歌词行列表
-        cache_key = (__version__, "openai", target_lang, tuple(texts).__hash__(), base_url, model)
+        # 整首歌词一起翻译以保留上下文, 因此只缓存整首的结果, 不使用逐行的翻译记忆
+        cache_key = (__version__, "openai", base_url, model, target_lang, texts_digest(texts))
         if cache_key in cache:
             return cache[cache_key]  # type: ignore[reportReturnType]
         orig_lines = "\n".join(f"{i + 1:02d}|{text}" for i, text in enumerate(texts))  # 格式化原始歌词行
@@ -118,5 +119,5 @@ Begin your translation now, responding ONLY with the formatted translated lyrics
 
         trans_data = self.texts2data([line.split("|", 1)[1] for line in lines], lyrics)  # 将解析后的数据存储到texts2data中
 
-        cache.set(cache_key, trans_data, expire=14400)
+        cache.set(cache_key, trans_data, expire=TRANSLATION_EXPIRE)
         return trans_data
@@ -6,16 +6,187 @@ non-Qt server environment. It removes all dependencies on PySide6 and TaskManage
 using Python's standard concurrent.futures for asynchronous operations.
 """
 
-from collections.abc import Iterable
+import time
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import replace
 from functools import reduce
-from typing import Literal, overload
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future, wait, ALL_COMPLETED
+from threading import Lock
+from typing import Any, Literal, overload
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 
 from LDDC.common.exceptions import AutoFetchUnknownError, LDDCError, LyricsNotFoundError, NotEnoughInfoError
 from LDDC.common.logger import logger
 from LDDC.common.models import APIResultList, Language, LyricInfo, Lyrics, LyricsType, SearchInfo, SearchType, SongInfo, Source
-from LDDC.core.algorithm import calculate_artist_score, calculate_title_score, text_difference
-from LDDC.core.api.lyrics import get_lyrics, search
+from LDDC.core.api.lyrics import OFFLINE_SOURCES, get_lyrics, lookup, search
+from LDDC.core.match_index import match_index
+from LDDC.core.scoring import ScoringQuery
+
+# 最高优先级的源返回了不低于此分数且排名(_lyrics_rank)为最高的歌词时提前结束匹配
+# 其他源即使满分也不会超出此分数15分以上, 不会被分数过滤掉该歌词; 排名已是最高, 其他源的歌词也不会因为有翻译/罗马音而排在它前面
+EARLY_RETURN_SCORE = 85
+MAX_LYRICS_RANK = 17  # 逐字 + 翻译 + 罗马音
+
+
+def _lyrics_rank(lyrics: Lyrics) -> int:
+    """歌词的排名, 分数相近时优先选择 逐字(10) > 有翻译(5) > 有罗马音(2)"""
+    rank = 0
+    if lyrics.types.get("orig") == LyricsType.VERBATIM: rank += 10
+    if "ts" in lyrics: rank += 5
+    if "roma" in lyrics: rank += 2
+    return rank
+
+
+class FetchSession:
+    """在多次auto_fetch之间共享线程池与请求
+
+    相同的(源, 关键词)搜索与相同歌曲的歌词获取在一个会话中只会执行一次,
+    后来的调用直接复用之前提交的Future
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.executor = ThreadPoolExecutor(max_workers)
+        self._futures: dict[Hashable, Future] = {}
+        self._lock = Lock()
+
+    def _submit(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None or future.cancelled():
+                future = self.executor.submit(func, *args)
+                self._futures[key] = future
+            return future
+
+    def search(self, source: Source, keyword: str) -> Future:
+        return self._submit(("search", source, keyword), search, source, keyword, SearchType.SONG)
+
+    def get_lyrics(self, song_info: SongInfo) -> Future:
+        return self._submit(("lyrics", song_info), get_lyrics, song_info)
+
+    def close(self) -> None:
+        """取消剩余的任务, 不等待正在进行的请求"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "FetchSession":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def score_index_candidates(info: SongInfo, sources: Iterable[Source], min_score: float, query: ScoringQuery) -> list[tuple[float, SongInfo]]:
+    """为本地匹配索引中的候选打分
+
+    Returns:
+        list[tuple[float, SongInfo]]: 分数高于min_score的候选, 按分数从高到低排序, 分数相同时被选中过的优先
+
+    """
+    candidates = match_index.query(info, sources)
+    scores = query.score([candidate for candidate, _ in candidates])
+    result_score = [(score, accepted, candidate) for score, (candidate, accepted) in zip(scores, candidates, strict=True) if score > min_score]
+    result_score.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    return [(score, candidate) for score, _, candidate in result_score]
+
+
+def score_offline_candidates(
+    info: SongInfo,
+    keywords: dict[Literal["artist-title", "title", "file_name"], str],
+    sources: Iterable[Source],
+    min_score: float,
+    query: ScoringQuery,
+) -> list[tuple[float, SongInfo]]:
+    """在离线源中查找候选并打分
+
+    先按(标题, 歌手, 专辑, 时长)精确查找, 没有找到分数高于min_score的歌曲时再进行全文搜索
+    (全文搜索要求所有词都匹配, "歌手 - 标题"没有结果时再只搜索标题)
+    离线源按优先级依次查找, 某个源有候选时不再查找后面的源
+    本地歌词库中的歌词文件一般没有时长信息, 这样的候选视为与要匹配的歌曲时长相同
+
+    Returns:
+        list[tuple[float, SongInfo]]: 分数高于min_score的候选, 按分数从高到低排序
+
+    """
+
+    def with_duration(candidate: SongInfo) -> SongInfo:
+        return replace(candidate, duration=info.duration) if info.duration and not candidate.duration else candidate
+
+    result_score: list[tuple[float, SongInfo]] = []
+    for source in sources:
+        if result_score:
+            break
+        try:
+            if (found := lookup(source, info)) is not None:
+                found = with_duration(found)
+                if (score := query.score([found])[0]) > min_score:
+                    result_score.append((score, found))
+                    continue
+            for keyword in dict.fromkeys(keywords.values()):
+                results = search(source, keyword, SearchType.SONG)
+                if not results or not isinstance(results.info, SearchInfo):
+                    continue
+                results = APIResultList([with_duration(result) for result in results], results.info, results.source_ranges)
+                if scored := score_results(info, keywords, results, min_score, query):
+                    result_score.extend(scored)
+                    break
+        except Exception:
+            logger.exception("在离线源 %s 中查找失败", source.name)
+    result_score.sort(key=lambda x: x[0], reverse=True)
+    return result_score
+
+
+def _fetch_candidates(
+    session: "FetchSession",
+    candidates: Iterable[tuple[float, SongInfo]],
+    songs_score: dict[SongInfo, float],
+    lyrics_results: dict[SongInfo, Lyrics],
+    deadline: float,
+) -> None:
+    """获取候选的歌词, 得到的歌词写入lyrics_results, 没有得到任何歌词时不记录候选的分数
+
+    只接受有原文(orig)的歌词: 调用方在得到歌词时会跳过网络搜索, 只有翻译的歌词不能代替网络源的结果
+    """
+    lyrics_tasks: dict[Future, SongInfo] = {}
+    for score, song_candidate in candidates:
+        songs_score[song_candidate] = score
+        lyrics_tasks[session.get_lyrics(song_candidate)] = song_candidate
+    if not lyrics_tasks:
+        return
+    wait(lyrics_tasks, timeout=max(deadline - time.monotonic(), 0))
+    found = False
+    for future, song_candidate in lyrics_tasks.items():
+        try:
+            if future.done() and (lyrics := future.result()) and lyrics.get("orig"):
+                lyrics_results[song_candidate] = lyrics
+                found = True
+        except Exception:  # noqa: BLE001
+            logger.warning("获取候选 %s 的歌词失败, 将进行搜索", song_candidate.artist_title())
+    if not found:
+        for song_candidate in lyrics_tasks.values():
+            songs_score.pop(song_candidate, None)
+
+
+def score_results(
+    info: SongInfo,
+    keywords: dict[Literal["artist-title", "title", "file_name"], str],
+    results: APIResultList[SongInfo],
+    min_score: float,
+    query: ScoringQuery | None = None,
+) -> list[tuple[float, SongInfo]]:
+    """为一个源的搜索结果打分
+
+    Args:
+        query: 同一次匹配中共享的查询特征, 为None时新建
+
+    Returns:
+        list[tuple[float, SongInfo]]: 分数高于min_score的结果, 按分数从高到低排序
+
+    """
+    if query is None:
+        query = ScoringQuery(info, keywords.get("file_name"))
+    by_title = results.info.keyword in (keywords.get("artist-title"), keywords.get("title"))
+    scores = query.score(results, by_file_name=not by_title)
+    result_score = [(score, result) for score, result in zip(scores, results, strict=True) if score > min_score]
+    result_score.sort(key=lambda x: x[0], reverse=True)
+    return result_score
 
 
 @overload
@@ -24,6 +195,8 @@ def auto_fetch(
     min_score: float = 60,
     sources: Iterable[Source] = (Source.QM, Source.KG, Source.NE),
     return_search_results: bool = False,
+    timeout: int = 30,
+    session: FetchSession | None = None,
 ) -> Lyrics: ...
 
 
@@ -33,6 +206,8 @@ def auto_fetch(
     min_score: float = 60,
     sources: Iterable[Source] = (Source.QM, Source.KG, Source.NE),
     return_search_results: bool = True,
+    timeout: int = 30,
+    session: FetchSession | None = None,
 ) -> tuple[Lyrics, APIResultList[SongInfo]]: ...
 
 
@@ -42,7 +217,9 @@ def auto_fetch(
     sources: Iterable[Source] = (Source.QM, Source.KG, Source.NE),
     return_search_results: bool = False,
     timeout: int = 30,
+    session: FetchSession | None = None,
 ) -> Lyrics | tuple[Lyrics, APIResultList[SongInfo]]:
+    sources = tuple(sources)
     keywords: dict[Literal["artist-title", "title", "file_name"], str] = {}
     if info.title and info.title.strip():
         if info.artist:
@@ -56,77 +233,86 @@ def auto_fetch(
 
     search_results: dict[SongInfo, APIResultList[SongInfo]] = {}
     songs_score: dict[SongInfo, float] = {}
+    query = ScoringQuery(info, keywords.get("file_name"))  # 各个源的搜索结果共享
     lyrics_results: dict[SongInfo, Lyrics] = {}
     errors: list[Exception] = []
 
-    with ThreadPoolExecutor() as executor:
-        search_tasks: list[Future] = []
-        
-        # Initial search
-        keyword_to_search = keywords.get("artist-title") or keywords.get("title") or keywords["file_name"]
-        for source in sources:
-            future = executor.submit(search, source, keyword_to_search, SearchType.SONG)
-            search_tasks.append(future)
+    own_session = session is None
+    if session is None:
+        session = FetchSession()
+    try:
+        deadline = time.monotonic() + timeout
+        search_tasks: dict[Future, Source] = {}
+        lyrics_tasks: dict[Future, SongInfo] = {}
+        offline_sources = tuple(source for source in sources if source in OFFLINE_SOURCES)
+        network_sources = tuple(source for source in sources if source not in OFFLINE_SOURCES)
 
-        # Wait for initial search results
-        completed_searches, _ = wait(search_tasks, timeout=timeout, return_when=ALL_COMPLETED)
+        if not return_search_results:
+            # 先在离线源中查找, 得到歌词时不需要任何网络请求
+            if offline_sources:
+                _fetch_candidates(session, score_offline_candidates(info, keywords, offline_sources, min_score, query)[:2], songs_score, lyrics_results, deadline)
+            # 再获取本地匹配索引中的最佳候选的歌词, 得到歌词时跳过上游搜索
+            if not lyrics_results and "title" in keywords:
+                _fetch_candidates(session, score_index_candidates(info, network_sources, min_score, query)[:2], songs_score, lyrics_results, deadline)
 
-        potential_lyrics_tasks: dict[Future, SongInfo] = {}
+        # Initial search
+        pending: set[Future] = set()
+        if not lyrics_results:
+            keyword_to_search = keywords.get("artist-title") or keywords.get("title") or keywords["file_name"]
+            for source in sources if return_search_results else network_sources:
+                future = session.search(source, keyword_to_search)
+                search_tasks[future] = source
+            pending.update(search_tasks)
+        while pending:
+            # 搜索受总超时限制, 已开始的歌词获取任务则等待其完成
+            searching = any(future in search_tasks for future in pending)
+            remaining = deadline - time.monotonic() if searching else None
+            if remaining is not None and remaining <= 0:
+                timed_out = {future for future in pending if future in search_tasks}
+                errors.extend(TimeoutError(f"{search_tasks[future].name} 搜索超时") for future in timed_out)
+                pending -= timed_out
+                continue
 
-        for future in completed_searches:
-            try:
-                results: APIResultList[SongInfo] = future.result()
-                if not results or not isinstance(results.info, SearchInfo):
-                    continue
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in search_tasks:
+                    # 每个源的搜索结果到达后立即打分, 并为最佳候选开始获取歌词
+                    try:
+                        results: APIResultList[SongInfo] = future.result()
+                        if not results or not isinstance(results.info, SearchInfo):
+                            continue
+                        match_index.add_results(results)
 
-                result_score: list[tuple[float, SongInfo]] = []
-                for result in results:
-                    if info.duration and abs((info.duration or -4) - (result.duration or -8)) > 4000:
-                        continue
-                    
-                    if results.info.keyword in (keywords.get("artist-title"), keywords.get("title")):
-                        title_score = calculate_title_score(info.title or "", result.title or "")
-                        album_score = max(text_difference(info.album.lower(), result.album.lower()) * 100, 0) if info.album and result.album else None
-                        artist_score = calculate_artist_score(str(info.artist), str(result.artist)) if info.artist and result.artist else None
-                        score = title_score
-                        if artist_score is not None:
-                            score = max(title_score * 0.5 + artist_score * 0.5, (title_score * 0.5 + artist_score * 0.35 + (album_score or 0) * 0.15) if album_score is not None else 0)
-                        elif album_score:
-                            score = max(title_score * 0.7 + album_score * 0.3, title_score * 0.8)
-                        if title_score < 30:
-                            score = max(0, score - 35)
-                    else:
-                        score = max(text_difference(keywords["file_name"], result.title or "") * 100, text_difference(keywords["file_name"], f"{result.artist!s} - {result.title}")*100)
-
-                    if score > min_score:
-                        result_score.append((score, result))
-
-                result_score.sort(key=lambda x: x[0], reverse=True)
-
-                # Submit tasks to get lyrics for top candidates
-                for i, (score, song_candidate) in enumerate(result_score):
-                    if i >= 2: break # Try top 2 candidates
-                    songs_score[song_candidate] = score
-                    search_results[song_candidate] = APIResultList([song_candidate, *[r for r in results if r != song_candidate]], results.info)
-                    task = executor.submit(get_lyrics, song_candidate)
-                    potential_lyrics_tasks[task] = song_candidate
-
-            except Exception as e:
-                errors.append(e)
-
-        # Wait for lyrics results
-        for future in as_completed(potential_lyrics_tasks):
-            song_info_candidate = potential_lyrics_tasks[future]
-            try:
-                lyrics = future.result()
-                if lyrics:
-                    lyrics_results[song_info_candidate] = lyrics
-            except Exception as e:
-                errors.append(e)
+                        for score, song_candidate in score_results(info, keywords, results, min_score, query)[:2]:  # Try top 2 candidates
+                            songs_score[song_candidate] = score
+                            search_results[song_candidate] = APIResultList([song_candidate, *[r for r in results if r != song_candidate]], results.info)
+                            task = session.get_lyrics(song_candidate)
+                            lyrics_tasks[task] = song_candidate
+                            pending.add(task)
+                    except Exception as e:
+                        errors.append(e)
+                else:
+                    song_info_candidate = lyrics_tasks[future]
+                    try:
+                        lyrics = future.result()
+                        if lyrics:
+                            lyrics_results[song_info_candidate] = lyrics
+                    except Exception as e:
+                        errors.append(e)
+
+            if not return_search_results and _can_return_early(network_sources[0] if network_sources else None, search_tasks, lyrics_tasks, pending, songs_score, lyrics_results):
+                break
+    finally:
+        # 共享的会话中的任务可能仍被其他调用使用, 由会话的创建者关闭
+        if own_session:
+            session.close()
 
     if not lyrics_results:
         if any(not isinstance(e, LyricsNotFoundError) for e in errors):
-             logger.error(f"Errors during auto_fetch: {errors}")
+            # 有请求失败时无法确定是否真的没有歌词
+            logger.error(f"Errors during auto_fetch: {errors}")
+            msg = "自动获取歌词时发生错误"
+            raise AutoFetchUnknownError(msg, errors)
         raise LyricsNotFoundError("没有找到符合要求的歌曲")
 
     highest_score = max(songs_score.get(song_info, 0) for song_info in lyrics_results)
@@ -136,31 +322,104 @@ def auto_fetch(
         if abs(songs_score.get(song_info, 0) - highest_score) <= 15
     }
 
-    def get_rank(lyrics: Lyrics) -> int:
-        rank = 0
-        if lyrics.types.get("orig") == LyricsType.VERBATIM: rank += 10
-        if "ts" in lyrics: rank += 5
-        if "roma" in lyrics: rank += 2
-        return rank
-
-    sorted_lyrics = sorted(lyrics_results.items(), key=lambda item: get_rank(item[1]), reverse=True)
+    sorted_lyrics = sorted(lyrics_results.items(), key=lambda item: _lyrics_rank(item[1]), reverse=True)
     
     final_lyrics_list = [item[1] for item in sorted_lyrics]
 
     for source_priority in sources:
         for lyrics in final_lyrics_list:
             if lyrics.info.source == source_priority:
+                info_key = next(s_info for s_info, l in lyrics_results.items() if l == lyrics)
+                match_index.add_match(info_key)
                 if not return_search_results:
                     return lyrics
-                
-                info_key = next(s_info for s_info, l in lyrics_results.items() if l == lyrics)
-                
+
                 all_search_results = reduce(lambda a, b: a + b, search_results.values()) if search_results else APIResultList([])
                 
                 return lyrics, APIResultList(search_results.get(info_key, APIResultList([])) + all_search_results)
 
     # Fallback if no priority source matched
     best_lyrics, all_results = sorted_lyrics[0][1], reduce(lambda a, b: a + b, search_results.values(), APIResultList([]))
+    match_index.add_match(sorted_lyrics[0][0])
     if return_search_results:
         return best_lyrics, all_results
-    return best_lyrics 
\ No newline at end of file
+    return best_lyrics
+
+
+def _can_return_early(
+    top_source: Source | None,
+    search_tasks: dict[Future, Source],
+    lyrics_tasks: dict[Future, SongInfo],
+    pending: set[Future],
+    songs_score: dict[SongInfo, float],
+    lyrics_results: dict[SongInfo, Lyrics],
+) -> bool:
+    """检查最高优先级的源是否已得到足以决定最终结果的歌词
+
+    需要该源的搜索与歌词获取全部完成, 且其中有分数不低于EARLY_RETURN_SCORE、排名为MAX_LYRICS_RANK(逐字+翻译+罗马音)的歌词,
+    只有逐字歌词时其他源的带翻译/罗马音的歌词可能会被选中, 不能提前结束
+    """
+    if top_source is None:
+        return False
+    if any(search_tasks.get(future) == top_source or (future in lyrics_tasks and lyrics_tasks[future].source == top_source) for future in pending):
+        return False
+    return any(
+        song_info.source == top_source
+        and songs_score.get(song_info, 0) >= EARLY_RETURN_SCORE
+        and _lyrics_rank(lyrics) == MAX_LYRICS_RANK
+        for song_info, lyrics in lyrics_results.items()
+    )
+
+
+def auto_fetch_any(
+    infos: Iterable[SongInfo],
+    min_score: float = 55,
+    sources: Iterable[Source] = (Source.QM, Source.KG, Source.NE),
+    timeout: int = 30,
+    accept: Callable[[Lyrics], bool] | None = None,
+    session: FetchSession | None = None,
+) -> Lyrics:
+    """并行尝试多组歌曲信息(如歌名/歌手互换), 返回最先得到的可接受歌词
+
+    所有尝试共享同一个FetchSession, 相同的搜索与歌词获取只执行一次
+
+    Args:
+        infos: 按优先级排列的歌曲信息
+        accept: 判断歌词是否可接受, 默认接受所有结果
+
+    Raises:
+        LyricsNotFoundError: 没有可接受的歌词
+        Exception: 全部失败时, 优先抛出按优先级第一个出错(而非未找到)的尝试的异常
+
+    """
+    infos = list(infos)
+    if not infos:
+        msg = "没有可用于匹配的歌曲信息"
+        raise NotEnoughInfoError(msg)
+    sources = tuple(sources)
+
+    own_session = session is None
+    if session is None:
+        session = FetchSession()
+    runner = ThreadPoolExecutor(len(infos))
+    try:
+        tasks = {runner.submit(auto_fetch, info, min_score, sources, False, timeout, session): i for i, info in enumerate(infos)}
+        errors: dict[int, Exception] = {}
+        pending = set(tasks)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    lyrics = future.result()
+                except Exception as e:  # noqa: BLE001
+                    errors[tasks[future]] = e
+                    continue
+                if accept is None or accept(lyrics):
+                    return lyrics
+                errors[tasks[future]] = LyricsNotFoundError("没有找到符合要求的歌词")
+        not_found = (LyricsNotFoundError, NotEnoughInfoError)
+        raise next((errors[i] for i in sorted(errors) if not isinstance(errors[i], not_found)), errors[min(errors)])
+    finally:
+        runner.shutdown(wait=False, cancel_futures=True)
+        if own_session:
+            session.close()
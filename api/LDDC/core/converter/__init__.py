@@ -46,7 +46,7 @@ def convert2(lyrics: LyricsBase,
                     json_info[key] = value
             return json_info
 
-        json_dict = {"version": 1, "info": handle_info(lyrics.info.to_dict()), "tags": lyrics.tags, "lyrics": dict(lyrics)}
+        json_dict = {"version": 1, "info": handle_info(lyrics.info.to_dict()), "tags": lyrics.tags, "lyrics": {lang: list(data) for lang, data in lyrics.items()}}
         json_dict["info"]["songinfo"] = handle_info(lyrics.info.songinfo.to_dict())
         return json.dumps(json_dict, ensure_ascii=False)
 
@@ -6,7 +6,8 @@ from LDDC.common.exceptions import LyricsDecryptError
 from LDDC.common.logger import logger
 from LDDC.common.models import QrcType
 from LDDC.core.decryptor.qmc1 import qmc1_decrypt
-from LDDC.core.decryptor.tripledes import DECRYPT, tripledes_crypt, tripledes_key_setup
+from LDDC.core.decryptor.tripledes import DECRYPT, tripledes_crypt_blocks, tripledes_key_setup
+from LDDC.core.decryptor.xor import xor_bytes
 
 QRC_KEY = b"!@#)(*$%123ZXC!@!@#)(NHL"
 KRC_KEY = b"@Gaw^2tGQ61-\xce\xd2ni"
@@ -34,12 +35,8 @@ def qrc_decrypt(encrypted_qrc: str | bytearray | bytes, qrc_type: QrcType = QrcT
             qmc1_decrypt(encrypted_text_byte)
             encrypted_text_byte = encrypted_text_byte[11:]
 
-        data = bytearray()
         schedule = tripledes_key_setup(QRC_KEY, DECRYPT)
-
-        # 以 8 字节为单位迭代 encrypted_text_byte
-        for i in range(0, len(encrypted_text_byte), 8):
-            data += tripledes_crypt(encrypted_text_byte[i:], schedule)
+        data = tripledes_crypt_blocks(encrypted_text_byte, schedule)
 
         decrypted_qrc = decompress(data).decode("utf-8")
     except Exception as e:
@@ -60,9 +57,7 @@ def krc_decrypt(encrypted_lyrics: bytearray | bytes) -> str:
         raise LyricsDecryptError(msg)
 
     try:
-        decrypted_data = bytearray()
-        for i, item in enumerate(encrypted_data):
-            decrypted_data.append(item ^ KRC_KEY[i % len(KRC_KEY)])
+        decrypted_data = xor_bytes(encrypted_data, KRC_KEY)
 
         return decompress(decrypted_data).decode('utf-8')
     except Exception as e:
@@ -5,8 +5,14 @@ import binascii
 import hashlib
 import json
 from base64 import b64decode, b64encode
+from functools import lru_cache
 
-from pyaes import AESModeOfOperationECB
+from pyaes import AES
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:
+    Cipher = None
 
 DEVICEID_XOR_KEY = '3go8&$8*3*3h0k(2)2'
 
@@ -25,23 +31,59 @@ def pkcs7_unpad(data: bytes) -> bytes:
     return data[:-pad_len]
 
 
+@lru_cache(maxsize=8)
+def _get_aes(key: bytes) -> AES:
+    """获取已完成密钥扩展的AES对象, 密钥都是常量, 每个进程只需扩展一次"""
+    return AES(key)
+
+
+@lru_cache(maxsize=8)
+def _get_native_cipher(key: bytes) -> "Cipher | None":
+    """获取cryptography的AES-ECB对象, 未安装cryptography时返回None"""
+    if Cipher is None:
+        return None
+    return Cipher(algorithms.AES(key), modes.ECB())  # noqa: S305
+
+
+def aes_ecb_crypt(data: bytes | bytearray | memoryview, key: bytes, encrypt: bool) -> bytes | bytearray:
+    """对数据的每个16字节块进行AES-ECB运算(不处理填充)
+
+    安装了cryptography时使用其原生实现, 否则使用pyaes逐块运算并写入预分配的缓冲区
+
+    Args:
+        data: 长度为16的倍数的数据
+        key: AES密钥
+        encrypt: True为加密, False为解密
+
+    """
+    view = memoryview(data)
+    if len(view) % 16:
+        msg = "数据长度必须是16的倍数"
+        raise ValueError(msg)
+
+    cipher = _get_native_cipher(key)
+    if cipher is not None:
+        context = cipher.encryptor() if encrypt else cipher.decryptor()
+        return context.update(view) + context.finalize()
+
+    aes = _get_aes(key)
+    crypt = aes.encrypt if encrypt else aes.decrypt
+    output = bytearray(len(view))
+    for i in range(0, len(view), 16):
+        output[i:i + 16] = crypt(view[i:i + 16].tolist())
+    return output
+
+
 def aes_encrypt(data: str | bytes, key: bytes) -> bytes:
     if isinstance(data, str):
         data = data.encode()
     padded_data = pkcs7_pad(data)  # Ensure the data is padded
-    aes = AESModeOfOperationECB(key)  # Using ECB mode
-    encrypted_data = b''
-    for i in range(0, len(padded_data), 16):
-        encrypted_data += aes.encrypt(padded_data[i:i + 16])  # Encrypt in 16-byte blocks
-    return encrypted_data
+    return bytes(aes_ecb_crypt(padded_data, key, encrypt=True))
 
 
 def aes_decrypt(cipher_buffer: bytes, key: bytes) -> bytes:
-    aes = AESModeOfOperationECB(key)  # Using ECB mode
-    decrypted_data = b''
-    for i in range(0, len(cipher_buffer), 16):
-        decrypted_data += aes.decrypt(cipher_buffer[i:i + 16])  # Decrypt in 16-byte blocks
-    return pkcs7_unpad(decrypted_data)  # Remove padding after decryption
+    decrypted_data = aes_ecb_crypt(cipher_buffer, key, encrypt=False)
+    return bytes(pkcs7_unpad(decrypted_data))  # Remove padding after decryption
 
 
 def eapi_params_encrypt(path: bytes, params: dict) -> str:
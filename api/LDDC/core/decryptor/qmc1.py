@@ -3,6 +3,7 @@
 
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
+from LDDC.core.decryptor.xor import repeat_key, xor_stream
 
 PRIVKEY = (
     0xc3, 0x4a, 0xd6, 0xca, 0x90, 0x67, 0xf7, 0x52,
@@ -31,6 +32,22 @@ PRIVKEY = (
 )
 
 
+_PRIVKEY_BYTES = bytes(PRIVKEY)
+# 密钥流只由两段固定的周期组成, 模块加载时生成一次, 之后按数据长度截取或延长
+_KEY_HEAD = repeat_key(_PRIVKEY_BYTES, 0x8000)  # i <= 0x7FFF 的部分
+_KEY_PERIOD = repeat_key(_PRIVKEY_BYTES, 0x7FFF)  # i > 0x7FFF 的部分以0x7FFF为周期
+
+
+def _key_stream(length: int) -> bytes:
+    """生成length长度的密钥流
+
+    第i个字节: i <= 0x7FFF时为PRIVKEY[i & 0x7F], 否则为PRIVKEY[(i % 0x7FFF) & 0x7F]
+    """
+    if length <= 0x8000:
+        return _KEY_HEAD[:length]
+    # 从(0x8000 % 0x7FFF) == 1处开始重复周期
+    return _KEY_HEAD + repeat_key(_KEY_PERIOD, length - 0x8000, offset=1)
+
+
 def qmc1_decrypt(data: bytearray) -> None:
-    for i, _value in enumerate(data):
-        data[i] ^= PRIVKEY[(i % 0x7FFF) & 0x7F] if i > 0x7FFF else PRIVKEY[i & 0x7F]
+    data[:] = xor_stream(data, _key_stream(len(data)))
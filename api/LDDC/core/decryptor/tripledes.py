@@ -4,7 +4,7 @@
 
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
-from LDDC.common.data.cache import cache
+from functools import lru_cache
 
 ENCRYPT = 1
 DECRYPT = 0
@@ -157,8 +157,8 @@ def inverse_permutation(s0: int, s1: int) -> bytearray:
     return data
 
 
-def f(state: int, key: list[int]) -> int:
-    # 提取位并左移
+def _expansion(state: int) -> int:
+    """扩展置换(E), 将32位状态扩展为48位"""
     t1 = (bitnum_intl(state, 31, 0) | ((state & 0xf0000000) >> 1) | bitnum_intl(state, 4, 5) |
           bitnum_intl(state, 3, 6) | ((state & 0x0f000000) >> 3) | bitnum_intl(state, 8, 11) |
           bitnum_intl(state, 7, 12) | ((state & 0x00f00000) >> 5) | bitnum_intl(state, 12, 17) |
@@ -169,26 +169,12 @@ def f(state: int, key: list[int]) -> int:
           bitnum_intl(state, 23, 12) | ((state & 0x000000f0) << 11) | bitnum_intl(state, 28, 17) |
           bitnum_intl(state, 27, 18) | ((state & 0x0000000f) << 9) | bitnum_intl(state, 0, 23))
 
-    # 将 t1 和 t2 的位组合到 lrgstate 中
-    lrgstate = (
-        (t1 >> 24) & 0x000000ff, (t1 >> 16) & 0x000000ff, (t1 >> 8) & 0x000000ff,
-        (t2 >> 24) & 0x000000ff, (t2 >> 16) & 0x000000ff, (t2 >> 8) & 0x000000ff,
-    )
-
-    # 与密钥进行异或运算
-    lrgstate = [lrgstate[i] ^ key[i] for i in range(6)]
+    # t1 和 t2 的高24位组成48位
+    return (((t1 >> 8) & 0xffffff) << 24) | ((t2 >> 8) & 0xffffff)
 
-    # S盒操作
-    state = ((sbox[0][sbox_bit(lrgstate[0] >> 2)] << 28) |
-             (sbox[1][sbox_bit(((lrgstate[0] & 0x03) << 4) | (lrgstate[1] >> 4))] << 24) |
-             (sbox[2][sbox_bit(((lrgstate[1] & 0x0f) << 2) | (lrgstate[2] >> 6))] << 20) |
-             (sbox[3][sbox_bit(lrgstate[2] & 0x3f)] << 16) |
-             (sbox[4][sbox_bit(lrgstate[3] >> 2)] << 12) |
-             (sbox[5][sbox_bit(((lrgstate[3] & 0x03) << 4) | (lrgstate[4] >> 4))] << 8) |
-             (sbox[6][sbox_bit(((lrgstate[4] & 0x0f) << 2) | (lrgstate[5] >> 6))] << 4) |
-             sbox[7][sbox_bit(lrgstate[5] & 0x3f)])
 
-    # 位运算
+def _p_permutation(state: int) -> int:
+    """S盒输出后的P置换"""
     return (bitnum_intl(state, 15, 0) | bitnum_intl(state, 6, 1) | bitnum_intl(state, 19, 2) |
             bitnum_intl(state, 20, 3) | bitnum_intl(state, 28, 4) | bitnum_intl(state, 11, 5) |
             bitnum_intl(state, 27, 6) | bitnum_intl(state, 16, 7) | bitnum_intl(state, 0, 8) |
@@ -202,7 +188,25 @@ def f(state: int, key: list[int]) -> int:
             bitnum_intl(state, 3, 30) | bitnum_intl(state, 24, 31))
 
 
+def f(state: int, key: list[int]) -> int:
+    # 扩展置换后与密钥进行异或运算
+    lrgstate = (_expansion(state) ^ int.from_bytes(bytes(key), "big")).to_bytes(6, "big")
+
+    # S盒操作
+    state = ((sbox[0][sbox_bit(lrgstate[0] >> 2)] << 28) |
+             (sbox[1][sbox_bit(((lrgstate[0] & 0x03) << 4) | (lrgstate[1] >> 4))] << 24) |
+             (sbox[2][sbox_bit(((lrgstate[1] & 0x0f) << 2) | (lrgstate[2] >> 6))] << 20) |
+             (sbox[3][sbox_bit(lrgstate[2] & 0x3f)] << 16) |
+             (sbox[4][sbox_bit(lrgstate[3] >> 2)] << 12) |
+             (sbox[5][sbox_bit(((lrgstate[3] & 0x03) << 4) | (lrgstate[4] >> 4))] << 8) |
+             (sbox[6][sbox_bit(((lrgstate[4] & 0x0f) << 2) | (lrgstate[5] >> 6))] << 4) |
+             sbox[7][sbox_bit(lrgstate[5] & 0x3f)])
+
+    return _p_permutation(state)
+
+
 def crypt(input_data: bytearray, key: list) -> bytearray:
+    """逐位实现的单次DES, 作为查找表实现的参考(用于生成查找表与基准测试)"""
     s0, s1 = initial_permutation(input_data)  # 初始置换
 
     for idx in range(15):  # 15轮迭代
@@ -214,6 +218,45 @@ def crypt(input_data: bytearray, key: list) -> bytearray:
     return inverse_permutation(s0, s1)  # 逆置换
 
 
+# 查找表: 以上置换都是位置换(线性), 可以由单个位的结果组合得到
+def _build_byte_tables(bit_results: list[int]) -> tuple[tuple[int, ...], ...]:
+    """由每个输入位(从高到低)的结果构建按字节查找的表"""
+    tables = []
+    for byte_index in range(len(bit_results) // 8):
+        bits = bit_results[byte_index * 8:byte_index * 8 + 8]
+        table = [0] * 256
+        for value in range(1, 256):
+            low = value & -value
+            table[value] = table[value ^ low] | bits[7 - low.bit_length() + 1]
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+def _ip_bit(bit: int) -> int:
+    data = bytearray(8)
+    data[bit // 8] = 0x80 >> (bit % 8)
+    s0, s1 = initial_permutation(data)
+    return (s0 << 32) | s1
+
+
+def _fp_bit(bit: int) -> int:
+    value = 1 << (63 - bit)
+    return int.from_bytes(inverse_permutation(value >> 32, value & 0xffffffff), "big")
+
+
+# 初始置换: 8个字节 -> (s0 << 32) | s1
+_IP = _build_byte_tables([_ip_bit(bit) for bit in range(64)])
+# 逆置换: (s0 << 32) | s1 的8个字节 -> 输出的8个字节(大端)
+_FP = _build_byte_tables([_fp_bit(bit) for bit in range(64)])
+# 扩展置换: 32位状态的4个字节 -> 48位
+_E = _build_byte_tables([_expansion(1 << (31 - bit)) for bit in range(32)])
+# S盒与P置换合并的SP盒: 6位输入 -> 32位输出
+_SP = tuple(
+    tuple(_p_permutation(sbox[i][sbox_bit(value)] << (28 - i * 4)) for value in range(64))
+    for i in range(8)
+)
+
+
 def key_schedule(key: bytes, mode: int) -> list[list[int]]:
     schedule = [[0] * 6 for _ in range(16)]
     key_rnd_shift = (1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1)
@@ -243,8 +286,8 @@ def key_schedule(key: bytes, mode: int) -> list[list[int]]:
     return schedule
 
 
-@cache.memoize()
-def tripledes_key_setup(key: bytes, mode: int) -> list[list[list[int]]]:
+def tripledes_key_schedules(key: bytes, mode: int) -> list[list[list[int]]]:
+    """3DES的3组密钥编排(每组16轮, 每轮6个字节), 供逐位的参考实现使用"""
     if mode == ENCRYPT:
         return [key_schedule(key[0:], ENCRYPT),
                 key_schedule(key[8:], DECRYPT),
@@ -254,7 +297,56 @@ def tripledes_key_setup(key: bytes, mode: int) -> list[list[list[int]]]:
             key_schedule(key[0:], DECRYPT)]
 
 
-def tripledes_crypt(data: bytearray, key: list) -> bytearray:
-    for i in range(3):
-        data = crypt(data, key[i])
-    return data
+@lru_cache(maxsize=16)
+def tripledes_key_setup(key: bytes, mode: int) -> tuple[int, ...]:
+    """计算3DES的轮密钥, 返回48个48位整数(3组, 每组16轮)
+
+    结果保存在进程内存中, 密钥通常是常量, 每个进程只需计算一次
+    """
+    return tuple(int.from_bytes(bytes(round_key), "big") for schedule in tripledes_key_schedules(key, mode) for round_key in schedule)
+
+
+def tripledes_crypt(data: bytearray, key: tuple[int, ...]) -> bytearray:
+    """对一个8字节的块进行3DES运算"""
+    return tripledes_crypt_blocks(memoryview(data)[:8], key)
+
+
+def tripledes_crypt_blocks(data: bytes | bytearray | memoryview, key: tuple[int, ...]) -> bytearray:
+    """使用查找表对数据的每个8字节块进行3DES运算
+
+    逆置换与下一次初始置换互逆, 所以每个块只需在开始时进行一次初始置换、在结束时进行一次逆置换
+
+    Args:
+        data: 长度为8的倍数的数据
+        key: tripledes_key_setup返回的密钥编排
+
+    """
+    view = memoryview(data)
+    if len(view) % 8:
+        msg = "数据长度必须是8的倍数"
+        raise ValueError(msg)
+
+    ip0, ip1, ip2, ip3, ip4, ip5, ip6, ip7 = _IP
+    fp0, fp1, fp2, fp3, fp4, fp5, fp6, fp7 = _FP
+    e0, e1, e2, e3 = _E
+    sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = _SP
+    stages = (key[0:16], key[16:32], key[32:48])
+
+    output = bytearray(len(view))
+    for i in range(0, len(view), 8):
+        b0, b1, b2, b3, b4, b5, b6, b7 = view[i:i + 8]
+        block = ip0[b0] | ip1[b1] | ip2[b2] | ip3[b3] | ip4[b4] | ip5[b5] | ip6[b6] | ip7[b7]
+        s0, s1 = block >> 32, block & 0xffffffff
+
+        for stage in stages:
+            for round_key in stage:
+                x = (e0[s1 >> 24] | e1[(s1 >> 16) & 0xff] | e2[(s1 >> 8) & 0xff] | e3[s1 & 0xff]) ^ round_key
+                s0, s1 = s1, s0 ^ (sp0[x >> 42] | sp1[(x >> 36) & 0x3f] | sp2[(x >> 30) & 0x3f] | sp3[(x >> 24) & 0x3f] |
+                                   sp4[(x >> 18) & 0x3f] | sp5[(x >> 12) & 0x3f] | sp6[(x >> 6) & 0x3f] | sp7[x & 0x3f])
+            # 最后一轮不交换
+            s0, s1 = s1, s0
+
+        block = (s0 << 32) | s1
+        output[i:i + 8] = (fp0[block >> 56] | fp1[(block >> 48) & 0xff] | fp2[(block >> 40) & 0xff] | fp3[(block >> 32) & 0xff] |
+                           fp4[(block >> 24) & 0xff] | fp5[(block >> 16) & 0xff] | fp6[(block >> 8) & 0xff] | fp7[block & 0xff]).to_bytes(8, "big")
+    return output
@@ -0,0 +1,40 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""整段数据的XOR运算
+
+将密钥重复到与数据等长后一次性异或, 安装了NumPy时使用NumPy, 否则把两者当作大整数异或,
+避免逐字节的Python循环
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def repeat_key(key: bytes, length: int, offset: int = 0) -> bytes:
+    """将key从offset处开始循环重复到length长度"""
+    if not key:
+        msg = "key不能为空"
+        raise ValueError(msg)
+    offset %= len(key)
+    times = (offset + length) // len(key) + 1
+    return (key * times)[offset:offset + length]
+
+
+def xor_stream(data: bytes | bytearray | memoryview, key_stream: bytes | bytearray | memoryview) -> bytes:
+    """将data与等长的key_stream逐字节异或"""
+    length = len(data)
+    if len(key_stream) != length:
+        msg = "数据与密钥流的长度不一致"
+        raise ValueError(msg)
+    if length == 0:
+        return b""
+    if np is not None:
+        return np.bitwise_xor(np.frombuffer(data, dtype=np.uint8), np.frombuffer(key_stream, dtype=np.uint8)).tobytes()
+    return (int.from_bytes(data, "little") ^ int.from_bytes(key_stream, "little")).to_bytes(length, "little")
+
+
+def xor_bytes(data: bytes | bytearray | memoryview, key: bytes) -> bytes:
+    """使用循环重复的key对data进行异或"""
+    return xor_stream(data, repeat_key(key, len(data)))
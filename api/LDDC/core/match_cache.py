@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""自动匹配结果缓存
+
+缓存auto_fetch的匹配决定(选中的歌曲与渲染好的LRC),
+使相同歌曲的重复匹配请求只需一次缓存读取, 无需重新搜索、打分与渲染。
+键由unified_symbol规范化的(标题, 歌手, 专辑, 时长区间)组成。
+"""
+
+from dataclasses import dataclass
+
+from LDDC.common.data.cache import cache
+from LDDC.common.models import SongInfo
+from LDDC.core.algorithm import unified_symbol
+
+MATCH_CACHE_VERSION = 1
+MATCH_EXPIRE = 14400  # 匹配成功的缓存时间(秒), 与搜索/歌词缓存一致
+NO_MATCH_EXPIRE = 900  # 未找到歌词的缓存时间(秒)
+DURATION_BUCKET = 5  # 时长区间大小
+
+
+@dataclass(frozen=True, slots=True)
+class MatchDecision:
+    """一次自动匹配的结果, song_info为None表示未找到歌词"""
+
+    song_info: SongInfo | None = None
+    lrc: str | None = None
+    lrc_romaji: str | None = None  # 含罗马音的LRC, 歌词没有罗马音时为None
+
+    @property
+    def found(self) -> bool:
+        return self.song_info is not None
+
+    def get_lrc(self, include_romaji: bool) -> str | None:
+        if include_romaji and self.lrc_romaji is not None:
+            return self.lrc_romaji
+        return self.lrc
+
+
+def _normalize(text: str | None) -> str:
+    return unified_symbol(text).casefold() if text else ""
+
+
+def match_cache_key(info: SongInfo) -> tuple:
+    """构建匹配缓存键
+
+    标题存在时使用(标题, 歌手, 专辑), 否则使用文件名, 时长按DURATION_BUCKET分区
+    """
+    if info.title and info.title.strip():
+        identity = ("title", _normalize(info.title), _normalize(str(info.artist) if info.artist else None), _normalize(info.album))
+    elif info.path:
+        identity = ("file_name", _normalize(info.path.stem), "", "")
+    else:
+        identity = ("", "", "", "")
+    bucket = info.duration // DURATION_BUCKET if info.duration is not None else None
+    return ("match_decision", MATCH_CACHE_VERSION, *identity, bucket)
+
+
+def get_match(info: SongInfo) -> MatchDecision | None:
+    """获取缓存的匹配结果, 未缓存时返回None"""
+    decision = cache.get(match_cache_key(info))
+    return decision if isinstance(decision, MatchDecision) else None
+
+
+def set_match(info: SongInfo, song_info: SongInfo, lrc: str, lrc_romaji: str | None = None) -> None:
+    """缓存匹配成功的结果"""
+    cache.set(match_cache_key(info), MatchDecision(song_info, lrc, lrc_romaji), expire=MATCH_EXPIRE)
+
+
+def set_no_match(info: SongInfo) -> None:
+    """缓存未找到歌词的结果, 只应在确定没有歌词时调用(而不是请求出错时)"""
+    cache.set(match_cache_key(info), MatchDecision(), expire=NO_MATCH_EXPIRE)
@@ -0,0 +1,287 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""本地匹配索引
+
+记录auto_fetch见过的所有搜索结果与最终选中的歌曲,
+使用SQLite FTS5按规范化标题的n-gram检索候选。
+auto_fetch先在索引中查找, 有候选的分数高于min_score时直接获取其歌词, 跳过上游搜索。
+写入由单独的写入线程执行, 队列中积累的写入合并为一次提交, 不会阻塞匹配请求。
+
+与match_cache的区别: match_cache只能命中规范化后完全相同的查询,
+索引则可以让不同写法的查询(如翻唱、不同的歌手写法)复用之前的搜索结果
+"""
+
+import json
+import sqlite3
+import time
+from collections.abc import Iterable
+from queue import Empty, Queue
+from threading import Lock, Thread
+
+from LDDC.common.data.config import cfg
+from LDDC.common.logger import logger
+from LDDC.common.models import SongInfo, Source
+from LDDC.common.paths import data_dir
+from LDDC.core.algorithm import normalize_text
+
+MATCH_INDEX_LIMIT = 50  # 每次查询返回的最大候选数
+PRUNE_INTERVAL = 1000  # 每写入多少条记录检查一次是否需要清理
+
+
+def text_grams(text: str) -> list[str]:
+    """将规范化的文本拆分为单字与双字的n-gram"""
+    return [*dict.fromkeys(text), *dict.fromkeys(text[i : i + 2] for i in range(len(text) - 1))]
+
+
+def _song_key(info: SongInfo) -> str | None:
+    return info.id or info.mid or info.hash
+
+
+def _dump_info(info: SongInfo) -> str:
+    return json.dumps(
+        {
+            "source": info.source.name,
+            "title": info.title,
+            "subtitle": info.subtitle,
+            "artist": list(info.artist) if info.artist else None,
+            "album": info.album,
+            "duration": info.duration,
+            "id": info.id,
+            "mid": info.mid,
+            "hash": info.hash,
+            "language": info.language.name if info.language else None,
+        },
+        ensure_ascii=False,
+    )
+
+
+def _load_info(data: str) -> SongInfo:
+    return SongInfo.from_dict({k: v for k, v in json.loads(data).items() if v is not None})
+
+
+class MatchIndexDB:
+    """匹配索引数据库管理类
+
+    1. 使用sqlite3数据库与FTS5全文索引
+    2. 使用Lock进行保证线程安全, 写入通过队列交给写入线程
+    3. max_entries不大于0、SQLite不支持FTS5或数据库无法打开时禁用, 所有方法都不做任何事
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.lock = Lock()
+        self.path = data_dir / "match_index.db"
+        self.max_entries = max_entries
+        self._writes = 0
+        self._queue: Queue[tuple[tuple[SongInfo, ...], bool] | None] = Queue()
+        self._writer: Thread | None = None
+        self.conn: sqlite3.Connection | None = None
+        if max_entries <= 0:
+            return
+        try:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.init_db()
+        except sqlite3.Error:
+            logger.exception("无法打开匹配索引数据库, 匹配索引已禁用")
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+            return
+        self._writer = Thread(target=self._write_loop, name="MatchIndexWriter", daemon=True)
+        self._writer.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.conn is not None
+
+    def init_db(self) -> None:
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            # 创建表
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS songs (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    song_key TEXT NOT NULL,
+                    info TEXT NOT NULL,
+                    title_grams TEXT NOT NULL,
+                    artist_grams TEXT NOT NULL,
+                    duration INTEGER NOT NULL,
+                    accepted INTEGER NOT NULL DEFAULT 0,
+                    updated INTEGER NOT NULL,
+                    UNIQUE (source, song_key)
+                )
+            """)
+            # 创建全文索引及同步触发器
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+                    title_grams, artist_grams, content='songs', content_rowid='id'
+                )
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS songs_ai AFTER INSERT ON songs BEGIN
+                    INSERT INTO songs_fts (rowid, title_grams, artist_grams) VALUES (new.id, new.title_grams, new.artist_grams);
+                END
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS songs_ad AFTER DELETE ON songs BEGIN
+                    INSERT INTO songs_fts (songs_fts, rowid, title_grams, artist_grams) VALUES ('delete', old.id, old.title_grams, old.artist_grams);
+                END
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS songs_au AFTER UPDATE OF title_grams, artist_grams ON songs BEGIN
+                    INSERT INTO songs_fts (songs_fts, rowid, title_grams, artist_grams) VALUES ('delete', old.id, old.title_grams, old.artist_grams);
+                    INSERT INTO songs_fts (rowid, title_grams, artist_grams) VALUES (new.id, new.title_grams, new.artist_grams);
+                END
+            """)
+            # 创建索引
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accepted_updated ON songs (accepted, updated)")
+            self.conn.commit()
+
+    def _write_loop(self) -> None:
+        """写入线程: 取出队列中所有等待的写入, 合并为一次提交"""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            try:
+                self._upsert([item for item in batch if item is not None])
+            except Exception:
+                # 写入失败只丢弃这一批, 写入线程继续运行
+                logger.exception("写入匹配索引失败")
+                with self.lock:
+                    if self.conn is not None:
+                        self.conn.rollback()
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if None in batch:
+                return
+
+    def _upsert(self, batch: list[tuple[tuple[SongInfo, ...], bool]]) -> None:
+        now = int(time.time())
+        rows = [
+            {
+                "source": info.source.name,
+                "song_key": key,
+                "info": _dump_info(info),
+                "title_grams": " ".join(text_grams(normalize_text(info.title))),
+                "artist_grams": " ".join(text_grams(normalize_text(info.str_artist))),
+                "duration": info.duration or -1,
+                "accepted": int(accepted),
+                "updated": now,
+            }
+            for infos, accepted in batch
+            for info in infos
+            if info.source not in (Source.Local, Source.MULTI) and info.title and (key := _song_key(info))
+        ]
+        if not rows:
+            return
+        with self.lock:
+            if self.conn is None:
+                return
+            self.conn.executemany(
+                """
+                INSERT INTO songs (source, song_key, info, title_grams, artist_grams, duration, accepted, updated)
+                VALUES (:source, :song_key, :info, :title_grams, :artist_grams, :duration, :accepted, :updated)
+                ON CONFLICT (source, song_key) DO UPDATE SET
+                    info = excluded.info,
+                    title_grams = excluded.title_grams,
+                    artist_grams = excluded.artist_grams,
+                    duration = excluded.duration,
+                    accepted = MAX(accepted, excluded.accepted),
+                    updated = excluded.updated
+                """,
+                rows,
+            )
+            self._writes += len(rows)
+            if self._writes >= PRUNE_INTERVAL:
+                self._writes = 0
+                self._prune()
+            self.conn.commit()
+
+    def _prune(self) -> None:
+        """删除超出max_entries的最久未更新的记录(优先删除未被选中过的)"""
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM songs").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM songs WHERE id IN (SELECT id FROM songs ORDER BY accepted, updated LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def add_results(self, results: Iterable[SongInfo]) -> None:
+        """记录搜索结果(异步写入)"""
+        if self._writer is not None:
+            self._queue.put((tuple(results), False))
+
+    def add_match(self, info: SongInfo) -> None:
+        """记录被选中的歌曲(异步写入)"""
+        if self._writer is not None:
+            self._queue.put(((info,), True))
+
+    def flush(self) -> None:
+        """等待队列中的写入全部完成"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def query(self, info: SongInfo, sources: Iterable[Source], limit: int = MATCH_INDEX_LIMIT) -> list[tuple[SongInfo, bool]]:
+        """按标题查询候选
+
+        Args:
+            info: 要匹配的歌曲信息
+            sources: 只返回这些源的歌曲
+            limit: 最大候选数
+
+        Returns:
+            list[tuple[SongInfo, bool]]: (候选, 是否被选中过), 按相关度排序, 时长相差超过4秒的候选已被过滤
+
+        """
+        title = normalize_text(info.title)
+        source_names = [source.name for source in sources]
+        if self.conn is None or not title or not source_names:
+            return []
+        grams = [title] if len(title) == 1 else [title[i : i + 2] for i in range(len(title) - 1)]
+        match = "title_grams : (" + " OR ".join(f'"{gram}"' for gram in dict.fromkeys(grams)) + ")"
+        sql = f"""
+            SELECT songs.info, songs.accepted FROM songs_fts
+            JOIN songs ON songs.id = songs_fts.rowid
+            WHERE songs_fts MATCH ?
+              AND songs.source IN ({", ".join("?" * len(source_names))})
+              {"AND (songs.duration < 0 OR ABS(songs.duration - ?) <= 4000)" if info.duration else ""}
+            ORDER BY bm25(songs_fts)
+            LIMIT ?
+        """  # noqa: S608
+        params = [match, *source_names, *([info.duration] if info.duration else []), limit]
+        try:
+            with self.lock:
+                rows = self.conn.execute(sql, params).fetchall()
+        except sqlite3.Error:
+            logger.exception("查询匹配索引失败")
+            return []
+        return [(_load_info(data), bool(accepted)) for data, accepted in rows]
+
+    def clear(self) -> None:
+        """清空匹配索引"""
+        if self.conn is None:
+            return
+        self.flush()
+        with self.lock:
+            self.conn.execute("DELETE FROM songs")
+            self.conn.commit()
+
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        with self.lock:
+            self.conn.close()
+            self.conn = None
+
+
+match_index = MatchIndexDB(cfg["match_index_max_entries"])
@@ -117,6 +117,46 @@ _TITLE_RE = re.compile(r"^Title:\s*(.*?)\s*", re.MULTILINE | re.IGNORECASE)
 _SECTION_RE = re.compile(r"^\[([^\]]+)\]\s*$", re.MULTILINE | re.IGNORECASE)
 
 
+def _parse_format_fields(format_line: str) -> dict[str, int]:
+    """解析事件段的Format行, 返回{字段名: 序号}"""
+    fields = [f.strip().lower() for f in format_line[len("Format:") :].split(",")]
+    return {f: idx for idx, f in enumerate(fields)}
+
+
+def _parse_dialogue(line: str, field_map: dict[str, int]) -> tuple[FSLyricsLine, str] | None:
+    """解析一行Dialogue, 返回(歌词行, 样式名), 格式不正确时返回None"""
+    parts = [p.strip() for p in line[len("Dialogue:") :].split(",", maxsplit=len(field_map) - 1)]
+    try:
+        start = parse_ass_time(parts[field_map["start"]])
+        end = parse_ass_time(parts[field_map["end"]])
+        style = parts[field_map["style"]].lower()
+        text = parts[field_map["text"]]
+    except (IndexError, ValueError):
+        return None
+
+    # 加强时间处理
+    words = []
+    current_time = start
+    total_duration = end - start
+
+    for duration, text_block in parse_karaoke_tags(text):
+        block_duration = total_duration if duration == 0 else min(duration, end - current_time)
+
+        if block_duration <= 0:
+            continue
+
+        # 将整个文本块作为一个单词处理
+        words.append(
+            FSLyricsWord(
+                start=current_time,
+                end=current_time + block_duration,
+                text=text_block,
+            ),
+        )
+        current_time += block_duration
+    return FSLyricsLine(start=start, end=end, words=words), style
+
+
 def parse_ass_dialogues(ass_content: str) -> tuple[list[tuple[FSLyricsLine, str]], dict[str, str]]:
     """解析ASS文件内容为dialogues数据"""
     tags = {}
@@ -140,12 +180,7 @@ def parse_ass_dialogues(ass_content: str) -> tuple[list[tuple[FSLyricsLine, str]
         return dialogues, tags
 
     # 获取格式字段
-    def parse_format_fields(header: str) -> dict[str, int]:
-        format_line = next((ln for ln in header.split("\n") if ln.lower().startswith("format:")), "")
-        fields = [f.strip().lower() for f in format_line[len("Format:") :].split(",")]
-        return {f: idx for idx, f in enumerate(fields)}
-
-    field_map = parse_format_fields(events_header)
+    field_map = _parse_format_fields(next((ln for ln in events_header.split("\n") if ln.lower().startswith("format:")), ""))
     if not all(k in field_map for k in ["start", "end", "style", "text"]):
         return dialogues, tags
 
@@ -154,41 +189,8 @@ def parse_ass_dialogues(ass_content: str) -> tuple[list[tuple[FSLyricsLine, str]
         if not line.lower().startswith("dialogue:"):
             continue
 
-        parts = [p.strip() for p in line[len("Dialogue:") :].split(",", maxsplit=len(field_map) - 1)]
-        try:
-            start = parse_ass_time(parts[field_map["start"]])
-            end = parse_ass_time(parts[field_map["end"]])
-            style = parts[field_map["style"]].lower()
-            text = parts[field_map["text"]]
-        except (IndexError, ValueError):
-            continue
-
-        # 加强时间处理
-        words = []
-        current_time = start
-        total_duration = end - start
-
-        for duration, text_block in parse_karaoke_tags(text):
-            block_duration = total_duration if duration == 0 else min(duration, end - current_time)
-
-            if block_duration <= 0:
-                continue
-
-            # 将整个文本块作为一个单词处理
-            words.append(
-                FSLyricsWord(
-                    start=current_time,
-                    end=current_time + block_duration,
-                    text=text_block,
-                ),
-            )
-            current_time += block_duration
-        dialogues.append(
-            (
-                FSLyricsLine(start=start, end=end, words=words),
-                style,
-            ),
-        )
+        if (dialogue := _parse_dialogue(line, field_map)) is not None:
+            dialogues.append(dialogue)
     return dialogues, tags
 
 
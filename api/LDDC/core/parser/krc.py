@@ -13,6 +13,24 @@ _LINE_SPLIT_PATTERN = re.compile(r"^\[(\d+),(\d+)\](.*)$")  # 逐行匹配
 _WORD_SPLIT_PATTERN = re.compile(r"(?:\[\d+,\d+\])?<(?P<start>\d+),(?P<duration>\d+),\d+>(?P<content>(?:.(?!\d+,\d+,\d+>))*)")  # 逐字匹配
 
 
+def _parse_krc_line(line_match: re.Match[str]) -> LyricsLine:
+    line_start, line_duration, line_content = line_match.groups()
+    line_start = int(line_start)
+    line_end = line_start + int(line_duration)
+
+    words = [
+        LyricsWord(
+            line_start + int(word_match.group("start")),
+            line_start + int(word_match.group("start")) + int(word_match.group("duration")),
+            word_match.group("content"),
+        )
+        for word_match in _WORD_SPLIT_PATTERN.finditer(line_content)
+    ]
+    if not words:
+        words = [LyricsWord(line_start, line_end, line_content)]
+    return LyricsLine(line_start, line_end, words)
+
+
 def krc2mdata(krc: str) -> tuple[dict, MultiLyricsData]:
     """将明文krc转换为字典{歌词类型: [(行起始时间, 行结束时间, [(字起始时间, 字结束时间, 字内容)])]}."""
     lrc_dict = MultiLyricsData({})
@@ -32,22 +50,7 @@ def krc2mdata(krc: str) -> tuple[dict, MultiLyricsData]:
             continue
 
         if line_match := _LINE_SPLIT_PATTERN.match(line):
-            line_start, line_duration, line_content = line_match.groups()
-            line_start = int(line_start)
-            line_end = line_start + int(line_duration)
-
-            words = [
-                LyricsWord(
-                    line_start + int(word_match.group("start")),
-                    line_start + int(word_match.group("start")) + int(word_match.group("duration")),
-                    word_match.group("content"),
-                )
-                for word_match in _WORD_SPLIT_PATTERN.finditer(line_content)
-            ]
-            if not words:
-                words = [LyricsWord(line_start, line_end, line_content)]
-
-            orig_list.append(LyricsLine(line_start, line_end, words))
+            orig_list.append(_parse_krc_line(line_match))
 
     if "language" in tags and tags["language"].strip() != "":
         languages = json.loads(b64decode(tags["language"].strip()))
@@ -1,6 +1,7 @@
 # SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
 # SPDX-License-Identifier: GPL-3.0-only
 import re
+from collections.abc import Iterable, Iterator
 
 from LDDC.common.models import LyricsData, LyricsLine, LyricsType, LyricsWord, MultiLyricsData, Source
 from LDDC.common.time import time2ms
@@ -15,36 +16,9 @@ _MULTI_LINE_SPLIT_PATTERN = re.compile(r"^((?:\[\d+:\d+\.\d+\]){2,})(.*)$")
 _TIMESTAMPS_PATTERN = re.compile(r"\[(\d+):(\d+)\.(\d+)\]")
 
 
-def _lrc2list_data(lrc: str, source: Source | None = None) -> tuple[dict[str, str], list[LyricsData]]:
-    """将普通LRC、增强型LRC、逐字LRC、网易云非标准LRC转换为LyricsData列表
-
-    Args:
-        lrc (str): LRC字符串
-        source (Source | None, optional): LRC来源. Defaults to None.
-
-    Returns:
-        tuple[dict[str, str], list[LyricsData]]: 标签字典, LyricsData列表
-
-    """
-    lrc_lists: list[LyricsData] = [LyricsData([])]
-    start_time_lists: list[list] = [[]]
-
-    def add_line(line: LyricsLine) -> None:
-        for i, lrc_list in enumerate(lrc_lists):
-            if line.start not in start_time_lists[i]:
-                # 没有开始时间相同的歌词行
-                if line.start is not None:
-                    lrc_list.append(line)
-                    start_time_lists[i].append(line.start)
-                break
-        else:
-            if line[2]:
-                lrc_lists.append(LyricsData([line]))
-                start_time_lists.append([line.start])
-
-    tags = {}
-
-    for raw_line in lrc.splitlines():
+def _iter_lrc_lines(lines: Iterable[str], source: Source | None, tags: dict[str, str]) -> Iterator[LyricsLine]:
+    """逐行解析LRC, 生成歌词行(结束时间未补全), 标签写入tags"""
+    for raw_line in lines:
         line = raw_line.strip()
         if not line or not line.startswith("["):
             continue
@@ -60,7 +34,7 @@ def _lrc2list_data(lrc: str, source: Source | None = None) -> tuple[dict[str, st
                 # 歌词行开头有多个时间戳
                 for ts_match in _TIMESTAMPS_PATTERN.finditer(timestamps):
                     start = time2ms(*ts_match.groups())
-                    add_line(LyricsLine(start, None, [LyricsWord(start, None, line_content)]))
+                    yield LyricsLine(start, None, [LyricsWord(start, None, line_content)])
                 continue
 
             if "<" in line_content and ">" in line_content:
@@ -93,14 +67,16 @@ def _lrc2list_data(lrc: str, source: Source | None = None) -> tuple[dict[str, st
                         if word_str:
                             words.append(LyricsWord(word_start, word_end, word_str))
 
-            add_line(LyricsLine(start, end, words))
+            yield LyricsLine(start, end, words)
             continue
 
         if tag_match := _TAG_SPLIT_PATTERN.match(line):  # 标签行处理
             tags[tag_match.group("k")] = tag_match.group("v")
             continue
 
-    # 按起始时间排序
+
+def _finish_layers(lrc_lists: list[LyricsData]) -> list[LyricsData]:
+    """按起始时间排序, 补全结束时间并清除空行"""
     for i, lrc_list in enumerate(lrc_lists):
         lrc_lists[i] = LyricsData(sorted([line for line in lrc_list if line.start is not None], key=lambda x: x.start))  # type: ignore[]  已确保line.start不为None
         for i_, line in enumerate(lrc_lists[i]):
@@ -111,7 +87,40 @@ def _lrc2list_data(lrc: str, source: Source | None = None) -> tuple[dict[str, st
         # 清除空行
         lrc_lists[i] = LyricsData([line for line in lrc_lists[i] if line.words])
 
-    return tags, lrc_lists
+    return lrc_lists
+
+
+def _lrc2list_data(lrc: str, source: Source | None = None) -> tuple[dict[str, str], list[LyricsData]]:
+    """将普通LRC、增强型LRC、逐字LRC、网易云非标准LRC转换为LyricsData列表
+
+    起始时间相同的歌词行依次放入下一层, 每层使用集合记录已有的起始时间
+
+    Args:
+        lrc (str): LRC字符串
+        source (Source | None, optional): LRC来源. Defaults to None.
+
+    Returns:
+        tuple[dict[str, str], list[LyricsData]]: 标签字典, LyricsData列表
+
+    """
+    lrc_lists: list[LyricsData] = [LyricsData([])]
+    start_time_sets: list[set[int | None]] = [set()]
+    tags: dict[str, str] = {}
+
+    for line in _iter_lrc_lines(lrc.splitlines(), source, tags):
+        for lrc_list, start_times in zip(lrc_lists, start_time_sets):
+            if line.start not in start_times:
+                # 没有开始时间相同的歌词行
+                if line.start is not None:
+                    lrc_list.append(line)
+                    start_times.add(line.start)
+                break
+        else:
+            if line.words:
+                lrc_lists.append(LyricsData([line]))
+                start_time_sets.append({line.start})
+
+    return tags, _finish_layers(lrc_lists)
 
 
 def lrc2mdata(lrc: str, source: Source | None = None) -> tuple[dict[str, str], MultiLyricsData]:
@@ -131,14 +140,14 @@ def lrc2mdata(lrc: str, source: Source | None = None) -> tuple[dict[str, str], M
 
 def lrc2data(lrc: str, source: Source | None = None) -> tuple[dict[str, str], LyricsData]:
     tags, lrc_lists = _lrc2list_data(lrc, source)
-    # 合并为一个LyricsData
-    for i, lrc_list in enumerate(lrc_lists):
-        if i == 0:
-            continue
-        for line_list1 in lrc_list:
-            for line_list2 in reversed(lrc_lists[0]):
-                if line_list1[0] == line_list2[0]:
-                    # 歌词行起始时间相同,向后插入
-                    lrc_lists[0].insert(lrc_lists[0].index(line_list2) + 1, line_list1)
-                    break
-    return tags, lrc_lists[0]
+    # 合并为一个LyricsData: 其他层的歌词行插入到第一层中起始时间相同的歌词行之后, 没有对应行的歌词行被丢弃
+    groups: dict[int, list[LyricsLine]] = {line.start: [line] for line in lrc_lists[0]}  # type: ignore[]  已确保line.start不为None
+    for lrc_list in lrc_lists[1:]:
+        for line in lrc_list:
+            group = groups.get(line.start)  # type: ignore[]
+            if group is None:
+                continue
+            # 插入到组内第一个与组内最后一行相等的歌词行之后
+            last = group[-1]
+            group.insert(next(i for i, item in enumerate(group) if item == last) + 1, line)
+    return tags, LyricsData([line for group in groups.values() for line in group])
@@ -18,6 +18,32 @@ _WORD_SPLIT_PATTERN = re.compile(r"(?:\[\d+,\d+\])?(?P<content>(?:(?!\(\d+,\d+\)
 _WORD_TIMESTAMP_PATTERN = re.compile(r"^\(\d+,\d+\)$")
 
 
+def _parse_qrc_line(raw_line: str, tags: dict) -> LyricsLine | None:
+    """解析QRC内容中的一行, 标签写入tags, 不是歌词行时返回None"""
+    line = raw_line.strip()
+    if line_match := _LINE_SPLIT_PATTERN.match(line):  # 判断是否为歌词行
+        line_start, line_duration, line_content = line_match.groups()
+        line_start = int(line_start)
+        line_end = line_start + int(line_duration)
+        if line_content.startswith("(") and line_content.endswith(")") and _WORD_TIMESTAMP_PATTERN.match(line_content):
+            return LyricsLine(line_start, line_end, [])
+
+        words = [
+            LyricsWord(int(word_match.group("start")), int(word_match.group("start")) + int(word_match.group("duration")), word_match.group("content"))
+            for word_match in _WORD_SPLIT_PATTERN.finditer(line_content)
+            if word_match.group("content") != "\r"
+        ]
+        if not words:
+            words = [LyricsWord(line_start, line_end, line_content)]
+
+        return LyricsLine(line_start, line_end, words)
+
+    tag_split_content = re.findall(_TAG_SPLIT_PATTERN, line)
+    if tag_split_content:
+        tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
+    return None
+
+
 def qrc2data(s_qrc: str) -> tuple[dict, LyricsData]:
     """将qrc转换为列表LyricsData"""
     qrc_match = _QRC_PATTERN.search(s_qrc)
@@ -28,28 +54,8 @@ def qrc2data(s_qrc: str) -> tuple[dict, LyricsData]:
     lrc_list = LyricsData([])
 
     for raw_line in qrc_match.group("content").splitlines():
-        line = raw_line.strip()
-        if line_match := _LINE_SPLIT_PATTERN.match(line):  # 判断是否为歌词行
-            line_start, line_duration, line_content = line_match.groups()
-            line_start = int(line_start)
-            line_end = line_start + int(line_duration)
-            if line_content.startswith("(") and line_content.endswith(")") and _WORD_TIMESTAMP_PATTERN.match(line_content):
-                lrc_list.append(LyricsLine(line_start, line_end, []))
-                continue
-
-            words = [
-                LyricsWord(int(word_match.group("start")), int(word_match.group("start")) + int(word_match.group("duration")), word_match.group("content"))
-                for word_match in _WORD_SPLIT_PATTERN.finditer(line_content)
-                if word_match.group("content") != "\r"
-            ]
-            if not words:
-                words = [LyricsWord(line_start, line_end, line_content)]
-
-            lrc_list.append(LyricsLine(line_start, line_end, words))
-        else:
-            tag_split_content = re.findall(_TAG_SPLIT_PATTERN, line)
-            if tag_split_content:
-                tags.update({tag_split_content[0][0]: tag_split_content[0][1]})
+        if (line := _parse_qrc_line(raw_line, tags)) is not None:
+            lrc_list.append(line)
 
     return tags, lrc_list
 
@@ -66,6 +66,20 @@ def parse_srt(srt_content: str) -> Generator[tuple[int, int, list[str]], None, N
                 continue
 
 
+def _srt_entry_lines(start_time: int, end_time: int, contents: list[str]) -> list[tuple[str, LyricsLine]]:
+    """按内容行数将一个字幕块转换为(语言类型, 歌词行)列表"""
+    def line(text: str) -> LyricsLine:
+        return LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, text)])
+
+    if len(contents) == 1:
+        return [("orig", line(contents[0]))]
+    if len(contents) == 2:
+        return [("orig", line(contents[0])), ("ts", line(contents[1]))]
+    if len(contents) == 3:
+        return [("roma", line(contents[0])), ("orig", line(contents[1])), ("ts", line(contents[2]))]
+    return [("orig", line("".join(contents)))]
+
+
 def srt2mdata(srt_content: str) -> tuple[dict[str, str], MultiLyricsData]:
     """解析SRT文件内容为MultiLyricsData
 
@@ -81,17 +95,8 @@ def srt2mdata(srt_content: str) -> tuple[dict[str, str], MultiLyricsData]:
         {k: LyricsData([]) for k in ["orig", "roma", "ts"]},
     )
     for start_time, end_time, contents in parse_srt(srt_content):
-        if len(contents) == 1:
-            lyrics_mdata["orig"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, contents[0])]))
-        elif len(contents) == 2:
-            lyrics_mdata["orig"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, contents[0])]))
-            lyrics_mdata["ts"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, contents[1])]))
-        elif len(contents) == 3:
-            lyrics_mdata["roma"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, contents[0])]))
-            lyrics_mdata["orig"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, contents[1])]))
-            lyrics_mdata["ts"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, contents[2])]))
-        else:
-            lyrics_mdata["orig"].append(LyricsLine(start_time, end_time, [LyricsWord(start_time, end_time, "".join(contents))]))
+        for key, line in _srt_entry_lines(start_time, end_time, contents):
+            lyrics_mdata[key].append(line)
 
     return {}, MultiLyricsData({k: v for k, v in lyrics_mdata.items() if v})
 
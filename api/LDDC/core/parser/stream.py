@@ -0,0 +1,267 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""流式歌词解析
+
+各解析器的生成器版本, 从文本流、字符串迭代器或分块的字节迭代器中逐行读取, 边读取边生成LyricsLine,
+内存占用只与单行(SRT为单个字幕块)的大小有关, 可以用于处理非常大或多份拼接在一起的歌词文件。
+
+与一次性解析的区别:
+- LRC: 生成(layer, 歌词行), layer为起始时间相同的歌词行所在的层序号(0, 1, 2...)。
+  每层最多缓存LRC_REORDER_WINDOW行并按起始时间依次生成, 行的结束时间由同一层中起始时间更晚的下一行补全。
+  乱序不超过这个窗口时(如网易云的多时间戳行"[00:05.00][00:30.00]副歌")结果与lrc2data相同;
+  超出窗口时歌词行不再按时间顺序生成, 这样的行不补全结束时间, 需要完整排序的结果时请使用lrc2data
+- KRC: language标签需要出现在歌词行之前(酷狗的KRC都满足), 罗马音与翻译紧跟在对应的原文行之后生成
+- ASS: Format行需要出现在Dialogue行之前, 生成(样式名, 歌词行)
+"""
+
+import codecs
+import heapq
+import json
+from base64 import b64decode
+from collections.abc import Iterable, Iterator
+from itertools import count
+from typing import IO
+
+from LDDC.common.exceptions import LyricsProcessingError
+from LDDC.common.models import LyricsLine, LyricsWord, Source
+
+from .ass import _SECTION_RE, _TITLE_RE, _parse_dialogue, _parse_format_fields
+from .krc import _LINE_SPLIT_PATTERN as _KRC_LINE_SPLIT_PATTERN
+from .krc import _TAG_SPLIT_PATTERN as _KRC_TAG_SPLIT_PATTERN
+from .krc import _parse_krc_line
+from .lrc import _iter_lrc_lines
+from .qrc import _parse_qrc_line
+from .srt import _srt_entry_lines, parse_srt
+from .yrc import _parse_yrc_line
+
+CHUNK_SIZE = 64 * 1024
+LRC_REORDER_WINDOW = 64  # iter_lrc每层最多缓存的歌词行数
+
+TextSource = str | IO[str] | IO[bytes] | Iterable[str] | Iterable[bytes]
+
+_QRC_CONTENT_START = '<Lyric_1 LyricType="1" LyricContent="'
+_QRC_CONTENT_END = '"/>'
+
+
+def _iter_chunks(stream: TextSource) -> Iterator[str | bytes]:
+    if hasattr(stream, "read"):
+        while chunk := stream.read(CHUNK_SIZE):  # type: ignore[union-attr]
+            yield chunk
+    else:
+        yield from stream  # type: ignore[misc]
+
+
+def iter_text_lines(stream: TextSource, encoding: str = "utf-8-sig", errors: str = "replace") -> Iterator[str]:
+    """逐行读取文本, 结果与对完整文本调用str.splitlines()相同
+
+    Args:
+        stream: 字符串、文本/二进制文件对象, 或字符串/字节块的迭代器
+        encoding: 字节数据的编码
+        errors: 解码错误的处理方式
+
+    """
+    if isinstance(stream, str):
+        yield from stream.splitlines()
+        return
+
+    decoder = None
+    pending = ""
+    for chunk in _iter_chunks(stream):
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)(errors)
+            text = decoder.decode(chunk)
+        else:
+            text = chunk
+        if not text:
+            continue
+
+        lines = (pending + text).splitlines(keepends=True)
+        pending = lines.pop()
+        if pending.splitlines() != [pending] and not pending.endswith("\r"):
+            # 最后一行是完整的行(以"\r"结尾时可能是被分开的"\r\n", 留到下一块处理)
+            lines.append(pending)
+            pending = ""
+        for line in lines:
+            yield line.splitlines()[0]
+
+    if decoder is not None:
+        pending += decoder.decode(b"", final=True)
+    if pending:
+        yield from pending.splitlines()
+
+
+def iter_lrc(stream: TextSource, source: Source | None = None, tags: dict[str, str] | None = None) -> Iterator[tuple[int, LyricsLine]]:
+    """流式解析LRC, 生成(层序号, 歌词行)
+
+    Args:
+        stream: 见iter_text_lines
+        source: LRC来源
+        tags: 用于接收标签的字典
+
+    """
+    tags = {} if tags is None else tags
+    start_time_sets: list[set[int | None]] = [set()]
+    buffers: list[list[tuple[int, int, LyricsLine]]] = [[]]  # 每层按起始时间排序的缓存(堆), 序号保证起始时间相同时按出现顺序
+    pending: list[LyricsLine | None] = [None]  # 每层等待下一行补全结束时间的歌词行
+    order = count()
+
+    def advance(layer: int, line: LyricsLine) -> LyricsLine | None:
+        """将line作为该层的下一行, 返回补全了结束时间的上一行(没有内容时为None)"""
+        previous = pending[layer]
+        pending[layer] = line
+        if previous is None:
+            return None
+        if previous.end is None and line.start > previous.start:  # type: ignore[operator]
+            previous = LyricsLine(previous.start, line.start, previous.words)
+        return previous if previous.words else None
+
+    for line in _iter_lrc_lines(iter_text_lines(stream), source, tags):
+        if line.start is None:
+            continue
+        for layer, start_times in enumerate(start_time_sets):
+            if line.start not in start_times:
+                break
+        else:
+            if not line.words:
+                continue
+            layer = len(start_time_sets)
+            start_time_sets.append(set())
+            buffers.append([])
+            pending.append(None)
+
+        start_time_sets[layer].add(line.start)
+        heapq.heappush(buffers[layer], (line.start, next(order), line))
+        if len(buffers[layer]) > LRC_REORDER_WINDOW and (previous := advance(layer, heapq.heappop(buffers[layer])[2])) is not None:
+            yield layer, previous
+
+    for layer, buffer in enumerate(buffers):
+        while buffer:
+            if (previous := advance(layer, heapq.heappop(buffer)[2])) is not None:
+                yield layer, previous
+        if (line := pending[layer]) is not None and line.words:
+            yield layer, line
+
+
+def iter_krc(stream: TextSource, tags: dict[str, str] | None = None) -> Iterator[tuple[str, LyricsLine]]:
+    """流式解析明文KRC, 生成(语言类型, 歌词行)"""
+    tags = {} if tags is None else tags
+    languages: list[dict] = []
+    index = 0
+    roma_offset = 0  # 没有内容的行不会存在于罗马音中
+
+    for raw_line in iter_text_lines(stream):
+        line = raw_line.strip()
+        if not line.startswith("["):
+            continue
+
+        if tag_match := _KRC_TAG_SPLIT_PATTERN.match(line):
+            tags[tag_match.group(1)] = tag_match.group(2)
+            if tag_match.group(1) == "language" and tag_match.group(2).strip() != "":
+                languages = json.loads(b64decode(tag_match.group(2).strip()))["content"]
+            continue
+
+        if line_match := _KRC_LINE_SPLIT_PATTERN.match(line):
+            orig_line = _parse_krc_line(line_match)
+            yield "orig", orig_line
+            empty = all(not w.text for w in orig_line.words)
+            for language in languages:
+                if language["type"] == 0 and not empty:  # 逐字(罗马音)
+                    roma = language["lyricContent"][index - roma_offset]
+                    yield "roma", LyricsLine(orig_line.start, orig_line.end, [LyricsWord(word.start, word.end, roma[j]) for j, word in enumerate(orig_line.words)])
+                elif language["type"] == 1:  # 逐行(翻译)
+                    yield "ts", LyricsLine(orig_line.start, orig_line.end, [LyricsWord(orig_line.start, orig_line.end, language["lyricContent"][index][0])])
+            if empty:
+                roma_offset += 1
+            index += 1
+
+
+def iter_qrc(stream: TextSource, tags: dict[str, str] | None = None) -> Iterator[LyricsLine]:
+    """流式解析明文QRC(XML), 生成歌词行"""
+    tags = {} if tags is None else tags
+    found = False
+    has_content = False
+
+    for raw_line in iter_text_lines(stream):
+        line = raw_line
+        if not found:
+            if (pos := line.find(_QRC_CONTENT_START)) == -1:
+                continue
+            found = True
+            line = line[pos + len(_QRC_CONTENT_START):]
+
+        end = line.find(_QRC_CONTENT_END)
+        if end != -1:
+            line = line[:end]
+        has_content = has_content or bool(line)
+        if (lyrics_line := _parse_qrc_line(line, tags)) is not None:
+            yield lyrics_line
+        if end != -1:
+            break
+    else:
+        found = False  # 没有找到结束标记
+
+    if not found or not has_content:
+        msg = "不支持的歌词格式"
+        raise LyricsProcessingError(msg)
+
+
+def iter_yrc(stream: TextSource) -> Iterator[LyricsLine]:
+    """流式解析YRC, 生成歌词行"""
+    for raw_line in iter_text_lines(stream):
+        if (line := _parse_yrc_line(raw_line)) is not None:
+            yield line
+
+
+def iter_srt(stream: TextSource) -> Iterator[tuple[str, LyricsLine]]:
+    """流式解析SRT, 按字幕块生成(语言类型, 歌词行)"""
+
+    def parse_block(block: list[str]) -> Iterator[tuple[str, LyricsLine]]:
+        for start_time, end_time, contents in parse_srt("\n".join(block)):
+            yield from _srt_entry_lines(start_time, end_time, contents)
+
+    block: list[str] = []
+    for line in iter_text_lines(stream):
+        if line:
+            block.append(line)
+        elif block:
+            yield from parse_block(block)
+            block = []
+    if block:
+        yield from parse_block(block)
+
+
+def iter_ass(stream: TextSource, tags: dict[str, str] | None = None) -> Iterator[tuple[str, LyricsLine]]:
+    """流式解析ASS的事件段, 生成(样式名, 歌词行)"""
+    tags = {} if tags is None else tags
+    has_title = False
+    section = None
+    events_done = False
+    field_map: dict[str, int] | None = None
+
+    for line in iter_text_lines(stream):
+        if not has_title and (title_match := _TITLE_RE.match(line)):
+            tags["title"] = title_match.group(1)
+            has_title = True
+
+        if section_match := _SECTION_RE.match(line):
+            if section == "events":
+                events_done = True  # 只解析第一个事件段
+            section = section_match.group(1).lower()
+            continue
+        if section != "events" or events_done:
+            continue
+
+        if field_map is None:
+            if line.lower().startswith("format:"):
+                field_map = _parse_format_fields(line)
+                if not all(k in field_map for k in ["start", "end", "style", "text"]):
+                    events_done = True
+            continue
+
+        if not line.lower().startswith("dialogue:"):
+            continue
+        if (dialogue := _parse_dialogue(line, field_map)) is not None:
+            fsline, style = dialogue
+            yield style, LyricsLine(fsline.start, fsline.end, [LyricsWord(word.start, word.end, word.text) for word in fsline.words])
+
@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""搜索结果的批量打分
+
+一次匹配中查询的特征(标题、歌手、专辑、时长)只准备一次, 对所有源的所有候选一起打分:
+- 时长不符的候选先被过滤, 不计算相似度
+- 相同的标题/歌手/专辑(不同源、不同页的结果中很常见)只计算一次
+"""
+
+from collections.abc import Sequence
+
+from LDDC.common.models import SongInfo
+from LDDC.core.algorithm import calculate_artist_score, calculate_title_score, text_difference
+
+DURATION_TOLERANCE = 4000  # 允许的时长差(毫秒)
+
+REJECTED = float("-inf")  # 被过滤的候选的分数
+
+
+class ScoringQuery:
+    """一次匹配的查询特征, 对多批搜索结果打分时共享
+
+    Args:
+        info: 要匹配的歌曲信息
+        file_name: 用于按文件名匹配的文件名(没有标题时)
+
+    """
+
+    def __init__(self, info: SongInfo, file_name: str | None = None) -> None:
+        self.title = info.title or ""
+        self.artist = str(info.artist) if info.artist else None
+        self.album = info.album.lower() if info.album else None
+        self.duration = info.duration
+        self.file_name = file_name
+
+        self._title_scores: dict[str, float] = {}
+        self._artist_scores: dict[str, float] = {}
+        self._album_scores: dict[str, float] = {}
+        self._file_name_scores: dict[tuple[str, str], float] = {}
+
+    def duration_mask(self, candidates: Sequence[SongInfo]) -> list[bool]:
+        """返回每个候选的时长是否符合要求(查询没有时长时全部符合)"""
+        if not self.duration:
+            return [True] * len(candidates)
+        return [abs(self.duration - (candidate.duration or -8)) <= DURATION_TOLERANCE for candidate in candidates]
+
+    def _title_score(self, title: str) -> float:
+        if (score := self._title_scores.get(title)) is None:
+            score = self._title_scores[title] = calculate_title_score(self.title, title)
+        return score
+
+    def _artist_score(self, artist: str) -> float:
+        if (score := self._artist_scores.get(artist)) is None:
+            score = self._artist_scores[artist] = calculate_artist_score(self.artist, artist)  # type: ignore[arg-type]
+        return score
+
+    def _album_score(self, album: str) -> float:
+        if (score := self._album_scores.get(album)) is None:
+            score = self._album_scores[album] = max(text_difference(self.album, album.lower()) * 100, 0)  # type: ignore[arg-type]
+        return score
+
+    def _metadata_score(self, candidate: SongInfo) -> float:
+        """根据 标题、艺术家、专辑 计算得分"""
+        title_score = self._title_score(candidate.title or "")
+        album_score = self._album_score(candidate.album) if self.album and candidate.album else None
+        artist_score = self._artist_score(str(candidate.artist)) if self.artist and candidate.artist else None
+
+        score = title_score
+        if artist_score is not None:
+            score = max(title_score * 0.5 + artist_score * 0.5, (title_score * 0.5 + artist_score * 0.35 + album_score * 0.15) if album_score is not None else 0)
+        elif album_score:
+            score = max(title_score * 0.7 + album_score * 0.3, title_score * 0.8)
+        if title_score < 30:  # noqa: PLR2004
+            score = max(0, score - 35)
+        return score
+
+    def _file_name_score(self, candidate: SongInfo) -> float:
+        """根据 文件名 计算得分"""
+        key = (candidate.title or "", str(candidate.artist))
+        if (score := self._file_name_scores.get(key)) is None:
+            score = self._file_name_scores[key] = max(
+                text_difference(self.file_name, candidate.title or "") * 100,  # type: ignore[arg-type]
+                text_difference(self.file_name, f"{candidate.artist!s} - {candidate.title}") * 100,  # type: ignore[arg-type]
+            )
+        return score
+
+    def score(self, candidates: Sequence[SongInfo], by_file_name: bool = False) -> list[float]:
+        """为候选打分
+
+        Args:
+            candidates: 候选歌曲(可以来自多个源)
+            by_file_name: 是否按文件名打分(搜索关键词为文件名时)
+
+        Returns:
+            list[float]: 与candidates一一对应的分数, 时长不符的候选为REJECTED
+
+        """
+        if by_file_name and self.file_name is None:
+            msg = "没有用于匹配的文件名"
+            raise ValueError(msg)
+        score_func = self._file_name_score if by_file_name else self._metadata_score
+        return [score_func(candidate) if ok else REJECTED for candidate, ok in zip(candidates, self.duration_mask(candidates), strict=True)]
+
+
+def score_candidates(info: SongInfo, candidates: Sequence[SongInfo], file_name: str | None = None) -> list[float]:
+    """为所有候选打分, 指定file_name时按文件名打分, 见ScoringQuery.score"""
+    return ScoringQuery(info, file_name).score(candidates, by_file_name=file_name is not None)
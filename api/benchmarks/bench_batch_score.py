@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""批量打分基准测试
+
+模拟一次匹配中多个源、多页的搜索结果(不同源的结果中常有相同的标题与歌手),
+比较逐个结果打分的旧实现与ScoringQuery批量打分的耗时, 并检查分数一致
+
+用法: python benchmarks/bench_batch_score.py [--sources 3] [--pages 1 3 10] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bench_similarity import CORPUS  # noqa: E402
+
+from LDDC.common.models import Artist, SongInfo, Source  # noqa: E402
+from LDDC.core import algorithm  # noqa: E402
+from LDDC.core.algorithm import calculate_artist_score, calculate_title_score, text_difference  # noqa: E402
+from LDDC.core.scoring import REJECTED, ScoringQuery  # noqa: E402
+
+PAGE_SIZE = 20
+SOURCES = [Source.QM, Source.KG, Source.NE, Source.LRCLIB]
+
+
+def make_candidates(sources: int, pages: int) -> list[SongInfo]:
+    rng = random.Random(sources * 1000 + pages)
+    candidates = []
+    for source in SOURCES[:sources]:
+        for _ in range(pages * PAGE_SIZE):
+            title, artist = rng.choice(CORPUS)
+            candidates.append(
+                SongInfo(
+                    source=source,
+                    title=title,
+                    artist=Artist(artist.split("/")),
+                    album=rng.choice([None, title, f"{artist} Best"]),
+                    duration=rng.choice([None, 240000, rng.randint(180000, 300000)]),
+                    id=str(len(candidates)),
+                ),
+            )
+    return candidates
+
+
+def reference_scores(info: SongInfo, candidates: list[SongInfo]) -> list[float]:
+    """旧实现: 逐个结果计算标题、歌手、专辑分数"""
+    scores = []
+    for result in candidates:
+        if info.duration and abs((info.duration or -4) - (result.duration or -8)) > 4000:
+            scores.append(REJECTED)
+            continue
+        title_score = calculate_title_score(info.title or "", result.title or "")
+        album_score = max(text_difference(info.album.lower(), result.album.lower()) * 100, 0) if info.album and result.album else None
+        artist_score = calculate_artist_score(str(info.artist), str(result.artist)) if info.artist and result.artist else None
+        score = title_score
+        if artist_score is not None:
+            score = max(title_score * 0.5 + artist_score * 0.5, (title_score * 0.5 + artist_score * 0.35 + (album_score or 0) * 0.15) if album_score is not None else 0)
+        elif album_score:
+            score = max(title_score * 0.7 + album_score * 0.3, title_score * 0.8)
+        if title_score < 30:
+            score = max(0, score - 35)
+        scores.append(score)
+    return scores
+
+
+def batch_scores(info: SongInfo, candidates: list[SongInfo]) -> list[float]:
+    return ScoringQuery(info).score(candidates)
+
+
+def clear_caches() -> None:
+    for func in (algorithm.unified_symbol, algorithm.text_difference, algorithm.artist_str2list, algorithm._normalize_tag, algorithm._tags_removal_pattern):
+        func.cache_clear()
+
+
+def bench(func, queries: list[SongInfo], candidates: list[SongInfo], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        for info in queries:
+            func(info, candidates)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=3, choices=range(1, len(SOURCES) + 1))
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 3, 10], help="每个源的页数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    queries = [SongInfo(source=Source.Local, title=title, artist=Artist(artist.split("/")), duration=240000) for title, artist in CORPUS[::5]]
+    print(f"{'candidates':>10} {'before ms':>11} {'after ms':>10} {'speedup':>8}")
+    for pages in args.pages:
+        candidates = make_candidates(args.sources, pages)
+        for info in queries:
+            if reference_scores(info, candidates) != batch_scores(info, candidates):
+                msg = "打分结果不一致"
+                raise AssertionError(msg)
+        before = bench(reference_scores, queries, candidates, args.repeat) * 1e3
+        after = bench(batch_scores, queries, candidates, args.repeat) * 1e3
+        print(f"{len(candidates):>10} {before:>11.1f} {after:>10.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
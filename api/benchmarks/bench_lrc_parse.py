@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""LRC解析基准测试
+
+比较旧实现(列表查找起始时间, 合并时反向扫描并list.index插入)与新实现在多层歌词(原文+翻译+罗马音)上的解析时间
+
+用法: python benchmarks/bench_lrc_parse.py [--lines 1000 5000 10000] [--layers 3] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from LDDC.common.models import LyricsData  # noqa: E402
+from LDDC.core.parser.lrc import _finish_layers, _iter_lrc_lines, lrc2data  # noqa: E402
+
+
+def make_lrc(line_count: int, layers: int) -> str:
+    """生成line_count个时间点、每个时间点有layers行的LRC(与网易云/lrclib合并翻译后的格式相同)"""
+    rng = random.Random(line_count)
+    words = ["夜に駆ける", "沈むように", "溶けてゆくように", "二人だけの空が", "广阔的夜空", "shizumu", "you ni", "tokete yuku"]
+    lines = ["[ar:YOASOBI]", "[ti:夜に駆ける]"]
+    time_ms = 0
+    for _ in range(line_count):
+        timestamp = f"[{time_ms // 60000:02d}:{time_ms // 1000 % 60:02d}.{time_ms % 1000:03d}]"
+        lines.extend(timestamp + " ".join(rng.choice(words) for _ in range(rng.randint(2, 5))) for _ in range(layers))
+        time_ms += rng.randint(1000, 5000)
+    return "\n".join(lines)
+
+
+def reference_lrc2data(lrc: str) -> tuple[dict[str, str], LyricsData]:
+    """旧实现: 列表查找起始时间, 合并时反向扫描并使用list.index定位插入位置"""
+    lrc_lists: list[LyricsData] = [LyricsData([])]
+    start_time_lists: list[list] = [[]]
+    tags: dict[str, str] = {}
+    for line in _iter_lrc_lines(lrc.splitlines(), None, tags):
+        for i, lrc_list in enumerate(lrc_lists):
+            if line.start not in start_time_lists[i]:
+                if line.start is not None:
+                    lrc_list.append(line)
+                    start_time_lists[i].append(line.start)
+                break
+        else:
+            if line[2]:
+                lrc_lists.append(LyricsData([line]))
+                start_time_lists.append([line.start])
+    lrc_lists = _finish_layers(lrc_lists)
+
+    for i, lrc_list in enumerate(lrc_lists):
+        if i == 0:
+            continue
+        for line_list1 in lrc_list:
+            for line_list2 in reversed(lrc_lists[0]):
+                if line_list1[0] == line_list2[0]:
+                    lrc_lists[0].insert(lrc_lists[0].index(line_list2) + 1, line_list1)
+                    break
+    return tags, lrc_lists[0]
+
+
+def bench(func, data: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 5000, 10000], help="时间点数量")
+    parser.add_argument("--layers", type=int, default=3, help="每个时间点的歌词层数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lines':>8} {'before ms':>11} {'after ms':>10} {'speedup':>8}")
+    for line_count in args.lines:
+        lrc = make_lrc(line_count, args.layers)
+        if reference_lrc2data(lrc) != lrc2data(lrc):
+            msg = "解析结果不一致"
+            raise AssertionError(msg)
+        before = bench(reference_lrc2data, lrc, args.repeat) * 1e3
+        after = bench(lrc2data, lrc, args.repeat) * 1e3
+        print(f"{line_count:>8} {before:>11.1f} {after:>10.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""QRC解密基准测试
+
+比较逐位实现(每个块切片剩余数据, 旧实现)与查找表实现的每KB解密时间
+
+用法: python benchmarks/bench_qrc_decrypt.py [--sizes 4 16 64] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from LDDC.core.decryptor import QRC_KEY, qrc_decrypt  # noqa: E402
+from LDDC.core.decryptor.tripledes import DECRYPT, ENCRYPT, crypt, tripledes_crypt_blocks, tripledes_key_schedules, tripledes_key_setup  # noqa: E402
+
+
+def make_encrypted_qrc(size_kb: int) -> bytes:
+    """生成约size_kb KB的加密QRC数据"""
+    rng = random.Random(size_kb)
+    words = ["夜に駆ける", "沈むように", "溶けてゆくように", "二人だけの空が", "広がる夜に", "shizumu", "you ni", "tokete yuku"]
+    lines = []
+    compressed = b""
+    time_ms = 0
+    while len(compressed) < size_kb * 1024:
+        for _ in range(64):
+            text = "".join(f"{rng.choice(words)}({time_ms + i * 150},150)" for i in range(rng.randint(3, 8)))
+            lines.append(f"[{time_ms},{rng.randint(1000, 5000)}]{text}")
+            time_ms += rng.randint(1000, 5000)
+        compressed = zlib.compress("\n".join(lines).encode("utf-8"))
+    compressed += b"\0" * (-len(compressed) % 8)
+    return bytes(tripledes_crypt_blocks(compressed, tripledes_key_setup(QRC_KEY, ENCRYPT)))
+
+
+def reference_qrc_decrypt(encrypted: bytes) -> str:
+    """旧实现: 逐位DES, 并且每个块都切片剩余的数据"""
+    encrypted_text_byte = bytearray(encrypted)
+    schedule = tripledes_key_schedules(QRC_KEY, DECRYPT)
+    data = bytearray()
+    for i in range(0, len(encrypted_text_byte), 8):
+        block = encrypted_text_byte[i:]
+        for stage in schedule:
+            block = crypt(block, stage)
+        data += block
+    return zlib.decompress(data).decode("utf-8")
+
+
+def bench(func, data: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64], help="加密数据大小(KB)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'before us/KB':>14} {'after us/KB':>13} {'speedup':>8}")
+    for size_kb in args.sizes:
+        data = make_encrypted_qrc(size_kb)
+        if reference_qrc_decrypt(data) != qrc_decrypt(data):
+            msg = "解密结果不一致"
+            raise AssertionError(msg)
+        kb = len(data) / 1024
+        before = bench(reference_qrc_decrypt, data, args.repeat) / kb * 1e6
+        after = bench(qrc_decrypt, data, args.repeat) / kb * 1e6
+        print(f"{kb:>6.1f}KB {before:>14.1f} {after:>13.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
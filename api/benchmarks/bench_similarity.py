@@ -0,0 +1,218 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+"""标题/歌手相似度基准测试
+
+使用各平台搜索结果中常见的标题与歌手写法(带版本标签、全角符号、CV、feat.等)构建语料,
+每首歌曲作为一次查询, 对所有候选结果计算标题与歌手分数, 比较:
+- 旧实现(链式replace+正则、未编译的正则、SequenceMatcher、不缓存)与新实现的耗时
+- 两者的分数是否完全相同(从而候选排序相同)
+
+用法: python benchmarks/bench_similarity.py [--repeat 3]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from LDDC.core import algorithm  # noqa: E402
+
+# (标题, 歌手)
+CORPUS = [
+    ("夜に駆ける", "YOASOBI"),
+    ("夜に駆ける (TV size)", "YOASOBI"),
+    ("夜に駆ける (Instrumental)", "YOASOBI"),
+    ("アイドル", "YOASOBI"),
+    ("アイドル (English Ver.)", "YOASOBI"),
+    ("群青", "YOASOBI"),
+    ("Lemon", "米津玄師"),
+    ("Lemon (Live)", "米津玄師"),
+    ("KICK BACK", "米津玄師"),
+    ("KICK BACK (TVアニメ「チェンソーマン」OP)", "米津玄師"),
+    ("打上花火", "DAOKO×米津玄師"),
+    ("紅蓮華", "LiSA"),
+    ("紅蓮華 (TVサイズ)", "LiSA"),
+    ("炎", "LiSA"),
+    ("残響散歌", "Aimer"),
+    ("カタオモイ", "Aimer"),
+    ("Pretender", "Official髭男dism"),
+    ("Subtitle", "Official髭男dism"),
+    ("ミックスナッツ", "Official髭男dism"),
+    ("ドライフラワー", "優里"),
+    ("ベテルギウス", "優里"),
+    ("怪物", "YOASOBI"),
+    ("うっせぇわ", "Ado"),
+    ("新時代 (ウタ from ONE PIECE FILM RED)", "Ado"),
+    ("唱", "Ado"),
+    ("シル・ヴ・プレジデント", "P丸様。"),
+    ("only my railgun", "fripSide"),
+    ("God knows...", "涼宮ハルヒ(CV.平野綾)"),
+    ("ふわふわ時間", "放課後ティータイム"),
+    ("ふわふわ時間 (5人Ver.)", "平沢唯(CV:豊崎愛生)、秋山澪(CV:日笠陽子)"),
+    ("Don't say \"lazy\"", "桜高軽音部"),
+    ("START:DASH!!", "μ's"),
+    ("僕らは今のなかで", "μ's"),
+    ("ユメノトビラ", "μ's"),
+    ("Snow halation", "μ's"),
+    ("恋になりたいAQUARIUM", "Aqours"),
+    ("青空Jumping Heart", "Aqours"),
+    ("Aqours☆HEROES", "Aqours"),
+    ("ぴたっと", "Mia REGINA"),
+    ("ひだまりデイズ", "Poppin'Party"),
+    ("シル・ヴ・プレ", "Roselia"),
+    ("Happy Synthesizer", "EasyPop feat.巡音ルカ&GUMI"),
+    ("千本桜", "黒うさP feat.初音ミク"),
+    ("千本桜 (和楽器バンド ver.)", "和楽器バンド"),
+    ("メルト", "supercell feat.初音ミク"),
+    ("ロキ", "みきとP"),
+    ("晴天を穿つ", "Mrs. GREEN APPLE"),
+    ("青と夏", "Mrs. GREEN APPLE"),
+    ("ケセラセラ", "Mrs. GREEN APPLE"),
+    ("晴天", "Mrs.GREEN APPLE"),
+    ("稻香", "周杰伦"),
+    ("晴天", "周杰伦"),
+    ("七里香", "周杰伦"),
+    ("告白气球", "周杰伦"),
+    ("告白气球 (Live)", "周杰伦"),
+    ("告白气球（伴奏）", "周杰伦"),
+    ("光年之外", "G.E.M.邓紫棋"),
+    ("泡沫", "G.E.M. 邓紫棋"),
+    ("起风了", "买辣椒也用券"),
+    ("起风了 (吴青峰版)", "吴青峰"),
+    ("孤勇者", "陈奕迅"),
+    ("孤勇者 (《英雄联盟：双城之战》动画剧集中文主题曲)", "陈奕迅"),
+    ("十年", "陈奕迅"),
+    ("后来", "刘若英"),
+    ("平凡之路", "朴树"),
+    ("小幸运", "田馥甄"),
+    ("演员", "薛之谦"),
+    ("成都", "赵雷"),
+    ("成都 (Live)", "赵雷"),
+    ("海阔天空", "Beyond"),
+    ("光辉岁月", "BEYOND"),
+    ("Shape of You", "Ed Sheeran"),
+    ("Shape of You (Acoustic)", "Ed Sheeran"),
+    ("Perfect", "Ed Sheeran"),
+    ("Perfect Duet (with Beyoncé)", "Ed Sheeran/Beyoncé"),
+    ("Blinding Lights", "The Weeknd"),
+    ("Save Your Tears (Remix)", "The Weeknd & Ariana Grande"),
+    ("Bad Guy", "Billie Eilish"),
+    ("bad guy (with Justin Bieber)", "Billie Eilish, Justin Bieber"),
+    ("Someone Like You", "Adele"),
+    ("Rolling in the Deep", "Adele"),
+    ("Let It Go", "Idina Menzel"),
+    ("Let It Go - From \"Frozen\"/Soundtrack Version", "Idina Menzel"),
+    ("Let It Go (Single Version)", "Demi Lovato"),
+    ("Hello", "Adele"),
+    ("Stay", "The Kid LAROI/Justin Bieber"),
+    ("Numb", "Linkin Park"),
+    ("In the End", "Linkin Park"),
+    ("See You Again (feat. Charlie Puth)", "Wiz Khalifa/Charlie Puth"),
+    ("Counting Stars", "OneRepublic"),
+    ("Counting Stars (Off Vocal Ver.)", "OneRepublic"),
+    ("Unravel", "TK from 凛として時雨"),
+    ("unravel (acoustic version)", "TK from 凛として時雨"),
+    ("Butter-Fly", "和田光司"),
+    ("Butter-Fly ～ピアノ・バージョン～", "和田光司"),
+    ("残酷な天使のテーゼ", "高橋洋子"),
+    ("残酷な天使のテーゼ (Director's Edit Version)", "高橋洋子"),
+    ("魂のルフラン", "高橋洋子"),
+    ("ヒカルの碁", "スムルース"),
+    ("ハレ晴レユカイ", "平野綾/茅原実里/後藤邑子"),
+    ("ハレ晴レユカイ", "涼宮ハルヒ(CV:平野綾)、長門有希(CV:茅原実里)、朝比奈みくる(CV:後藤邑子)"),
+    ("アイマイモコ", "SOS団(涼宮ハルヒ・長門有希・朝比奈みくる)/CV:平野綾・茅原実里・後藤邑子"),
+]
+
+# 以查询为单位的候选结果: 除语料本身外, 加入各平台常见的改写
+REWRITES = [
+    lambda title, artist: (title.replace("(", "（").replace(")", "）"), artist),
+    lambda title, artist: (title + " (Live)", artist),
+    lambda title, artist: (title + " - 伴奏", artist),
+    lambda title, artist: (title.lower(), artist.upper()),
+    lambda title, artist: (title, artist.replace("/", "、")),
+]
+
+
+symbol_map = algorithm.symbol_map
+
+
+def reference_unified_symbol(text: str) -> str:
+    """旧实现: 逐个替换全角符号, 再用正则替换空白"""
+    text = text.strip()
+    for k, v in symbol_map.items():
+        text = text.replace(k, v)
+    return re.sub(r"\s", " ", text)
+
+
+def reference_text_difference(text1: str, text2: str) -> float:
+    """旧实现: difflib.SequenceMatcher"""
+    if text1 == text2:
+        return 1.0
+    return SequenceMatcher(lambda x: x == " ", text1, text2).ratio()
+
+
+def build_candidates() -> list[tuple[str, str]]:
+    candidates = list(CORPUS)
+    for rewrite in REWRITES:
+        candidates.extend(rewrite(title, artist) for title, artist in CORPUS[::3])
+    return candidates
+
+
+def score_all(queries: list[tuple[str, str]], candidates: list[tuple[str, str]]) -> list[list[tuple[float, float]]]:
+    return [
+        [(algorithm.calculate_title_score(q_title, title), algorithm.calculate_artist_score(q_artist, artist)) for title, artist in candidates]
+        for q_title, q_artist in queries
+    ]
+
+
+def clear_caches() -> None:
+    for func in (algorithm.unified_symbol, algorithm.text_difference, algorithm.artist_str2list, algorithm._normalize_tag, algorithm._tags_removal_pattern):
+        func.cache_clear()
+
+
+class Reference:
+    """临时替换为旧实现"""
+
+    def __enter__(self) -> None:
+        self.saved = (algorithm.unified_symbol, algorithm.text_difference, algorithm.artist_str2list)
+        algorithm.unified_symbol = reference_unified_symbol
+        algorithm.text_difference = reference_text_difference
+        algorithm.artist_str2list = algorithm.artist_str2list.__wrapped__
+
+    def __exit__(self, *args: object) -> None:
+        algorithm.unified_symbol, algorithm.text_difference, algorithm.artist_str2list = self.saved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    queries = list(CORPUS)
+    candidates = build_candidates()
+
+    before_time = after_time = float("inf")
+    for _ in range(args.repeat):
+        with Reference():
+            start = time.perf_counter()
+            before = score_all(queries, candidates)
+            before_time = min(before_time, time.perf_counter() - start)
+        clear_caches()
+        start = time.perf_counter()
+        after = score_all(queries, candidates)
+        after_time = min(after_time, time.perf_counter() - start)
+
+    if before != after:
+        msg = "打分结果不一致"
+        raise AssertionError(msg)
+
+    print(f"{len(queries)} 个查询 x {len(candidates)} 个候选, 分数完全一致")
+    print(f"before: {before_time * 1e3:.1f} ms  after: {after_time * 1e3:.1f} ms  speedup: {before_time / after_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import zlib
 import re
 from typing import List
 
+from LDDC.core.decryptor.xor import xor_bytes
+
 KEY = b'yeelion'
 
 def build_params(music_id: int, is_get_lyricx: bool = True) -> str:
@@ -11,14 +13,7 @@ def build_params(music_id: int, is_get_lyricx: bool = True) -> str:
     if is_get_lyricx:
         params_str += "&lrcx=1"
     
-    buf_str = params_str.encode('utf-8')
-    key_len = len(KEY)
-    
-    output = bytearray(len(buf_str))
-    for i in range(len(buf_str)):
-        output[i] = buf_str[i] ^ KEY[i % key_len]
-
-    encrypted_buffer = bytes(output)
+    encrypted_buffer = xor_bytes(params_str.encode('utf-8'), KEY)
     final_params = base64.b64encode(encrypted_buffer).decode('utf-8')
     return final_params
 
@@ -37,14 +32,7 @@ def decode_lyrics(buf: bytes, is_get_lyricx: bool = True) -> str:
         return inflated_data.decode('gb18030')
     else:
         base64_str = inflated_data.decode('utf-8')
-        buf_str = base64.b64decode(base64_str)
-        key_len = len(KEY)
-        output = bytearray(len(buf_str))
-
-        for i in range(len(buf_str)):
-            output[i] = buf_str[i] ^ KEY[i % key_len]
-        
-        decrypted_buffer = bytes(output)
+        decrypted_buffer = xor_bytes(base64.b64decode(base64_str), KEY)
         final_lrc = decrypted_buffer.decode('gb18030')
         return final_lrc
 
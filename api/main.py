@@ -4,6 +4,7 @@ import logging
 import os
 import re
 import sys
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import enum
 from dataclasses import replace, asdict
@@ -42,9 +43,10 @@ if project_root not in sys.path:
 from LDDC.common.models._lyrics import Lyrics
 from LDDC.common.models._info import SongInfo, Artist
 from LDDC.common.models._enums import Source, LyricsFormat, SearchType
-from LDDC.core.api.lyrics import search, get_lyrics
+from LDDC.core.api.lyrics import available_offline_sources, search, get_lyrics
 from LDDC.common.version import __version__
-from LDDC.core.auto_fetch_sync import auto_fetch
+from LDDC.core.auto_fetch_sync import FetchSession, auto_fetch_any
+from LDDC.core import match_cache
 from LDDC.common.exceptions import LDDCError, LyricsNotFoundError, NotEnoughInfoError
 
 # 源名称到中文的映射
@@ -61,53 +63,85 @@ app = Flask(__name__)
 # 配置日志
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def search_lyrics_api(keyword: str, sources_param: Optional[str] = None):
+# 源代码名称到枚举值的映射
+SOURCE_PARAM_MAP = {
+    "qm": Source.QM,
+    "ne": Source.NE,
+    "kg": Source.KG,
+    "kw": Source.KW,
+}
+
+# 定义了交错排序的优先级
+ALL_SEARCH_SOURCES = [Source.QM, Source.NE, Source.KG, Source.KW]
+
+# 批量匹配的限制
+BATCH_MAX_ITEMS = 200  # 单次请求的最大条目数
+BATCH_MAX_WORKERS = 16  # 整个批次共享的最大上游请求并发数
+BATCH_MAX_ITEMS_IN_FLIGHT = 8  # 同时进行匹配的条目数
+
+
+def parse_sources(sources_param: Optional[str] = None) -> list[Source]:
     """
-    API 搜索功能的同步版本，支持选择词源
-    
-    :param keyword: 搜索关键词
+    解析词源参数
+
     :param sources_param: 词源选择，格式为逗号分隔的字符串，如"qm,ne,kg"，为空则选择所有词源
+    :return: 按交错排序优先级排列的词源列表
     """
-    # 默认所有词源
-    all_sources = [Source.QM, Source.NE, Source.KG, Source.KW]  # 定义了交错排序的优先级
-    
-    # 解析词源参数
-    selected_sources = all_sources
-    if sources_param:
-        # 源代码名称到枚举值的映射
-        source_map = {
-            "qm": Source.QM,
-            "ne": Source.NE,
-            "kg": Source.KG,
-            "kw": Source.KW,
-        }
-        
-        # 解析用户输入的词源列表
-        sources_list = [s.strip().lower() for s in sources_param.split(",")]
-        selected_sources = [source_map.get(s) for s in sources_list if s in source_map]
-        
-        # 如果选择无效，则默认使用所有词源
-        if not selected_sources:
-            selected_sources = all_sources
-    
-    # 只为选定的词源创建结果容器
-    results_by_source = {source: [] for source in all_sources if source in selected_sources}
+    if not sources_param:
+        return list(ALL_SEARCH_SOURCES)
+
+    # 解析用户输入的词源列表
+    sources_list = [s.strip().lower() for s in sources_param.split(",")]
+    selected_sources = [SOURCE_PARAM_MAP[s] for s in sources_list if s in SOURCE_PARAM_MAP]
+
+    # 如果选择无效，则默认使用所有词源
+    if not selected_sources:
+        return list(ALL_SEARCH_SOURCES)
+    return [source for source in ALL_SEARCH_SOURCES if source in selected_sources]
 
-    with ThreadPoolExecutor(max_workers=len(results_by_source)) as executor:
+
+def iter_search_results(keyword: str, sources: list[Source]):
+    """
+    并行搜索多个词源，并按完成的先后顺序逐个产出结果
+
+    :param keyword: 搜索关键词
+    :param sources: 要搜索的词源列表
+    :return: 生成器，产出 (词源, 结果列表, 错误) ，成功时错误为 None
+    """
+    executor = ThreadPoolExecutor(max_workers=len(sources))
+    try:
         future_to_source = {
             executor.submit(search, source, keyword, SearchType.SONG): source
-            for source in results_by_source.keys()
+            for source in sources
         }
 
         for future in as_completed(future_to_source):
             source = future_to_source[future]
             try:
                 result = future.result()
-                if result:
-                    results_by_source[source] = list(result)
             except Exception as e:
                 source_name = SOURCE_MAP.get(source, str(source))
                 logging.error(f"搜索源 {source_name} 时出错: {e}")
+                yield source, [], e
+                continue
+            yield source, list(result) if result else [], None
+    finally:
+        # 客户端提前断开时不再等待剩余的搜索任务
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def search_lyrics_api(keyword: str, sources_param: Optional[str] = None):
+    """
+    API 搜索功能的同步版本，支持选择词源
+    
+    :param keyword: 搜索关键词
+    :param sources_param: 词源选择，格式为逗号分隔的字符串，如"qm,ne,kg"，为空则选择所有词源
+    """
+    # 只为选定的词源创建结果容器
+    results_by_source = {source: [] for source in parse_sources(sources_param)}
+
+    for source, results, _error in iter_search_results(keyword, list(results_by_source.keys())):
+        results_by_source[source] = results
 
     # 将结果交错合并以获得更平衡的列表
     final_results = []
@@ -117,7 +151,7 @@ def search_lyrics_api(keyword: str, sources_param: Optional[str] = None):
 
     # 保持交错排序逻辑，但只使用选定的词源
     for i in range(max_len):
-        for source in all_sources:  # 使用所有源的顺序，但跳过未选中的
+        for source in ALL_SEARCH_SOURCES:  # 使用所有源的顺序，但跳过未选中的
             if source in results_by_source and i < len(results_by_source[source]):
                 final_results.append(results_by_source[source][i])
 
@@ -143,6 +177,87 @@ def stringify(value):
 def read_root():
     return jsonify({"message": f"欢迎使用 LDDC Lyrics API (Flask Version {__version__})"})
 
+def song_info_to_item(song_info: SongInfo) -> dict:
+    """将 SongInfo 转换为搜索接口返回的条目"""
+    serializable_info_dict = make_serializable(asdict(song_info))
+    song_info_json_str = json.dumps(serializable_info_dict)
+
+    return {
+        "title": stringify(song_info.title),
+        "artist": stringify(song_info.artist),
+        "album": stringify(song_info.album),
+        "duration": song_info.format_duration,
+        "song_info_json": song_info_json_str,
+        "source": SOURCE_MAP.get(song_info.source, str(song_info.source)),
+    }
+
+
+def get_stream_mode() -> Optional[str]:
+    """
+    获取流式返回的格式
+
+    优先使用 stream 参数（'ndjson' 或 'sse'），其次根据 Accept 请求头判断。
+    返回 None 表示不使用流式返回。
+    """
+    stream = request.args.get('stream', '').lower()
+    if stream in ('ndjson', 'sse'):
+        return stream
+    accept = request.headers.get('Accept', '')
+    if 'text/event-stream' in accept:
+        return 'sse'
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    return None
+
+
+def stream_frames(frames, mode: str) -> Response:
+    """将帧生成器包装为 NDJSON 或 SSE 流式响应"""
+    def generate():
+        for event, data in frames:
+            payload = json.dumps(data, ensure_ascii=False)
+            if mode == 'sse':
+                yield f"event: {event}\ndata: {payload}\n\n"
+            else:
+                yield json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+
+    mimetype = 'text/event-stream' if mode == 'sse' else 'application/x-ndjson'
+    return Response(
+        generate(),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def search_frames(keyword: str, sources: list[Source]):
+    """逐个词源产出搜索结果帧，最后产出汇总帧"""
+    start_time = time.perf_counter()
+    counts = {}
+    errors = {}
+    total = 0
+    for source, results, error in iter_search_results(keyword, sources):
+        source_name = SOURCE_MAP.get(source, str(source))
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
+        if error is not None:
+            errors[source_name] = str(error)
+            yield "error", {"source": source_name, "error": str(error), "elapsed_ms": elapsed_ms}
+            continue
+        counts[source_name] = len(results)
+        total += len(results)
+        yield "results", {
+            "source": source_name,
+            "results": [song_info_to_item(song_info) for song_info in results],
+            "elapsed_ms": elapsed_ms,
+        }
+
+    yield "summary", {
+        "keyword": keyword,
+        "total": total,
+        "sources": counts,
+        "errors": errors,
+        "elapsed_ms": int((time.perf_counter() - start_time) * 1000),
+    }
+
+
 @app.route("/api/search", methods=['GET'])
 def search_lyrics_endpoint():
     keyword = request.args.get('keyword')
@@ -151,23 +266,15 @@ def search_lyrics_endpoint():
     
     # 获取可选的词源参数
     sources = request.args.get('sources')
-        
+
+    # 流式模式：每个词源完成后立即返回其结果
+    stream_mode = get_stream_mode()
+    if stream_mode:
+        return stream_frames(search_frames(keyword, parse_sources(sources)), stream_mode)
+
     results_list = search_lyrics_api(keyword, sources)
     
-    response_data = []
-    for song_info in results_list:
-        serializable_info_dict = make_serializable(asdict(song_info))
-        song_info_json_str = json.dumps(serializable_info_dict)
-
-        ordered_item = {
-            "title": stringify(song_info.title),
-            "artist": stringify(song_info.artist),
-            "album": stringify(song_info.album),
-            "duration": song_info.format_duration,
-            "song_info_json": song_info_json_str,
-            "source": SOURCE_MAP.get(song_info.source, str(song_info.source)),
-        }
-        response_data.append(ordered_item)
+    response_data = [song_info_to_item(song_info) for song_info in results_list]
 
     # Manually dump JSON to preserve key order and handle encoding
     json_string = json.dumps(response_data, ensure_ascii=False)
@@ -197,6 +304,17 @@ def match_lyrics_endpoint():
     duration = int(duration_str) if duration_str and duration_str.isdigit() else None
     include_romaji = request.args.get('include_romaji', '').lower() in ('true', '1', 'yes')
 
+    song_info_to_try = build_match_song_infos(title, artist, keyword, album, duration)
+    if not song_info_to_try:
+        return Response("[00:00.00]必须提供 'title' 和 'artist' 或 'keyword' 参数", mimetype="text/plain; charset=utf-8", status=400)
+
+    status, lrc = match_lrc(song_info_to_try, include_romaji)
+    return Response(lrc, mimetype="text/plain; charset=utf-8", status=status)
+
+
+def build_match_song_infos(title: Optional[str], artist: Optional[str], keyword: Optional[str],
+                           album: Optional[str], duration: Optional[int]) -> list[SongInfo]:
+    """根据请求参数构建需要尝试匹配的歌曲信息，参数不足时返回空列表"""
     song_info_to_try: list[SongInfo] = []
 
     # 优先处理 title 和 artist
@@ -216,35 +334,137 @@ def match_lyrics_endpoint():
         song_info_to_try.append(
             SongInfo(source=Source.QM, path=Path(keyword), duration=duration)
         )
-    else:
-        return Response("[00:00.00]必须提供 'title' 和 'artist' 或 'keyword' 参数", mimetype="text/plain; charset=utf-8", status=400)
+    return song_info_to_try
+
+
+def match_lrc(song_info_to_try: list[SongInfo], include_romaji: bool,
+              session: Optional[FetchSession] = None) -> tuple[int, str]:
+    """匹配歌词并渲染为 LRC，返回 (HTTP 状态码, LRC 文本)
 
-    for info in song_info_to_try:
+    匹配结果（包括确定未找到的结果）会被缓存，相同歌曲的重复请求只需读取一次缓存。
+    """
+    primary_info = song_info_to_try[0]
+    decision = match_cache.get_match(primary_info)
+    if decision is not None:
+        if not decision.found:
+            return 404, "[00:00.00]未找到匹配的歌词"
+        return 200, decision.get_lrc(include_romaji)
+
+    try:
+        # 所有候选并行匹配并共享搜索，最先得到的有效歌词胜出
+        lyrics: Optional[Lyrics] = auto_fetch_any(
+            song_info_to_try,
+            sources=(*available_offline_sources(), Source.QM, Source.KG, Source.NE),  # 离线源(已配置时)优先
+            accept=lambda lyrics: bool(lyrics.get("orig")),
+            session=session,
+        )
+        # 渲染与写入缓存失败时与匹配失败一样处理
+        lrc = render_match_lrc(lyrics, include_romaji=False)
+        lrc_romaji = render_match_lrc(lyrics, include_romaji=True) if lyrics.get("roma") else None
+        match_cache.set_match(primary_info, lyrics.info.songinfo, lrc, lrc_romaji)
+    except (LyricsNotFoundError, NotEnoughInfoError):
+        # 所有尝试都确定没有找到歌词
+        match_cache.set_no_match(primary_info)
+        return 404, "[00:00.00]未找到匹配的歌词"
+    except Exception:
+        logging.error(f"为 '{primary_info.artist_title()}' 匹配时发生未知错误", exc_info=True)
+        return 404, "[00:00.00]未找到匹配的歌词"
+
+    return 200, lrc_romaji if include_romaji and lrc_romaji is not None else lrc
+
+
+def render_match_lrc(lyrics: Lyrics, include_romaji: bool) -> str:
+    """将匹配到的歌词渲染为 LRC 文本"""
+    langs = ["orig"]
+    if include_romaji and lyrics.get("roma"):
+        langs.append("roma")
+    if lyrics.get("ts"):
+        langs.append("ts")
+
+    lrc_text = lyrics.to(lyrics_format=LyricsFormat.VERBATIMLRC, langs=langs)
+    return re.sub(r"\[tool:.*?\]\n\n", "", lrc_text, count=1)
+
+
+def batch_match_frames(items: list[dict], include_romaji: bool):
+    """并发匹配批量条目，每个条目完成后立即产出结果帧，最后产出汇总帧
+
+    相同的条目只匹配一次，所有条目共享一个 FetchSession，
+    因此重复的搜索与歌词获取只会请求一次，上游并发数不超过 BATCH_MAX_WORKERS。
+    """
+    start_time = time.perf_counter()
+    # 相同的条目只匹配一次，key -> 条目索引列表
+    groups: dict[tuple, list[int]] = {}
+    song_infos: dict[tuple, list[SongInfo]] = {}
+    counts = {"matched": 0, "not_found": 0, "invalid": 0, "error": 0}
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            item = {}
+        duration = item.get('duration')
+        duration = int(duration) if isinstance(duration, (int, float)) or (isinstance(duration, str) and duration.isdigit()) else None
+        title, artist, keyword, album = (str(item[k]) if item.get(k) else None for k in ('title', 'artist', 'keyword', 'album'))
+        key = (title, artist, keyword, album, duration)
+        if key not in groups:
+            infos = build_match_song_infos(title, artist, keyword, album, duration)
+            if not infos:
+                counts["invalid"] += 1
+                yield "result", {"index": index, "status": 400, "lrc": "[00:00.00]必须提供 'title' 和 'artist' 或 'keyword' 参数"}
+                continue
+            groups[key] = []
+            song_infos[key] = infos
+        groups[key].append(index)
+
+    with FetchSession(max_workers=BATCH_MAX_WORKERS) as session, \
+            ThreadPoolExecutor(max_workers=BATCH_MAX_ITEMS_IN_FLIGHT) as executor:
+        futures = {executor.submit(match_lrc, infos, include_romaji, session): key for key, infos in song_infos.items()}
         try:
-            # 调用核心匹配函数
-            lyrics: Optional[Lyrics] = auto_fetch(info)
-            
-            if lyrics and lyrics.get("orig"):
-                langs = ["orig"]
-                if include_romaji and lyrics.get("roma"):
-                    langs.append("roma")
-                if lyrics.get("ts"):
-                    langs.append("ts")
-                
-                lrc_text = lyrics.to(lyrics_format=LyricsFormat.VERBATIMLRC, langs=langs)
-                final_lrc = re.sub(r"\[tool:.*?\]\n\n", "", lrc_text, count=1)
-                return Response(final_lrc, mimetype="text/plain; charset=utf-8")
-
-        except (LyricsNotFoundError, NotEnoughInfoError):
-            # 这是预期的失败，继续尝试下一个候选
-            continue
-        except Exception as e:
-            # 记录意外错误，但仍然继续尝试
-            logging.error(f"为 '{info.artist_title()}' 匹配时发生未知错误", exc_info=True)
-            continue
-    
-    # 所有尝试都失败了
-    return Response("[00:00.00]未找到匹配的歌词", mimetype="text/plain; charset=utf-8", status=404)
+            for future in as_completed(futures):
+                try:
+                    status, lrc = future.result()
+                except Exception:
+                    # 单个条目出错时不中断整个流
+                    logging.error(f"批量匹配条目 {futures[future]} 时发生未知错误", exc_info=True)
+                    for index in groups[futures[future]]:
+                        counts["error"] += 1
+                        yield "result", {"index": index, "status": 500, "lrc": "[00:00.00]匹配时发生错误"}
+                    continue
+                for index in groups[futures[future]]:
+                    counts["matched" if status == 200 else "not_found"] += 1
+                    yield "result", {"index": index, "status": status, "lrc": lrc}
+        finally:
+            # 客户端断开时取消尚未开始的条目
+            for future in futures:
+                future.cancel()
+
+    yield "summary", {
+        "total": len(items),
+        "unique": len(song_infos),
+        **counts,
+        "elapsed_ms": int((time.perf_counter() - start_time) * 1000),
+    }
+
+
+@app.route("/api/match_lyrics/batch", methods=['POST'])
+def match_lyrics_batch_endpoint():
+    """
+    批量匹配歌词（适用于整个歌单或专辑），以流式方式逐条返回结果。
+
+    JSON Body:
+        items: 条目列表，每个条目可包含 title、artist、keyword、album、duration，含义与 /api/match_lyrics 相同
+        include_romaji (optional): 是否包含罗马音，默认为 false
+
+    每个条目完成后立即返回 {"event": "result", "index": 条目索引, "status": 状态码, "lrc": 歌词}，
+    全部完成后返回 {"event": "summary", ...}。默认使用 NDJSON，可通过 stream=sse 使用 SSE。
+    """
+    body = request.get_json(silent=True)
+    items = body.get('items') if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"too many items (max {BATCH_MAX_ITEMS})"}), 400
+    include_romaji = isinstance(body, dict) and str(body.get('include_romaji', '')).lower() in ('true', '1', 'yes')
+
+    return stream_frames(batch_match_frames(items, include_romaji), get_stream_mode() or 'ndjson')
 
 
 @app.route("/api/get_lyrics_by_id", methods=['GET'])
@@ -0,0 +1,45 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+import time
+from concurrent.futures import Future
+
+from LDDC.common.models import Artist, Lyrics, LyricsData, LyricsLine, LyricsWord, SongInfo, Source
+from LDDC.core.auto_fetch_sync import _fetch_candidates
+
+
+class FakeSession:
+    def __init__(self, lyrics: dict[SongInfo, Lyrics]) -> None:
+        self.lyrics = lyrics
+
+    def get_lyrics(self, song_info: SongInfo) -> Future:
+        future = Future()
+        future.set_result(self.lyrics[song_info])
+        return future
+
+
+def make_lyrics(info: SongInfo, *langs: str) -> Lyrics:
+    lyrics = Lyrics(info)
+    for lang in langs:
+        lyrics[lang] = LyricsData([LyricsLine(0, 1000, [LyricsWord(0, 1000, lang)])])
+    return lyrics
+
+
+def song(song_id: str) -> SongInfo:
+    return SongInfo(source=Source.LRCLIB_DUMP, title="夜に駆ける", artist=Artist("YOASOBI"), id=song_id)
+
+
+def test_fetch_candidates_requires_orig() -> None:
+    ts_only, full = song("1"), song("2")
+    session = FakeSession({ts_only: make_lyrics(ts_only, "ts"), full: make_lyrics(full, "orig", "ts")})
+    deadline = time.monotonic() + 1
+
+    songs_score: dict[SongInfo, float] = {}
+    lyrics_results: dict[SongInfo, Lyrics] = {}
+    _fetch_candidates(session, [(90, ts_only)], songs_score, lyrics_results, deadline)  # type: ignore[arg-type]
+    # 只有翻译的歌词不算得到歌词, 调用方会继续进行网络搜索
+    assert lyrics_results == {}
+    assert songs_score == {}
+
+    _fetch_candidates(session, [(90, ts_only), (80, full)], songs_score, lyrics_results, deadline)  # type: ignore[arg-type]
+    assert list(lyrics_results) == [full]
+    assert songs_score[full] == 80
@@ -0,0 +1,30 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+import pickle
+
+from LDDC.common.models import Lyrics, LyricsData, LyricsLine, LyricsWord, SongInfo, Source
+from LDDC.common.models._lyrics import CompactLyricsData
+from LDDC.core.parser.lrc import lrc2data
+
+
+def test_timestamp_beyond_int32() -> None:
+    _, data = lrc2data("[00:01.00]a\n[99999:00.00]b")
+    lyrics = Lyrics(SongInfo(Source.QM))
+    lyrics["orig"] = data
+    compact = lyrics.compact()["orig"]
+    assert compact == data
+    assert compact[1].start == 99999 * 60 * 1000
+
+
+def test_huge_timestamp_is_clamped() -> None:
+    compact = CompactLyricsData([LyricsLine(2**70, None, [LyricsWord(0, 2**70, "x")])])
+    assert compact[0] == LyricsLine(2**63 - 1, None, [LyricsWord(0, 2**63 - 1, "x")])
+
+
+def test_none_times_and_shift() -> None:
+    data = LyricsData([LyricsLine(1000, None, [LyricsWord(None, 2000, "a")]), LyricsLine(None, None, [])])
+    compact = CompactLyricsData(data)
+    assert compact == data
+    assert compact.shifted(-1500).to_list() == [LyricsLine(0, None, [LyricsWord(None, 500, "a")]), LyricsLine(None, None, [])]
+    assert pickle.loads(pickle.dumps(compact)) == data
+
@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+from concurrent.futures import Future
+from threading import Event, Thread
+
+import pytest
+
+from LDDC.common.models import CompactLyricsData, LyricsData, LyricsLine, LyricsWord
+from LDDC.core import decode_pool as decode_pool_module
+from LDDC.core.decode_pool import DECODE_POOL_MIN_BYTES, DecodePool
+
+
+class FakeExecutor:
+    """在当前线程中同步执行并记录提交的任务"""
+
+    def __init__(self) -> None:
+        self.submitted: list[str] = []
+
+    def submit(self, func, payload):  # noqa: ANN001, ANN201
+        self.submitted.append(payload)
+        future = Future()
+        future.set_result(func(payload))
+        return future
+
+    def shutdown(self, **_: object) -> None:
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch) -> tuple[DecodePool, FakeExecutor]:
+    pool = DecodePool(4)
+    executor = FakeExecutor()
+    monkeypatch.setattr(pool, "_get_executor", lambda: executor)
+    return pool, executor
+
+
+def test_offload_threshold(pool: tuple[DecodePool, FakeExecutor]) -> None:
+    pool, executor = pool
+    # 没有其他任务时小数据在当前线程中解析, 大数据使用进程池
+    assert pool.run(str.upper, "small", 100) == "SMALL"
+    assert pool.run(str.upper, "large", DECODE_POOL_MIN_BYTES) == "LARGE"
+    assert executor.submitted == ["large"]
+
+    # 已有一个解析任务在当前线程中执行时, 即使只有一个也使用进程池
+    started, release = Event(), Event()
+
+    def blocking(payload: str) -> str:
+        started.set()
+        release.wait(5)
+        return payload
+
+    thread = Thread(target=pool.run, args=(blocking, "inline", 100))
+    thread.start()
+    assert started.wait(5)
+    try:
+        assert pool.run(str.upper, "concurrent", 100) == "CONCURRENT"
+    finally:
+        release.set()
+        thread.join()
+    assert executor.submitted == ["large", "concurrent"]
+    assert pool._inline == 0
+
+    # 进程池中的任务不占用当前进程的GIL, 不计入
+    assert pool.run(str.upper, "after", 100) == "AFTER"
+    assert executor.submitted == ["large", "concurrent"]
+
+
+def test_disabled_runs_inline(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = DecodePool(1)
+    monkeypatch.setattr(pool, "_get_executor", lambda: pytest.fail("进程池已禁用"))
+    assert pool.run(str.upper, "large", DECODE_POOL_MIN_BYTES) == "LARGE"
+
+
+def test_decode_returns_compact(monkeypatch: pytest.MonkeyPatch) -> None:
+    data = LyricsData([LyricsLine(0, 1000, [LyricsWord(0, 500, "a"), LyricsWord(500, 1000, "b")])])
+    monkeypatch.setattr(decode_pool_module, "qrc_decrypt", lambda encrypted, _: encrypted)
+    monkeypatch.setattr(decode_pool_module, "qrc_str_parse", lambda _: ({"ti": "t"}, data))
+    tags, lyrics = decode_pool_module.decode_qrc("00")
+    assert tags == {"ti": "t"}
+    assert isinstance(lyrics, CompactLyricsData)
+    assert lyrics == data
@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+import os
+from pathlib import Path
+
+import pytest
+
+from LDDC.common.models import SearchType
+from LDDC.core.algorithm import normalize_text
+from LDDC.core.api.lyrics.library import LibraryAPI, _parse_file_name
+from LDDC.core.match_index import text_grams
+
+
+def write_lrc(path: Path, text: str, tags: str = "") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{tags}[00:01.00]{text}\n[00:03.00]end\n", encoding="utf-8")
+    return path
+
+
+def bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def library(tmp_path: Path):  # noqa: ANN201
+    write_lrc(tmp_path / "YOASOBI - 夜に駆ける.lrc", "file name")
+    write_lrc(tmp_path / "sub" / "unknown.lrc", "tags", "[ti:アイドル]\n[ar:YOASOBI]\n[al:アイドル]\n")
+    write_lrc(tmp_path / "sub" / "Artist - Song (003abc123X).lrc", "with id")
+    write_lrc(tmp_path / "Only Title.lrc", "only title")
+    (tmp_path / "Artist - Song_qmRoma.qrc").write_bytes(b"not a lyrics file")
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+    api = LibraryAPI(tmp_path, scan_interval=0)
+    yield api
+    api.close()
+
+
+def test_parse_file_name() -> None:
+    assert _parse_file_name(Path("YOASOBI - 夜に駆ける.lrc")) == ("夜に駆ける", "YOASOBI")
+    assert _parse_file_name(Path("Artist - Song (003abc123X).lrc")) == ("Song", "Artist")
+    assert _parse_file_name(Path("Artist - Song_qm.qrc")) == ("Song", "Artist")
+    # 不含数字或太短的括号内容不是歌曲id
+    assert _parse_file_name(Path("Artist - Song (Live).lrc")) == ("Song (Live)", "Artist")
+    assert _parse_file_name(Path("Song (abc12).lrc")) == ("Song (abc12)", None)
+    assert _parse_file_name(Path(" - Song.lrc")) == ("- Song", None)
+
+
+def test_scan(library: LibraryAPI, tmp_path: Path) -> None:
+    assert len(library) == 4
+    assert str(tmp_path / "Artist - Song_qmRoma.qrc") not in library._files
+
+    # 标签优先于文件名
+    info = library.lookup("アイドル", "yoasobi")
+    assert info is not None
+    assert (info.title, info.artist.str(), info.album, info.id) == ("アイドル", "YOASOBI", "アイドル", "sub/unknown.lrc")
+    assert library.lookup("unknown", "") is None
+
+    info = library.lookup("Song", "Artist")
+    assert info is not None
+    assert info.id == "sub/Artist - Song (003abc123X).lrc"
+
+
+def test_lookup_title_only_fallback(library: LibraryAPI) -> None:
+    info = library.lookup("ONLY TITLE", "Some Artist")
+    assert info is not None
+    assert info.artist is None
+    assert library.lookup("夜に駆ける", "Other Artist") is None
+
+
+def test_incremental_scan(library: LibraryAPI, tmp_path: Path) -> None:
+    old = dict(library._files)
+
+    added = write_lrc(tmp_path / "new" / "Band - New Song.lrc", "added")
+    modified = write_lrc(tmp_path / "YOASOBI - 夜に駆ける.lrc", "modified", "[ti:Racing into the Night]\n")
+    bump_mtime(modified)
+    (tmp_path / "Only Title.lrc").unlink()
+    library.scan()
+
+    assert len(library) == 4
+    assert library.lookup("New Song", "band") is not None
+    assert library.lookup("Only Title", "") is None
+    assert library.lookup("夜に駆ける", "YOASOBI") is None
+    info = library.lookup("Racing into the Night", "YOASOBI")
+    assert info is not None
+    assert library.get_lyrics(info)["orig"][0].words[0].text == "modified"
+    # 没有变化的文件不会重新读取
+    unchanged = str(tmp_path / "sub" / "unknown.lrc")
+    assert library._files[unchanged] is old[unchanged]
+    assert str(added) in library._files
+    assert all(paths for paths in library._keys.values())
+    assert_grams_consistent(library)
+
+
+def test_search(library: LibraryAPI, tmp_path: Path) -> None:
+    write_lrc(tmp_path / "Other - Song.lrc", "other")
+    write_lrc(tmp_path / "Artist - Song Remix.lrc", "remix")
+    library.scan()
+
+    results = library.search("Artist - Song", SearchType.SONG)
+    assert [info.id for info in results] == ["sub/Artist - Song (003abc123X).lrc", "Other - Song.lrc"]
+    # 标题包含关键词的排在标题完全相同的之后
+    results = library.search("Song", SearchType.SONG)
+    assert [info.id for info in results][-1] == "Artist - Song Remix.lrc"
+    assert len(results) == 3
+    assert list(library.search("", SearchType.SONG)) == []
+    with pytest.raises(NotImplementedError):
+        library.search("Song", SearchType.ALBUM)
+
+
+def assert_grams_consistent(library: LibraryAPI) -> None:
+    expected: dict[str, set[tuple[str, str]]] = {}
+    for key in library._keys:
+        for gram in text_grams(key[1]):
+            expected.setdefault(gram, set()).add(key)
+    assert library._grams == expected
+
+
+def test_search_matches_full_scan(library: LibraryAPI, tmp_path: Path) -> None:
+    for name in ("A - 愛.lrc", "B - 愛してる.lrc", "C - 駆ける.lrc", "D - Night.lrc"):
+        write_lrc(tmp_path / name, name)
+    library.scan()
+    assert_grams_consistent(library)
+
+    def full_scan(keyword: str) -> set[str]:
+        norm_keyword = normalize_text(keyword)
+        parts = {normalize_text(part) for part in keyword.split(" - ")}
+        return {
+            path
+            for (_, norm_title), paths in library._keys.items()
+            if norm_title in parts or (len(norm_title) > 1 and norm_title in norm_keyword) or norm_keyword in norm_title
+            for path in paths
+        }
+
+    for keyword in ("愛", "X - 愛", "愛してる", "夜に駆ける", "駆", "night", "YOASOBI - アイドル", "ng", "nothing"):
+        assert {str(tmp_path / info.id) for info in library.search(keyword, SearchType.SONG)} == full_scan(keyword), keyword
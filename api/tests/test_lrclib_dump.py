@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from LDDC.common.models import Artist, SearchType, SongInfo, Source
+from LDDC.core.api.lyrics.lrclib import LocalLrclibAPI, prepare_input
+
+TRACKS = [
+    # id, 标题, 歌手, 专辑, 时长(秒)
+    (1, "夜に駆ける", "YOASOBI", "THE BOOK", 261.0),
+    (2, "Beyoncé Song", "Beyoncé", "Album!", 200.0),
+    (3, "Beyoncé Song", "Beyoncé", "Album!", 203.0),
+    (4, "Idol", "YOASOBI", "アイドル", 213.0),
+    (5, "Idol", "YOASOBI", "アイドル", 300.0),
+]
+
+
+def make_dump(path: Path, fts: bool) -> Path:
+    """生成与lrclib数据库转储结构相同的数据库"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE tracks (
+            id INTEGER PRIMARY KEY, name TEXT, name_lower TEXT, artist_name TEXT, artist_name_lower TEXT,
+            album_name TEXT, album_name_lower TEXT, duration FLOAT, last_lyrics_id INTEGER,
+            UNIQUE (name_lower, artist_name_lower, album_name_lower, duration)
+        );
+        CREATE TABLE lyrics (
+            id INTEGER PRIMARY KEY, plain_lyrics TEXT, synced_lyrics TEXT, track_id INTEGER,
+            has_plain_lyrics BOOLEAN, has_synced_lyrics BOOLEAN, instrumental BOOLEAN, source TEXT
+        );
+    """)
+    for track_id, name, artist, album, duration in TRACKS:
+        conn.execute(
+            "INSERT INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (track_id, name, prepare_input(name), artist, prepare_input(artist), album, prepare_input(album), duration, track_id),
+        )
+        conn.execute(
+            "INSERT INTO lyrics VALUES (?, ?, ?, ?, 1, 1, 0, 'lrclib')",
+            (track_id, f"{name} {track_id}", f"[00:01.00]{name} {track_id}\n[00:03.00]end", track_id),
+        )
+    if fts:
+        conn.execute("CREATE VIRTUAL TABLE tracks_fts USING fts5(name_lower, album_name_lower, artist_name_lower, content='tracks', content_rowid='id')")
+        conn.execute("INSERT INTO tracks_fts (tracks_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture(params=["dump_fts", "sidecar_fts", "no_fts"])
+def api(request, tmp_path: Path) -> LocalLrclibAPI:
+    path = make_dump(tmp_path / "lrclib.db", fts=request.param == "dump_fts")
+    api = LocalLrclibAPI(path)
+    if request.param == "sidecar_fts":
+        api.build_fts_index()
+    return api
+
+
+def test_prepare_input() -> None:
+    assert prepare_input("  Beyoncé - Song!  (Live) ") == "beyonce song live"
+
+
+def test_fts_table_selection(tmp_path: Path) -> None:
+    assert LocalLrclibAPI(make_dump(tmp_path / "a.db", fts=True)).fts_table == "main.tracks_fts"
+
+    api = LocalLrclibAPI(make_dump(tmp_path / "b.db", fts=False))
+    assert api.fts_table is None
+    api.build_fts_index()
+    assert api.fts_table == "fts_index.tracks_fts"
+    assert (tmp_path / "b.db.fts.db").exists()
+    # 再次打开时直接使用已生成的附属索引
+    assert LocalLrclibAPI(tmp_path / "b.db").fts_table == "fts_index.tracks_fts"
+
+
+def test_lookup_duration_tie_break(api: LocalLrclibAPI) -> None:
+    # 两首都在±2秒内, 选择时长最接近的
+    assert api.lookup("Beyonce Song", "BEYONCÉ", None, 202_000).id == "3"
+    assert api.lookup("Beyonce Song", "Beyonce", "album", 200_500).id == "2"
+    assert api.lookup("Beyonce Song", "Beyonce", None, 206_000) is None
+    # 没有时长时选择id最大的
+    assert api.lookup("idol", "yoasobi").id == "5"
+    assert api.lookup("Idol", "YOASOBI", "アイドル", 213_000).duration == 213_000
+    assert api.lookup("Idol", "YOASOBI", "other album") is None
+
+
+def test_search(api: LocalLrclibAPI) -> None:
+    assert [info.id for info in api.search("YOASOBI - 夜に駆ける", SearchType.SONG)] == ["1"]
+    assert {info.id for info in api.search("beyonce song", SearchType.SONG)} == {"2", "3"}
+    assert list(api.search("not found", SearchType.SONG)) == []
+    assert list(api.search("beyonce song", SearchType.SONG, page=2)) == []
+
+
+def test_get_lyrics(api: LocalLrclibAPI) -> None:
+    lyrics = api.get_lyrics(api.lookup("夜に駆ける", "YOASOBI"))
+    assert lyrics["orig"][0].words[0].text == "夜に駆ける 1"
+
+    # 没有id时按歌曲信息查找
+    info = SongInfo(source=Source.LRCLIB_DUMP, title="Idol", artist=Artist("YOASOBI"), duration=299_000)
+    assert lyrics_text(api.get_lyrics(info)) == "Idol 5"
+    assert not api.get_lyrics(SongInfo(source=Source.LRCLIB_DUMP, title="Missing", artist=Artist("X")))
+
+
+def lyrics_text(lyrics) -> str:  # noqa: ANN001
+    return lyrics["orig"][0].words[0].text
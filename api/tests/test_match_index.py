@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: Copyright (C) 2024-2025 沉默の金 <cmzj@cmzj.org>
+# SPDX-License-Identifier: GPL-3.0-only
+import sqlite3
+from collections.abc import Iterator
+
+import pytest
+
+from LDDC.common.models import Artist, SongInfo, Source
+from LDDC.core import match_index
+from LDDC.core.match_index import MatchIndexDB
+
+
+def song(song_id: str, title: str, artist: str = "YOASOBI", duration: int | None = 261000, source: Source = Source.QM) -> SongInfo:
+    return SongInfo(source=source, title=title, artist=Artist(artist), album="THE BOOK", duration=duration, id=song_id)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch) -> Iterator[MatchIndexDB]:
+    monkeypatch.setattr(match_index, "data_dir", tmp_path)
+    index = MatchIndexDB(100)
+    yield index
+    index.close()
+
+
+def rows(db: MatchIndexDB) -> list[tuple]:
+    db.flush()
+    with db.lock:
+        return db.conn.execute("SELECT source, song_key, accepted, json_extract(info, '$.title') FROM songs ORDER BY song_key").fetchall()
+
+
+def test_upsert_updates_and_keeps_accepted(db: MatchIndexDB) -> None:
+    db.add_results([song("1", "夜に駆ける"), song("2", "アイドル")])
+    db.add_match(song("1", "夜に駆ける"))
+    db.add_results([song("1", "夜に駆ける (Live)")])  # 同一首歌再次出现在搜索结果中
+    assert rows(db) == [("QM", "1", 1, "夜に駆ける (Live)"), ("QM", "2", 0, "アイドル")]
+    with db.lock:
+        assert db.conn.execute("SELECT COUNT(*) FROM songs_fts WHERE songs_fts MATCH 'title_grams : \"li\"'").fetchone() == (1,)
+
+
+def test_local_and_keyless_songs_are_skipped(db: MatchIndexDB) -> None:
+    db.add_results([song("1", "夜に駆ける", source=Source.Local), SongInfo(source=Source.QM, title="无id"), song("2", "")])
+    assert rows(db) == []
+
+
+def test_query_filters_sources_and_duration(db: MatchIndexDB) -> None:
+    db.add_results([song("1", "夜に駆ける"), song("2", "夜に駆ける", duration=300000), song("3", "夜に駆ける", duration=None), song("4", "アイドル")])
+    db.add_results([song("5", "夜に駆ける", source=Source.KG)])
+    db.add_match(song("1", "夜に駆ける"))
+    db.flush()
+
+    result = db.query(SongInfo(source=Source.Local, title="夜に駆ける", duration=263000), [Source.QM])
+    assert {(info.id, accepted) for info, accepted in result} == {("1", True), ("3", False)}
+
+    result = db.query(SongInfo(source=Source.Local, title="夜に駆ける"), [Source.QM, Source.KG])
+    assert {info.id for info, _ in result} == {"1", "2", "3", "5"}
+    assert db.query(SongInfo(source=Source.Local, title="夜に駆ける"), []) == []
+
+
+def test_writer_survives_failed_writes(db: MatchIndexDB, monkeypatch) -> None:
+    upsert = db._upsert
+    conn = db.conn
+
+    def failing_upsert(_: list) -> None:
+        db.conn = None  # 写入时连接已不可用, 回滚也不能使写入线程退出
+        msg = "disk I/O error"
+        raise sqlite3.OperationalError(msg)
+
+    monkeypatch.setattr(db, "_upsert", failing_upsert)
+    db.add_results([song("1", "夜に駆ける")])
+    db.flush()
+    db._writer.join(0.2)
+    assert db._writer.is_alive()
+
+    db.conn = conn
+    monkeypatch.setattr(db, "_upsert", upsert)
+    db.add_results([song("2", "アイドル")])
+    assert rows(db) == [("QM", "2", 0, "アイドル")]
+
+
+def test_prune_removes_oldest_unaccepted_first(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(match_index, "data_dir", tmp_path)
+    db = MatchIndexDB(2)
+    try:
+        db.add_results([song("1", "a"), song("2", "b"), song("3", "c")])
+        db.add_match(song("1", "a"))
+        db.flush()
+        with db.lock:
+            db.conn.executemany("UPDATE songs SET updated = ? WHERE song_key = ?", [(1, "1"), (2, "2"), (3, "3")])
+            db._prune()
+            db.conn.commit()
+        assert [key for _, key, _, _ in rows(db)] == ["1", "3"]
+        with db.lock:
+            assert db.conn.execute("SELECT COUNT(*) FROM songs_fts WHERE songs_fts MATCH 'title_grams : \"b\"'").fetchone() == (0,)
+    finally:
+        db.close()
+
+
+def test_disabled_without_fts5(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(match_index, "data_dir", tmp_path)
+
+    def init_db(self: MatchIndexDB) -> None:
+        raise sqlite3.OperationalError("no such module: fts5")
+
+    monkeypatch.setattr(MatchIndexDB, "init_db", init_db)
+    db = MatchIndexDB(100)
+    assert not db.enabled
+    db.add_results([song("1", "夜に駆ける")])
+    db.add_match(song("1", "夜に駆ける"))
+    db.flush()
+    db.clear()
+    assert db.query(SongInfo(source=Source.Local, title="夜に駆ける"), [Source.QM]) == []
+    db.close()
+
+
+def test_disabled_when_max_entries_is_zero(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(match_index, "data_dir", tmp_path)
+    db = MatchIndexDB(0)
+    assert not db.enabled
+    assert not (tmp_path / "match_index.db").exists()